@@ -1,120 +1,254 @@
 # Fly_in_main.py
+import argparse
 import os
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from src.parser.lexer import Lexer
-from src.parser.parser import Parser
-from src.models.zone import ZoneType
-
-ZONE_COLOR = {
-    ZoneType.NORMAL:     "#00bcd4",
-    ZoneType.PRIORITY:   "#4caf50",
-    ZoneType.RESTRICTED: "#f44336",
-    ZoneType.BLOCKED:    "#616161",
-}
-START_COLOR = "#69f0ae"
-GOAL_COLOR  = "#ffd740"
-ZONE_RADIUS = 0.5
-
-
-def plot_graph(config: object) -> None:
+import sys
+from contextlib import ExitStack
+from typing import List, Optional, TextIO
+from src.models.drone import Drone
+from src.parser.binary_map import load_map
+from src.parser.validator import Validator
+from src.routing.parallel import ParallelPlanner
+from src.routing.scheduler import Scheduler
+from src.simulation.batch import DEFAULT_MAX_TURNS
+from src.simulation.simulator import Simulator
+from src.simulation.turn_log import TurnLogWriter
+from src.simulation.turn_manager import TurnManager
+from src.visualization.console_renderer import ConsoleRenderer
+from src.visualization.formatter import MoveWriter
+from src.visualization.logger import metrics
+from src.visualization.renderer import (
+    MapRenderer, record_run, write_animation,
+)
+
+# Routing strategy of both the pool and the TurnManager with --workers > 1.
+PARALLEL_STRATEGY = "astar"
+
+
+def plot_graph(config: object, output: Optional[str] = None) -> None:
     """
-    Display the drone network as a matplotlib window.
+    Display the drone network, or write it to a file.
 
-    Each zone is a colored circle with its name centered inside.
-    Connections are drawn as dashed lines between zones.
+    Zones and connections are drawn in two batched collections, so
+    large maps render in seconds; zone names follow the zoom level.
 
     Args:
         config: ParsedConfig object from the parser.
+        output: PNG/SVG/PDF path. When given, no window is opened.
     """
-    graph      = config.graph       # type: ignore[union-attr]
-    start_zone = config.start_zone  # type: ignore[union-attr]
-    goal_zone  = config.goal_zone   # type: ignore[union-attr]
-
-    fig, ax = plt.subplots(figsize=(10, 8))
-    fig.patch.set_facecolor("#1a1a2e")
-    ax.set_facecolor("#1a1a2e")
-    ax.set_title("Drone Network Map", color="white", fontsize=14, fontweight="bold")
-    ax.set_xlabel("X", color="white")
-    ax.set_ylabel("Y", color="white")
-    ax.tick_params(colors="white")
-    for spine in ax.spines.values():
-        spine.set_edgecolor("#444466")
-
-    # ── Connexions ────────────────────────────────────────────────────────────
-    visited: set = set()
-    for zone_name, neighbours in graph.connections.items():
-        z1 = graph.zones[zone_name]
-        for neighbour_name in neighbours:
-            edge = (min(zone_name, neighbour_name), max(zone_name, neighbour_name))
-            if edge in visited:
-                continue
-            visited.add(edge)
-            z2 = graph.zones[neighbour_name]
-            ax.plot(
-                [z1.x, z2.x], [z1.y, z2.y],
-                color="#aaaacc", linewidth=1.5, linestyle="--", zorder=1,
-            )
+    renderer = MapRenderer(
+        config.graph,       # type: ignore[union-attr]
+        config.start_zone,  # type: ignore[union-attr]
+        config.goal_zone,   # type: ignore[union-attr]
+    )
+    if output:
+        renderer.save(output)
+    else:
+        renderer.show()
+
+
+def make_manager(config: object, workers: int = 0) -> TurnManager:
+    """
+    One drone per nb_drones at the start, on min-cost flow corridors.
 
-    # ── Zones ─────────────────────────────────────────────────────────────────
-    for zone in graph.zones.values():
-        if zone == start_zone:
-            color = START_COLOR
-        elif zone == goal_zone:
-            color = GOAL_COLOR
-        else:
-            color = ZONE_COLOR.get(zone.z_type, "#00bcd4")
-
-        circle = plt.Circle(
-            (zone.x, zone.y), ZONE_RADIUS,
-            color=color, ec="white", lw=1.5, zorder=2,
-        )
-        ax.add_patch(circle)
-        ax.text(
-            zone.x, zone.y, zone.name,
-            ha="center", va="center",
-            fontsize=8, fontweight="bold", color="white", zorder=3,
-        )
-
-    # ── Légende ───────────────────────────────────────────────────────────────
-    legend_items = [
-        mpatches.Patch(color=START_COLOR, label="Start"),
-        mpatches.Patch(color=GOAL_COLOR,  label="Goal"),
-        mpatches.Patch(color=ZONE_COLOR[ZoneType.NORMAL],     label="Normal"),
-        mpatches.Patch(color=ZONE_COLOR[ZoneType.PRIORITY],   label="Priority"),
-        mpatches.Patch(color=ZONE_COLOR[ZoneType.RESTRICTED], label="Restricted"),
-        mpatches.Patch(color=ZONE_COLOR[ZoneType.BLOCKED],    label="Blocked"),
+    With more than one worker, large replanning passes run in a process
+    pool and the manager routes with the pool's A* (D* Lite has no
+    parallel variant); close ``manager.planner`` when done.
+    """
+    start = config.start_zone  # type: ignore[union-attr]
+    goal = config.goal_zone  # type: ignore[union-attr]
+    drones = [
+        Drone(i, path=[start], goal=goal)
+        for i in range(1, config.nb_drones + 1)  # type: ignore
     ]
-    ax.legend(
-        handles=legend_items, loc="upper left",
-        facecolor="#2a2a4a", labelcolor="white", fontsize=9,
+    planner = ParallelPlanner(
+        config.graph, workers, strategy=PARALLEL_STRATEGY,  # type: ignore
+    ) if workers > 1 else None
+    manager = TurnManager(
+        drones, Simulator(config.graph, drones),  # type: ignore
+        strategy=PARALLEL_STRATEGY if planner else "dstar",
+        planner=planner,
     )
+    manager.flow_routes()
+    return manager
 
-    all_x = [z.x for z in graph.zones.values()]
-    all_y = [z.y for z in graph.zones.values()]
-    pad = 1.5
-    ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-    ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-    ax.set_aspect("equal")
-    plt.tight_layout()
-    plt.show()
-
-
-def main() -> None:
-    """Entry point: parse the map file and display the network as a plot."""
-    config_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "map.txt"
+
+def animate_run(config: object, output: str) -> None:
+    """
+    Simulate every drone to the goal and write the replay to output.
+
+    Args:
+        config: ParsedConfig object from the parser.
+        output: Animation path (.gif, or any format ffmpeg supports).
+    """
+    manager = make_manager(config)
+    renderer = MapRenderer(
+        config.graph,       # type: ignore[union-attr]
+        config.start_zone,  # type: ignore[union-attr]
+        config.goal_zone,   # type: ignore[union-attr]
     )
-    lexer = Lexer(config_path)
-    lexer.read_file()
-    tokens = lexer.tokenize()
+    write_animation(renderer, record_run(manager, manager.drones), output)
+
+
+def write_schedule(config: object, moves: TextIO) -> int:
+    """
+    Plan every drone up front and write the plan's move lines.
 
-    parser = Parser(tokens)
-    config = parser.parse()
+    The Scheduler (cooperative space-time A*) reserves zones and links
+    for each drone in turn, instead of the turn-by-turn simulation.
 
-    plot_graph(config)
+    Args:
+        config: ParsedConfig object from the parser.
+        moves: Stream for the per-turn move lines.
+
+    Returns:
+        The number of turns of the plan.
+    """
+    schedule = Scheduler(
+        config.graph,       # type: ignore[union-attr]
+        config.start_zone,  # type: ignore[union-attr]
+        config.goal_zone,   # type: ignore[union-attr]
+    ).plan(config.nb_drones)  # type: ignore[union-attr]
+    with MoveWriter(moves) as writer:
+        for turn in schedule.turn_moves():
+            writer.write_turn(turn)
+    return schedule.turns
+
+
+def run_in_terminal(
+    config: object,
+    moves: Optional[TextIO] = None,
+    console: bool = False,
+    log: Optional[str] = None,
+    workers: int = 0,
+) -> int:
+    """
+    Simulate every drone to the goal without matplotlib.
+
+    Args:
+        config: ParsedConfig object from the parser.
+        moves: Stream for the per-turn move lines (buffered writes).
+        console: Draw the map live in the terminal, repainting only the
+            cells that changed, at most ten frames per second.
+        log: Turn log path. Replay or diff it with
+            ``python -m src.simulation.turn_log``.
+        workers: Plan large replanning passes in this many processes.
+
+    Returns:
+        The number of turns played.
+    """
+    manager = make_manager(config, workers)
+    drones = manager.drones
+    turns = 0
+    # Pool, shared memory and files are released even on an exception.
+    with ExitStack() as stack:
+        if manager.planner is not None:
+            stack.enter_context(manager.planner)
+        writer = stack.enter_context(
+            MoveWriter(moves)
+        ) if moves is not None else None
+        recorder = stack.enter_context(TurnLogWriter(
+            log, config.graph, drones  # type: ignore[union-attr]
+        )) if log else None
+        screen = ConsoleRenderer(
+            config.graph,       # type: ignore[union-attr]
+            config.start_zone,  # type: ignore[union-attr]
+            config.goal_zone,   # type: ignore[union-attr]
+        ) if console else None
+        if screen is not None:
+            stack.callback(screen.close)
+        while turns < DEFAULT_MAX_TURNS and not all(
+            d.is_at_destination(d.goal) for d in drones
+        ):
+            played = manager.run_turn()
+            turns += 1
+            if writer is not None:
+                writer.write_turn(played)
+            if recorder is not None:
+                recorder.record()
+            if screen is not None:
+                arrived = sum(d.is_at_destination(d.goal) for d in drones)
+                screen.update(
+                    f"turn {turns}  arrived {arrived}/{len(drones)}"
+                )
+        if screen is not None:
+            screen.update(f"turn {turns}  done", force=True)
+    return turns
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point: load the map (compiled cache if fresh) and plot it."""
+    parser = argparse.ArgumentParser(description="Plot a drone map.")
+    parser.add_argument(
+        "map", nargs="?",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "map.txt"
+        ),
+    )
+    parser.add_argument("-o", "--output",
+                        help="write the map to this image, no window")
+    parser.add_argument("--animate",
+                        help="simulate the run and write it to this .gif")
+    parser.add_argument("--moves",
+                        help="simulate the run and write its move lines "
+                             "to this file ('-' for stdout)")
+    parser.add_argument("--console", action="store_true",
+                        help="simulate the run, drawn live in the terminal")
+    parser.add_argument("--log",
+                        help="simulate the run and record it to this "
+                             "turn log (.flylog)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processes for parallel route planning")
+    parser.add_argument("--schedule", action="store_true",
+                        help="plan every drone up front (cooperative A*) "
+                             "and write that plan's --moves instead of "
+                             "simulating turn by turn")
+    args = parser.parse_args(argv)
+    if args.schedule and (
+        not args.moves or args.console or args.log or args.workers
+    ):
+        parser.error("--schedule only writes --moves")
+    # FLY_IN_LOG=run.jsonl (ou run.json, trace Chrome) active les mesures
+    # pour toute l'exécution : chargement, validation et simulation.
+    metrics.enable_from_env()
+    try:
+        run(args)
+    finally:
+        metrics.disable()
+
+
+def run(args: argparse.Namespace) -> None:
+    """
+    Load and validate the map, then do what the command line asked.
+
+    Args:
+        args: Parsed command-line arguments of ``main``.
+    """
+    config = load_map(args.map)
+    report = Validator(config).validate()
+    for issue in report.warnings:
+        print(f"Warning: {issue.message}")
+    report.raise_for_errors()
+
+    if args.moves or args.console or args.log:
+        with ExitStack() as stack:
+            out = stack.enter_context(
+                open(args.moves, "w")
+            ) if args.moves and args.moves != "-" else (
+                sys.stdout if args.moves else None
+            )
+            if args.schedule and out is not None:
+                write_schedule(config, out)
+            else:
+                run_in_terminal(
+                    config, out, args.console, args.log, args.workers
+                )
+    if args.animate:
+        animate_run(config, args.animate)
+    if args.output or not (
+        args.animate or args.moves or args.console or args.log
+    ):
+        plot_graph(config, args.output)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,305 @@
+import argparse
+import math
+import random
+import sys
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+
+# Cartes synthétiques déterministes : même forme, taille, flotte et
+# graine donnent le même fichier, octet pour octet.
+
+Point = Tuple[int, int]
+Link = Tuple[int, int]
+
+
+class Layout:
+    """
+    Squelette d'une carte : positions des zones (0 = départ, 1 =
+    arrivée) et liens.
+    """
+
+    def __init__(self) -> None:
+        self.points: List[Point] = []
+        self.links: List[Link] = []
+        # max_drones / max_link_capacity imposés par la forme
+        self.capacity: Dict[int, int] = {}
+        self.link_capacity: Dict[int, int] = {}
+
+    def add(self, x: int, y: int) -> int:
+        self.points.append((x, y))
+        return len(self.points) - 1
+
+    def connect(self, a: int, b: int) -> None:
+        self.links.append((a, b))
+
+    def chain(self, ids: List[int]) -> None:
+        for a, b in zip(ids, ids[1:]):
+            self.connect(a, b)
+
+
+def linear(size: int, rng: random.Random) -> Layout:
+    """Chaîne départ - z2 - ... - arrivée."""
+    layout = Layout()
+    layout.add(0, 0)
+    layout.add(size - 1, 0)
+    ids = [0] + [layout.add(i, 0) for i in range(1, size - 1)] + [1]
+    layout.chain(ids)
+    return layout
+
+
+def fork(size: int, rng: random.Random) -> Layout:
+    """Départ et arrivée reliés par ~sqrt(size) branches parallèles."""
+    layout = Layout()
+    branches = max(2, math.isqrt(size - 2) // 2)
+    length = max(1, (size - 2) // branches)
+    layout.add(0, 0)
+    layout.add(length + 1, 0)
+    for b in range(branches):
+        y = b - branches // 2
+        ids = [layout.add(i, y) for i in range(1, length + 1)]
+        layout.chain([0] + ids + [1])
+    return layout
+
+
+def grid(size: int, rng: random.Random) -> Layout:
+    """Grille 4-connexe ; départ et arrivée aux coins opposés."""
+    layout = Layout()
+    side = max(2, math.isqrt(size - 1) + 1)
+    ids: Dict[Point, int] = {}
+    corner = (side - 1, side - 1)
+    ids[(0, 0)] = layout.add(0, 0)
+    ids[corner] = layout.add(*corner)
+    for y in range(side):
+        for x in range(side):
+            if (x, y) not in ids:
+                ids[(x, y)] = layout.add(x, y)
+    for (x, y), i in ids.items():
+        if (x + 1, y) in ids:
+            layout.connect(i, ids[(x + 1, y)])
+        if (x, y + 1) in ids:
+            layout.connect(i, ids[(x, y + 1)])
+    return layout
+
+
+def funnel(size: int, rng: random.Random) -> Layout:
+    """
+    Couches larges qui se resserrent sur un goulot d'une zone, puis
+    s'élargissent jusqu'à l'arrivée. Zones et liens des couches larges
+    acceptent deux drones, le goulot un seul.
+    """
+    layout = Layout()
+    width = max(1, math.isqrt(size // 2))
+    depth = max(1, (size - 3) // (2 * width))
+    layout.add(0, 0)
+    layout.add(2 * depth + 2, 0)
+    left = [0]
+    for d in range(1, depth + 1):
+        layer = [layout.add(d, y - width // 2) for y in range(width)]
+        _bridge(layout, left, layer)
+        left = layer
+    neck = layout.add(depth + 1, 0)
+    _bridge(layout, left, [neck])
+    left = [neck]
+    for d in range(depth + 2, 2 * depth + 2):
+        layer = [layout.add(d, y - width // 2) for y in range(width)]
+        _bridge(layout, left, layer)
+        left = layer
+    _bridge(layout, left, [1])
+    for i in range(2, len(layout.points)):
+        if i != neck:
+            layout.capacity[i] = 2
+    for link, (a, b) in enumerate(layout.links):
+        if neck not in (a, b):
+            layout.link_capacity[link] = 2
+    return layout
+
+
+def _bridge(layout: Layout, left: List[int], right: List[int]) -> None:
+    """Relie deux couches voisines : chaque zone touche l'autre couche."""
+    if len(left) >= len(right):
+        for j, a in enumerate(left):
+            layout.connect(a, right[j * len(right) // len(left)])
+    else:
+        for j, b in enumerate(right):
+            layout.connect(left[j * len(left) // len(right)], b)
+
+
+def geometric(size: int, rng: random.Random) -> Layout:
+    """
+    Graphe géométrique aléatoire : size points dans un carré, reliés
+    sous un rayon donnant ~6 voisins, plus une épine en serpentin qui
+    garantit la connexité. Construit en O(size) par seaux de la taille
+    du rayon.
+    """
+    layout = Layout()
+    scale = max(10, 4 * math.isqrt(size))
+    radius = scale * math.sqrt(6 / (math.pi * size))
+    taken: Set[Point] = set()
+    while len(taken) < size:
+        taken.add((rng.randrange(scale), rng.randrange(scale)))
+    points = sorted(taken)
+    start = min(points, key=lambda p: p[0] + p[1])
+    goal = max(points, key=lambda p: p[0] + p[1])
+    layout.add(*start)
+    layout.add(*goal)
+    for p in points:
+        if p != start and p != goal:
+            layout.add(*p)
+
+    cell = max(1, int(radius))
+    buckets: Dict[Point, List[int]] = {}
+    for i, (x, y) in enumerate(layout.points):
+        buckets.setdefault((x // cell, y // cell), []).append(i)
+    limit = radius * radius
+    for (cx, cy), members in buckets.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            others = buckets.get((cx + dx, cy + dy))
+            if not others:
+                continue
+            for a in members:
+                ax, ay = layout.points[a]
+                for b in others:
+                    if (dx, dy) == (0, 0) and b <= a:
+                        continue
+                    bx, by = layout.points[b]
+                    if (ax - bx) ** 2 + (ay - by) ** 2 <= limit:
+                        layout.connect(a, b)
+
+    # serpentin sur les seaux : relie tout, avec des liens courts
+    linked = {(min(a, b), max(a, b)) for a, b in layout.links}
+    order = sorted(
+        range(len(layout.points)),
+        key=lambda i: _snake(layout.points[i], cell),
+    )
+    for a, b in zip(order, order[1:]):
+        if (min(a, b), max(a, b)) not in linked:
+            layout.connect(a, b)
+    return layout
+
+
+def _snake(point: Point, cell: int) -> Tuple[int, int, int]:
+    row = point[1] // cell
+    x = point[0] if row % 2 == 0 else -point[0]
+    return row, x, point[1]
+
+
+SHAPES: Dict[str, Callable[[int, random.Random], Layout]] = {
+    "linear": linear,
+    "fork": fork,
+    "grid": grid,
+    "funnel": funnel,
+    "geometric": geometric,
+}
+
+
+def iter_map_lines(
+    shape: str,
+    size: int,
+    nb_drones: int,
+    seed: int = 0,
+    restricted: float = 0.0,
+    priority: float = 0.0,
+    blocked: float = 0.0,
+) -> Iterator[str]:
+    """
+    Lignes d'une carte de la forme donnée avec ~size zones.
+
+    restricted, priority et blocked sont les proportions de zones de
+    chaque type, tirées avec la graine ; les zones d'un plus court
+    chemin départ → arrivée ne sont jamais bloquées : l'arrivée reste
+    atteignable.
+    """
+    if shape not in SHAPES:
+        raise ValueError(
+            f"Unknown shape '{shape}' (expected one of {', '.join(SHAPES)})"
+        )
+    if size < 3:
+        raise ValueError("size must be >= 3")
+    rng = random.Random(f"{shape}:{size}:{seed}")
+    layout = SHAPES[shape](size, rng)
+    spine = _spine(layout)
+    names = ["start", "goal"] + [
+        f"z{i}" for i in range(2, len(layout.points))
+    ]
+
+    yield f"# {shape} size={size} drones={nb_drones} seed={seed}"
+    yield f"nb_drones: {nb_drones}"
+    for i, (x, y) in enumerate(layout.points):
+        kind = "start_hub" if i == 0 else "end_hub" if i == 1 else "hub"
+        meta = []
+        if i > 1:
+            roll = rng.random()
+            if roll < blocked and i not in spine:
+                meta.append("zone=blocked")
+            elif roll < blocked + restricted:
+                meta.append("zone=restricted")
+            elif roll < blocked + restricted + priority:
+                meta.append("zone=priority")
+        if i in layout.capacity:
+            meta.append(f"max_drones={layout.capacity[i]}")
+        suffix = f" [{' '.join(meta)}]" if meta else ""
+        yield f"{kind}: {names[i]} {x} {y}{suffix}"
+    for link, (a, b) in enumerate(layout.links):
+        capacity = layout.link_capacity.get(link)
+        suffix = f" [max_link_capacity={capacity}]" if capacity else ""
+        yield f"connection: {names[a]}-{names[b]}{suffix}"
+
+
+def _spine(layout: Layout) -> Set[int]:
+    """Zones d'un plus court chemin départ → arrivée (BFS)."""
+    adjacency: List[List[int]] = [[] for _ in layout.points]
+    for a, b in layout.links:
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+    prev = {0: -1}
+    queue = deque([0])
+    while queue and 1 not in prev:
+        current = queue.popleft()
+        for other in adjacency[current]:
+            if other not in prev:
+                prev[other] = current
+                queue.append(other)
+    spine = set()
+    node = 1 if 1 in prev else -1
+    while node != -1:
+        spine.add(node)
+        node = prev[node]
+    return spine
+
+
+def write_map(filename: str, *args: object, **kwargs: object) -> None:
+    """Écrit la carte de iter_map_lines(*args, **kwargs) dans filename."""
+    with open(filename, "w") as f:
+        for line in iter_map_lines(*args, **kwargs):  # type: ignore
+            f.write(line + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate a deterministic synthetic map."
+    )
+    parser.add_argument("shape", choices=sorted(SHAPES))
+    parser.add_argument("size", type=int, help="approximate zone count")
+    parser.add_argument("drones", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--restricted", type=float, default=0.0)
+    parser.add_argument("--priority", type=float, default=0.0)
+    parser.add_argument("--blocked", type=float, default=0.0)
+    parser.add_argument("-o", "--output", help="default: stdout")
+    args = parser.parse_args(argv)
+    lines = iter_map_lines(
+        args.shape, args.size, args.drones, args.seed,
+        args.restricted, args.priority, args.blocked,
+    )
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for line in lines:
+            out.write(line + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
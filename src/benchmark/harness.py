@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.models.drone import Drone
+from src.parser.lexer import Lexer
+from src.parser.parser import ParsedConfig, Parser
+from src.routing.strategies import STRATEGIES, get_strategy
+from src.simulation.simulator import Simulator
+from src.simulation.turn_manager import TurnManager
+from .generator import write_map
+
+
+# (forme, zones, drones) de la suite par défaut, et de la suite --quick.
+DEFAULT_CASES = [
+    ("linear", 500, 10),
+    ("fork", 1000, 50),
+    ("grid", 2500, 50),
+    ("funnel", 1000, 100),
+    ("geometric", 2500, 50),
+]
+QUICK_CASES = [(shape, 100, 10) for shape, _, _ in DEFAULT_CASES]
+
+DEFAULT_THRESHOLD = 0.2
+# Écart absolu en dessous duquel une hausse est du bruit (secondes).
+NOISE_FLOOR = 0.001
+MAX_TURNS = 100000
+
+Results = Dict[str, Dict[str, float]]
+
+
+class Regression:
+    """Mesure plus lente que la référence au-delà du seuil."""
+
+    def __init__(self, case: str, metric: str, baseline: float,
+                 current: float) -> None:
+        self.case = case
+        self.metric = metric
+        self.baseline = baseline
+        self.current = current
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.case} {self.metric}: {self.baseline:.6f}s -> "
+            f"{self.current:.6f}s (x{self.ratio:.2f})"
+        )
+
+
+def case_name(shape: str, size: int, drones: int) -> str:
+    return f"{shape}-{size}-{drones}"
+
+
+def best_of(repeat: int, setup: Callable[[], Any],
+            run: Callable[[Any], Any]) -> float:
+    """Meilleur temps de run(setup()) sur repeat essais ; setup non compté."""
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        started = time.perf_counter()
+        run(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_case(filename: str, repeat: int = 3) -> Dict[str, float]:
+    """
+    Temps (secondes, meilleur de repeat) de chaque étape sur une carte :
+    lexer, parser, chaque stratégie de routage (départ → arrivée), puis
+    une simulation complète par TurnManager et par Simulator seul (routes
+    données), en total et par tour.
+    """
+    def tokens() -> list:
+        return list(Lexer(filename).iter_tokens())
+
+    def config() -> ParsedConfig:
+        return Parser(tokens()).parse()
+
+    metrics = {
+        "lexer": best_of(repeat, lambda: None, lambda _: tokens()),
+        "parser": best_of(repeat, tokens, lambda t: Parser(t).parse()),
+    }
+    for name in STRATEGIES:
+        metrics[f"route_{name}"] = best_of(
+            repeat,
+            lambda: _router(config(), name),
+            lambda args: args[0].find_route(*args[1:]),
+        )
+
+    turns: List[int] = []
+    metrics["turn_manager"] = best_of(
+        repeat, lambda: _manager(config()),
+        lambda m: turns.append(_run(m.run_turn, m.drones)),
+    )
+    metrics["turn_manager_turn"] = metrics["turn_manager"] / max(
+        1, turns[-1]
+    )
+    turns.clear()
+    metrics["simulator"] = best_of(
+        repeat, lambda: _simulator(config()),
+        lambda s: turns.append(_run(s.tick, s.drones)),
+    )
+    metrics["simulator_tick"] = metrics["simulator"] / max(1, turns[-1])
+    return metrics
+
+
+def _router(config: ParsedConfig, name: str) -> Tuple[Any, Any, Any]:
+    return (
+        get_strategy(name, config.graph),
+        config.start_zone, config.goal_zone,
+    )
+
+
+def _drones(config: ParsedConfig, path: list) -> List[Drone]:
+    return [
+        Drone(i, path=path, goal=config.goal_zone)
+        for i in range(1, config.nb_drones + 1)
+    ]
+
+
+def _manager(config: ParsedConfig) -> TurnManager:
+    drones = _drones(config, [config.start_zone])
+    return TurnManager(drones, Simulator(config.graph, drones))
+
+
+def _simulator(config: ParsedConfig) -> Simulator:
+    route = get_strategy("bfs", config.graph).find_route(
+        config.start_zone, config.goal_zone
+    )
+    return Simulator(config.graph, _drones(config, route))
+
+
+def _run(step: Callable[[], Any], drones: List[Drone]) -> int:
+    """Appelle step jusqu'à l'arrivée de tous les drones ; nb de tours."""
+    turns = 0
+    while turns < MAX_TURNS and not all(
+        d.is_at_destination(d.goal) for d in drones
+    ):
+        step()
+        turns += 1
+    return turns
+
+
+def run_suite(
+    cases: List[Tuple[str, int, int]],
+    repeat: int = 3,
+    seed: int = 0,
+    directory: Optional[str] = None,
+) -> Results:
+    """Génère chaque carte (graine fixe) et la mesure avec bench_case."""
+    results: Results = {}
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for shape, size, drones in cases:
+            name = case_name(shape, size, drones)
+            filename = os.path.join(tmp, name + ".txt")
+            write_map(filename, shape, size, drones, seed,
+                      restricted=0.1, priority=0.1, blocked=0.05)
+            results[name] = bench_case(filename, repeat)
+    return results
+
+
+def compare(
+    current: Results,
+    baseline: Results,
+    threshold: float = DEFAULT_THRESHOLD,
+    noise_floor: float = NOISE_FLOOR,
+) -> List[Regression]:
+    """
+    Mesures présentes des deux côtés et plus lentes que la référence de
+    plus de threshold (0.2 = +20 %) et de plus de noise_floor secondes.
+    """
+    regressions = []
+    for case, metrics in current.items():
+        reference = baseline.get(case, {})
+        for metric, value in metrics.items():
+            base = reference.get(metric)
+            if base is None:
+                continue
+            if value > base * (1 + threshold) and value - base > noise_floor:
+                regressions.append(Regression(case, metric, base, value))
+    return regressions
+
+
+def save_baseline(results: Results, filename: str) -> None:
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": results,
+    }
+    with open(filename, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_baseline(filename: str) -> Results:
+    """Résultats par cas d'un fichier écrit par save_baseline."""
+    with open(filename) as f:
+        cases: Results = json.load(f)["cases"]
+    return cases
+
+
+def parse_case(text: str) -> Tuple[str, int, int]:
+    """Convertit "forme:zones:drones" en (forme, zones, drones)."""
+    shape, size, drones = text.split(":")
+    return shape, int(size), int(drones)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Lance la suite ; 1 si une régression dépasse le seuil."""
+    parser = argparse.ArgumentParser(
+        description="Time lexer, parser, routing and simulation on "
+                    "generated maps, against a JSON baseline."
+    )
+    parser.add_argument("--case", action="append", type=parse_case,
+                        help="shape:zones:drones (repeatable)")
+    parser.add_argument("--quick", action="store_true",
+                        help="small maps only")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write results as the new baseline")
+    parser.add_argument("--compare", help="baseline to compare against")
+    parser.add_argument("--threshold", type=float,
+                        default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    cases = args.case or (QUICK_CASES if args.quick else DEFAULT_CASES)
+    results = run_suite(cases, args.repeat, args.seed)
+    for case, metrics in results.items():
+        print(case)
+        for metric, value in metrics.items():
+            print(f"  {metric:<18} {value * 1000:10.3f} ms")
+    if args.save:
+        save_baseline(results, args.save)
+    if args.compare:
+        regressions = compare(
+            results, load_baseline(args.compare), args.threshold
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+from array import array
+from typing import (
+    Any, Dict, List, MutableSequence, Optional, Sequence, Tuple, TYPE_CHECKING,
+)
+from .zone import ZoneType
+
+if TYPE_CHECKING:
+    from .graph import Graph
+    from .zone import Zone
+
+
+BLOCKED = ZoneType.BLOCKED.value
+DEFAULT_LINK_CAPACITY = 1
+
+
+class CompiledGraph:
+    """
+    Vue entière du Graph : ids denses, adjacence CSR, attributs en tableaux.
+
+    Les voisins de la zone i sont neighbours[offsets[i]:offsets[i + 1]] ;
+    chaque case CSR renvoie vers un lien non orienté via edge_link. Le
+    Graph propriétaire tient à jour type, capacité, coût et occupation
+    quand ses zones changent : cette vue n'est jamais en retard sur elles.
+
+    Chaque lien a une capacité par tour (max_link_capacity) ;
+    link_usage[l] compte ses passages du tour link_stamp[l], un compteur
+    d'un autre tour valant zéro : changer de tour ne coûte rien.
+    """
+
+    __slots__ = (
+        "names", "index", "x", "y", "zone_type", "capacity", "move_cost",
+        "offsets", "neighbours", "edge_link", "link_capacity", "occupancy",
+        "link_usage", "link_stamp", "costs",
+    )
+
+    def __init__(
+        self,
+        names: List[str],
+        x: Sequence[int],
+        y: Sequence[int],
+        zone_type: MutableSequence[int],
+        capacity: MutableSequence[int],
+        move_cost: MutableSequence[int],
+        offsets: Sequence[int],
+        neighbours: Sequence[int],
+        edge_link: Sequence[int],
+        link_capacity: Sequence[int],
+        occupancy: Optional[MutableSequence[int]] = None,
+    ) -> None:
+        """Construit la vue à partir de tableaux déjà remplis."""
+        self.names = names
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(names)}
+        self.x = x
+        self.y = y
+        self.zone_type = zone_type
+        self.capacity = capacity
+        self.move_cost = move_cost
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.edge_link = edge_link
+        self.link_capacity = link_capacity
+        self.occupancy: MutableSequence[int] = (
+            occupancy if occupancy is not None
+            else array("i", bytes(4 * len(names)))
+        )
+        self.link_usage = array("i", bytes(4 * len(link_capacity)))
+        self.link_stamp = array("i", [-1]) * len(link_capacity)
+        # Poids de routage (src.routing.cost_model), construits à la
+        # demande et rafraîchis avec la zone.
+        self.costs: Optional[Any] = None
+
+    @classmethod
+    def from_graph(cls, graph: "Graph") -> "CompiledGraph":
+        """Compile un Graph (occupation reprise des zones)."""
+        names = list(graph.zones)
+        index = {n: i for i, n in enumerate(names)}
+        x, y = array("i"), array("i")
+        zone_type, capacity, move_cost = array("B"), array("i"), array("B")
+        occupancy = array("i")
+        for zone in graph.zones.values():
+            x.append(zone.x)
+            y.append(zone.y)
+            zone_type.append(zone.z_type.value)
+            capacity.append(zone.capacity)
+            move_cost.append(zone.get_movement_cost())
+            occupancy.append(zone.occupancy)
+
+        offsets = array("i", [0])
+        neighbours, edge_link = array("i"), array("i")
+        links: Dict[Tuple[int, int], int] = {}
+        for u, name in enumerate(names):
+            for neighbour_name in graph.connections[name]:
+                v = index[neighbour_name]
+                key = (u, v) if u < v else (v, u)
+                link = links.setdefault(key, len(links))
+                neighbours.append(v)
+                edge_link.append(link)
+            offsets.append(len(neighbours))
+
+        link_capacity = array("i", [DEFAULT_LINK_CAPACITY]) * len(links)
+        for (u, v), link in links.items():
+            link_capacity[link] = graph.link_capacity(names[u], names[v])
+        return cls(
+            names, x, y, zone_type, capacity, move_cost,
+            offsets, neighbours, edge_link, link_capacity, occupancy,
+        )
+
+    def refresh_zone(self, zone: "Zone") -> None:
+        """Recopie type, capacité et coût d'une zone modifiée."""
+        i = self.index[zone.name]
+        self.zone_type[i] = zone.z_type.value
+        self.capacity[i] = zone.capacity
+        self.move_cost[i] = zone.get_movement_cost()
+        if self.costs is not None:
+            self.costs.refresh(i)
+
+    @property
+    def num_zones(self) -> int:
+        """Nombre de zones."""
+        return len(self.names)
+
+    @property
+    def num_links(self) -> int:
+        """Nombre de liens non orientés."""
+        return len(self.link_capacity)
+
+    def id_of(self, name: str) -> int:
+        """Id dense d'une zone (KeyError si inconnue)."""
+        return self.index[name]
+
+    def find(self, name: str) -> Optional[int]:
+        """Id dense d'une zone, ou None si inconnue."""
+        return self.index.get(name)
+
+    def neighbour_ids(self, zone_id: int) -> Sequence[int]:
+        """Voisins d'une zone (tranche du tableau CSR)."""
+        return self.neighbours[self.offsets[zone_id]:self.offsets[zone_id + 1]]
+
+    def is_accessible(self, zone_id: int) -> bool:
+        """True si la zone n'est pas bloquée."""
+        return self.zone_type[zone_id] != BLOCKED
+
+    def has_capacity(self, zone_id: int) -> bool:
+        """True si la zone peut accueillir un drone de plus."""
+        return self.occupancy[zone_id] < self.capacity[zone_id]
+
+    def can_move(self, zone_id: int) -> bool:
+        """Équivalent entier de Graph.can_move."""
+        return (
+            self.zone_type[zone_id] != BLOCKED
+            and self.occupancy[zone_id] < self.capacity[zone_id]
+        )
+
+    def link_between(self, u: int, v: int) -> int:
+        """Id du lien u-v, ou -1 si les zones ne sont pas voisines."""
+        for slot in range(self.offsets[u], self.offsets[u + 1]):
+            if self.neighbours[slot] == v:
+                return self.edge_link[slot]
+        return -1
+
+    def link_open(self, link: int, turn: int) -> bool:
+        """True si link accepte encore un drone pendant turn."""
+        return (
+            self.link_stamp[link] != turn
+            or self.link_usage[link] < self.link_capacity[link]
+        )
+
+    def link_remaining(self, link: int, turn: int) -> int:
+        """Passages encore permis sur link pendant turn."""
+        if self.link_stamp[link] != turn:
+            return self.link_capacity[link]
+        return self.link_capacity[link] - self.link_usage[link]
+
+    def use_link(self, link: int, turn: int) -> bool:
+        """Compte un passage sur link ; True si le lien vient de saturer."""
+        if self.link_stamp[link] != turn:
+            self.link_stamp[link] = turn
+            self.link_usage[link] = 0
+        self.link_usage[link] += 1
+        return self.link_usage[link] == self.link_capacity[link]
+
+    def names_of(self, zone_ids: Sequence[int]) -> List[str]:
+        """Noms des zones d'une suite d'ids."""
+        names = self.names
+        return [names[i] for i in zone_ids]
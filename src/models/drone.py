@@ -1,5 +1,5 @@
-from dataclasses import dataclass, field
-from typing import Optional, List, TYPE_CHECKING
+import weakref
+from typing import Iterable, Iterator, Optional, Tuple, Union, overload
 from enum import Enum, auto
 from src.models.zone import Zone
 
@@ -12,16 +12,105 @@ class DroneState(Enum):
     ARRIVED = auto()
 
 
-@dataclass
+class ZonePath:
+    """
+    Chemin immuable, partagé par tous les drones qui le suivent. Se lit
+    comme le tuple zones (indices, tranches, len, in, itération).
+    """
+
+    __slots__ = ("zones", "__weakref__")
+
+    def __init__(self, zones: Tuple[Zone, ...]) -> None:
+        self.zones = zones
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    @overload
+    def __getitem__(self, index: int) -> Zone: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Tuple[Zone, ...]: ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[Zone, Tuple[Zone, ...]]:
+        return self.zones[index]
+
+    def __iter__(self) -> Iterator[Zone]:
+        return iter(self.zones)
+
+    def __contains__(self, zone: object) -> bool:
+        return zone in self.zones
+
+    def __repr__(self) -> str:
+        return f"ZonePath({[z.name for z in self.zones]!r})"
+
+
+# Chemins vivants, par identité de leurs zones : deux graphes peuvent
+# avoir des zones de même nom. Une entrée disparaît avec son dernier
+# drone.
+_paths: "weakref.WeakValueDictionary[Tuple[int, ...], ZonePath]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def intern_path(zones: Iterable[Zone]) -> ZonePath:
+    """Le ZonePath partagé qui suit zones."""
+    if isinstance(zones, ZonePath):
+        return zones
+    zones = tuple(zones)
+    key = tuple(map(id, zones))
+    path = _paths.get(key)
+    if path is None:
+        path = _paths[key] = ZonePath(zones)
+    return path
+
+
 class Drone:
-    
-    drone_id: int 
-    state: DroneState = DroneState.IDLE
-    path: List['Zone'] = field(default_factory=list) 
-    transit_target: Optional['Zone'] = None
-    transit_remaining: int = 0
-    path_index:int = 0
-    
+    """
+    Drone compact (__slots__) : pas de dictionnaire par instance et un
+    chemin partagé, internés par intern_path. Affecter une liste à path
+    la remplace par le ZonePath correspondant.
+    """
+
+    __slots__ = (
+        "drone_id", "state", "_path", "transit_target",
+        "transit_remaining", "path_index", "goal",
+    )
+
+    def __init__(
+        self,
+        drone_id: int,
+        state: DroneState = DroneState.IDLE,
+        path: Iterable[Zone] = (),
+        transit_target: Optional[Zone] = None,
+        transit_remaining: int = 0,
+        path_index: int = 0,
+        goal: Optional[Zone] = None,
+    ) -> None:
+        self.drone_id = drone_id
+        self.state = state
+        self._path = intern_path(path)
+        self.transit_target = transit_target
+        self.transit_remaining = transit_remaining
+        self.path_index = path_index
+        self.goal = goal
+
+    @property
+    def path(self) -> ZonePath:
+        return self._path
+
+    @path.setter
+    def path(self, zones: Iterable[Zone]) -> None:
+        self._path = intern_path(zones)
+
+    def __repr__(self) -> str:
+        return (
+            f"Drone(drone_id={self.drone_id!r}, state={self.state!r}, "
+            f"path_index={self.path_index!r}, path={self._path!r})"
+        )
+
     @property 
     def current_zone(self) -> Optional['Zone']:
         if self.path_index < len(self.path): 
@@ -34,7 +123,7 @@ class Drone:
             return self.path[self.path_index + 1]
         return None
     
-    def is_at_destination(self, goal: 'Zone') -> bool:
+    def is_at_destination(self, goal: Optional['Zone']) -> bool:
         return self.state == DroneState.ARRIVED or (
             self.current_zone == goal and self.path_index > 0
         )
@@ -58,5 +147,6 @@ class Drone:
         if self.transit_remaining <= 0 and self.transit_target:
             self.path_index += 1
             self.state = DroneState.MOVING
+            self.transit_target = None
             return True
         return False
\ No newline at end of file
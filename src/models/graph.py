@@ -1,27 +1,212 @@
-from typing import Dict, List, Optional
+import sys
+import weakref
+from array import array
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+from . import zone as zone_module
 from .zone import Zone,ZoneType
 from .drone import Drone
+from .compiled_graph import CompiledGraph, DEFAULT_LINK_CAPACITY
 
 class Graph:
     def __init__(self):
         self.zones: Dict[str, Zone] = {}
         self.connections: Dict[str, List[str]] = {}
+        # max_link_capacity de chaque lien, clé (plus petit nom, plus grand).
+        self.capacities: Dict[Tuple[str, str], int] = {}
+        # Tour courant des compteurs de liens et nombre de liens saturés
+        # pendant ce tour (fermés pour le routage jusqu'à next_turn).
+        self.turn = 0
+        self.saturated_links = 0
+        self._compiled: Optional[CompiledGraph] = None
+        # Incrémenté quand une zone devient pleine, cesse de l'être, ou
+        # change de type ou de capacité : tant qu'il ne bouge pas, les
+        # zones franchissables sont les mêmes.
+        self.full_version = 0
+        # Incrémenté quand le type ou la capacité d'une zone change
+        # (l'occupation seule ne le bouge pas).
+        self.type_version = 0
+        self._listeners: List[weakref.WeakMethod] = []
+        # Zone de chaque drone, par drone_id : zone_id + 1, 0 si aucune.
+        # Un drone compté dans plusieurs zones à la fois (les moteurs ne
+        # le font pas) range les autres dans _also.
+        self._where = array("i")
+        self._also: Dict[int, Set[int]] = {}
 
     def add_zone(self, zone: Zone):
+        old = self.zones.get(zone.name)
+        zone.zone_id = len(self.zones) if old is None else old.zone_id
         self.zones[zone.name] = zone
+        zone._owner = self
+        if zone._drones is not None:
+            for drone_id in zone._drones:
+                self._enter(drone_id, zone.zone_id)
+            if not zone_module.DEBUG:
+                zone._drones = None
         if zone.name not in self.connections:
             self.connections[zone.name] = []
+        self._compiled = None
 
-    def add_connection(self, zone1_name: str, zone2_name: str):
+    def add_connection(
+        self,
+        zone1_name: str,
+        zone2_name: str,
+        capacity: int = DEFAULT_LINK_CAPACITY,
+    ):
         if zone1_name not in self.zones or zone2_name not in self.zones:
-            raise ValueError("Zone must be created before creating a connection")
+            raise ValueError(
+                "Zone must be created before creating a connection"
+            )
 
         self.connections[zone1_name].append(zone2_name)
         self.connections[zone2_name].append(zone1_name)
+        self.capacities[link_key(zone1_name, zone2_name)] = capacity
+        self._compiled = None
+
+    def link_capacity(self, zone1_name: str, zone2_name: str) -> int:
+        """max_link_capacity du lien (valeur par défaut si non précisée)."""
+        return self.capacities.get(
+            link_key(zone1_name, zone2_name), DEFAULT_LINK_CAPACITY
+        )
+
+    def link_available(self, zone1_name: str, zone2_name: str) -> bool:
+        """True si le lien peut encore être emprunté pendant ce tour."""
+        compiled = self.freeze()
+        link = compiled.link_between(
+            compiled.index[zone1_name], compiled.index[zone2_name]
+        )
+        return link < 0 or compiled.link_open(link, self.turn)
+
+    def link_remaining(self, zone1_name: str, zone2_name: str) -> int:
+        """Passages encore permis sur le lien pendant ce tour."""
+        compiled = self.freeze()
+        link = compiled.link_between(
+            compiled.index[zone1_name], compiled.index[zone2_name]
+        )
+        if link < 0:
+            return sys.maxsize
+        return compiled.link_remaining(link, self.turn)
+
+    def use_link(self, zone1_name: str, zone2_name: str) -> None:
+        """Compte un passage ; un lien qui sature bouge full_version."""
+        compiled = self.freeze()
+        link = compiled.link_between(
+            compiled.index[zone1_name], compiled.index[zone2_name]
+        )
+        if link >= 0 and compiled.use_link(link, self.turn):
+            self.saturated_links += 1
+            self.full_version += 1
+
+    def link_filter(self) -> Optional[Callable[[int], bool]]:
+        """
+        Prédicat « lien encore ouvert ce tour » sur les ids de liens, ou
+        None si aucun lien n'est saturé (cas courant, rien à filtrer).
+        """
+        if not self.saturated_links:
+            return None
+        compiled, turn = self.freeze(), self.turn
+        return lambda link: compiled.link_open(link, turn)
+
+    def next_turn(self) -> None:
+        """Remet à zéro les compteurs de liens (en O(1))."""
+        self.turn += 1
+        if self.saturated_links:
+            self.saturated_links = 0
+            self.full_version += 1
 
     def get_zone(self, name: str) -> Optional[Zone]:
         return self.zones.get(name)
 
+    def freeze(self) -> CompiledGraph:
+        """
+        Retourne la vue compilée (ids entiers + CSR) du graphe.
+        Elle est mise en cache, reconstruite si la topologie change et
+        mise à jour en place quand le type, la capacité ou l'occupation
+        d'une zone change.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledGraph.from_graph(self)
+        return self._compiled
+
+    def adopt(self, compiled: CompiledGraph) -> None:
+        """
+        Installe une vue compilée déjà construite (fichier .flymap) :
+        ses ids et son CSR doivent suivre l'ordre des zones du graphe.
+        """
+        self._compiled = compiled
+
+    def _zone_changed(self, zone: Zone) -> None:
+        """Répercute un changement de type ou de capacité sur la vue."""
+        self.type_version += 1
+        if self._compiled is not None:
+            self._compiled.refresh_zone(zone)
+        self._passability_changed(zone)
+
+    def _occupancy_changed(self, zone: Zone, drone_id: int,
+                           delta: int) -> None:
+        """Répercute l'entrée (+1) ou la sortie (-1) d'un drone."""
+        if delta > 0:
+            self._enter(drone_id, zone.zone_id)
+        else:
+            self._leave(drone_id, zone.zone_id)
+        if self._compiled is not None:
+            self._compiled.occupancy[zone.zone_id] += delta
+        count = zone.occupancy
+        if (count >= zone.capacity) != (count - delta >= zone.capacity):
+            self._passability_changed(zone)
+
+    def _holds(self, zone_id: int, drone_id: int) -> bool:
+        """True si le drone est compté dans la zone zone_id."""
+        where = self._where
+        if 0 <= drone_id < len(where) and where[drone_id] == zone_id + 1:
+            return True
+        also = self._also.get(drone_id)
+        return also is not None and zone_id in also
+
+    def _enter(self, drone_id: int, zone_id: int) -> None:
+        where = self._where
+        if drone_id >= len(where):
+            where.frombytes(bytes(4 * (drone_id + 1 - len(where))))
+        if drone_id >= 0 and not where[drone_id]:
+            where[drone_id] = zone_id + 1
+        else:
+            self._also.setdefault(drone_id, set()).add(zone_id)
+
+    def _leave(self, drone_id: int, zone_id: int) -> None:
+        where, also = self._where, self._also.get(drone_id)
+        if 0 <= drone_id < len(where) and where[drone_id] == zone_id + 1:
+            where[drone_id] = also.pop() + 1 if also else 0
+        elif also is not None:
+            also.discard(zone_id)
+        if also is not None and not also:
+            del self._also[drone_id]
+
+    def _drones_in(self, zone: Zone) -> FrozenSet[int]:
+        """Ids des drones comptés dans zone (parcours de tous)."""
+        target = zone.zone_id + 1
+        found = {i for i, where in enumerate(self._where) if where == target}
+        found.update(
+            i for i, also in self._also.items() if zone.zone_id in also
+        )
+        return frozenset(found)
+
+    def subscribe(self, callback: Callable[[Zone], None]) -> None:
+        """
+        Abonne une méthode liée aux zones qui se remplissent, se libèrent
+        ou changent de type. Référence faible : l'abonné peut disparaître.
+        """
+        self._listeners.append(weakref.WeakMethod(callback))
+
+    def _passability_changed(self, zone: Zone) -> None:
+        """Incrémente full_version et prévient les abonnés encore vivants."""
+        self.full_version += 1
+        alive = []
+        for ref in self._listeners:
+            callback = ref()
+            if callback is not None:
+                callback(zone)
+                alive.append(ref)
+        self._listeners = alive
+
     def can_move(self, drone: Drone, next_zone_name: str) -> bool:
         zone = self.get_zone(next_zone_name)
         if not zone:
@@ -30,4 +215,16 @@ class Graph:
             return False
         if not zone.has_capacity():
             return False
+        current = drone.current_zone
+        if current is not None and not self.link_available(
+            current.name, next_zone_name
+        ):
+            return False
         return True
+
+
+def link_key(zone1_name: str, zone2_name: str) -> Tuple[str, str]:
+    """Clé non orientée d'un lien dans Graph.capacities."""
+    if zone1_name <= zone2_name:
+        return zone1_name, zone2_name
+    return zone2_name, zone1_name
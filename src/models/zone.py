@@ -1,8 +1,17 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
-from typing import Optional, Set
+import os
+from typing import FrozenSet, Optional, Set, TYPE_CHECKING
 from enum import Enum, auto
 
+if TYPE_CHECKING:
+    from .graph import Graph
+
+
+ENV_VAR = "FLY_IN_DEBUG"
+# En mode debug, chaque zone garde aussi l'ensemble des ids de ses
+# drones (pour les vérifications et l'affichage) ; sinon un compteur.
+DEBUG = bool(os.environ.get(ENV_VAR))
+
 
 class ZoneType(Enum):
     NORMAL = auto()
@@ -16,51 +25,134 @@ class CapacityError(Exception):
     pass
 
 
-@dataclass
 class Zone:
     """
     Représente une zone du graphe avec ses propriétés et contraintes.
+
+    L'occupation est un compteur (occupancy). La zone où est compté
+    chaque drone est tenue par le graphe propriétaire (un entier par
+    drone) ; une zone hors graphe, ou toute zone en mode debug, garde
+    l'ensemble des ids de ses drones.
     """
-    name: str
-    x: int
-    y: int
-    capacity: int = 1
-    z_type: ZoneType = ZoneType.NORMAL
-    color: Optional[str] = None
-    current_drones: Set[int] = field(default_factory=set, repr=False)
+
+    __slots__ = (
+        "name", "x", "y", "_capacity", "_z_type", "color", "zone_id",
+        "occupancy", "_drones", "_owner",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        x: int,
+        y: int,
+        capacity: int = 1,
+        z_type: ZoneType = ZoneType.NORMAL,
+        color: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.x = x
+        self.y = y
+        self._capacity = capacity
+        self._z_type = z_type
+        self.color = color
+        # Indice dans le graphe propriétaire (celui de la vue compilée),
+        # posé par add_zone avec _owner.
+        self.zone_id = -1
+        self.occupancy = 0
+        self._drones: Optional[Set[int]] = set()
+        self._owner: Optional[Graph] = None
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, value: int) -> None:
+        self._capacity = value
+        if self._owner is not None:
+            self._owner._zone_changed(self)
+
+    @property
+    def z_type(self) -> ZoneType:
+        return self._z_type
+
+    @z_type.setter
+    def z_type(self, value: ZoneType) -> None:
+        self._z_type = value
+        if self._owner is not None:
+            self._owner._zone_changed(self)
+
+    @property
+    def current_drones(self) -> FrozenSet[int]:
+        """
+        Ids des drones présents. Hors mode debug, parcourt les positions
+        de tous les drones du graphe : à réserver aux tests et au debug.
+        """
+        if self._drones is not None:
+            return frozenset(self._drones)
+        assert self._owner is not None
+        return self._owner._drones_in(self)
 
     def is_accessible(self) -> bool:
         """Renvoie True si la zone peut être visitée (non bloquée)."""
-        return self.z_type != ZoneType.BLOCKED
+        return self._z_type != ZoneType.BLOCKED
 
     def get_movement_cost(self) -> int:
         """Coût de déplacement selon le type de zone."""
-        if self.z_type == ZoneType.BLOCKED:
+        if self._z_type == ZoneType.BLOCKED:
             return 0
-        elif self.z_type == ZoneType.RESTRICTED:
+        elif self._z_type == ZoneType.RESTRICTED:
             return 2
-        elif self.z_type == ZoneType.PRIORITY:
+        elif self._z_type == ZoneType.PRIORITY:
             return 1  # priorité pourrait être utilisée dans l'algorithme de pathfinding
         return 1  # NORMAL
 
     def has_capacity(self) -> bool:
         """Vérifie si la zone peut accueillir un drone supplémentaire."""
-        return len(self.current_drones) < self.capacity
+        return self.occupancy < self._capacity
+
+    def holds(self, drone_id: int) -> bool:
+        """True si le drone est compté dans cette zone."""
+        if self._drones is not None:
+            return drone_id in self._drones
+        assert self._owner is not None
+        return self._owner._holds(self.zone_id, drone_id)
 
     def occupy(self, drone_id: int) -> None:
         """Marque la zone comme occupée par un drone."""
+        if self.holds(drone_id):
+            return
         if not self.has_capacity():
             raise CapacityError(f"Zone {self.name} pleine")
-        self.current_drones.add(drone_id)
+        self.occupancy += 1
+        if self._drones is not None:
+            self._drones.add(drone_id)
+        if self._owner is not None:
+            self._owner._occupancy_changed(self, drone_id, 1)
 
     def vacate(self, drone_id: int) -> None:
         """Libère la zone d'un drone."""
-        self.current_drones.discard(drone_id)
+        if not self.holds(drone_id):
+            return
+        self.occupancy -= 1
+        if self._drones is not None:
+            self._drones.discard(drone_id)
+        if self._owner is not None:
+            self._owner._occupancy_changed(self, drone_id, -1)
+
+    def __repr__(self) -> str:
+        return (
+            f"Zone(name={self.name!r}, x={self.x!r}, y={self.y!r}, "
+            f"capacity={self._capacity!r}, z_type={self._z_type!r}, "
+            f"color={self.color!r})"
+        )
 
     def __hash__(self):
         return hash(self.name)
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Zone):
             return NotImplemented
         return self.name == other.name
@@ -0,0 +1,283 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import List, Optional, Sequence, Tuple
+from src.models.compiled_graph import CompiledGraph
+from src.models.graph import Graph, link_key
+from src.models.zone import Zone, ZoneType
+from .parser import ParsedConfig, parse_file
+
+
+MAGIC = b"FLYMAP\0\0"
+FORMAT_VERSION = 1
+SUFFIX = ".flymap"
+# Dossier des fichiers compilés (par défaut $XDG_CACHE_HOME/fly_in) :
+# jamais à côté des cartes, qui peuvent être suivies par git.
+CACHE_ENV_VAR = "FLY_IN_CACHE"
+
+# magic, version, ordre des octets (1 = little), bourrage, sha256 de la
+# source, nb_drones, zones, cases CSR, liens, départ, arrivée, octets des
+# noms, octets des couleurs. 80 octets : les sections d'entiers qui
+# suivent restent alignées sur 4.
+_HEADER = struct.Struct("<8sIB3x32s8I")
+_BYTEORDER = 1 if sys.byteorder == "little" else 2
+_ZONE_TYPES = {zt.value: zt for zt in ZoneType}
+
+
+class StaleMapError(ValueError):
+    """Fichier compilé illisible, d'une autre version ou d'une autre source."""
+
+
+def source_checksum(filename: str) -> bytes:
+    """sha256 du fichier source, lu par blocs."""
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def cache_dir() -> str:
+    """Dossier des fichiers compilés : FLY_IN_CACHE, sinon le cache XDG."""
+    path = os.environ.get(CACHE_ENV_VAR)
+    if path:
+        return path
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "fly_in")
+
+
+def default_compiled_path(source: str) -> str:
+    """
+    Fichier compilé de source dans cache_dir(), nommé d'après son chemin
+    absolu : deux cartes de même nom ne se partagent pas un fichier.
+    """
+    source = os.path.abspath(source)
+    tag = hashlib.sha256(source.encode()).hexdigest()[:16]
+    name = f"{os.path.basename(source)}-{tag}{SUFFIX}"
+    return os.path.join(cache_dir(), name)
+
+
+class CompiledMap:
+    """
+    Carte chargée depuis un fichier .flymap.
+
+    compiled est une CompiledGraph dont les tableaux sont des vues
+    memoryview sur le fichier projeté en mémoire (copie à l'écriture) :
+    aucune copie au chargement, et le graphe reste modifiable en place.
+    """
+
+    def __init__(
+        self,
+        compiled: CompiledGraph,
+        start: int,
+        goal: int,
+        nb_drones: int,
+        colors: List[Optional[str]],
+        buffer: Optional[mmap.mmap] = None,
+    ) -> None:
+        self.compiled = compiled
+        self.start = start
+        self.goal = goal
+        self.nb_drones = nb_drones
+        self.colors = colors
+        self._buffer = buffer
+
+    def to_config(self) -> ParsedConfig:
+        """
+        Recrée Graph et Zone (mêmes ids, même ordre CSR) autour de la vue
+        compilée chargée, sans relire le texte.
+        """
+        compiled = self.compiled
+        graph = Graph()
+        zones = []
+        for i, name in enumerate(compiled.names):
+            zone = Zone(
+                name=name,
+                x=compiled.x[i],
+                y=compiled.y[i],
+                capacity=compiled.capacity[i],
+                z_type=_ZONE_TYPES[compiled.zone_type[i]],
+                color=self.colors[i],
+            )
+            graph.add_zone(zone)
+            zones.append(zone)
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        names, edge_link = compiled.names, compiled.edge_link
+        for u, name in enumerate(names):
+            graph.connections[name] = [
+                names[v] for v in neighbours[offsets[u]:offsets[u + 1]]
+            ]
+            for slot in range(offsets[u], offsets[u + 1]):
+                v = neighbours[slot]
+                if u < v:
+                    graph.capacities[link_key(name, names[v])] = (
+                        compiled.link_capacity[edge_link[slot]]
+                    )
+        graph.adopt(compiled)
+        return ParsedConfig(
+            graph=graph,
+            start_zone=zones[self.start],
+            goal_zone=zones[self.goal],
+            nb_drones=self.nb_drones,
+        )
+
+
+def write_compiled_map(
+    config: ParsedConfig, filename: str, source: str
+) -> None:
+    """
+    Sérialise config dans filename, marqué du checksum de source (crée
+    son dossier au besoin). Le format ne garde pas duplicate_zones : une
+    carte qui en a lève ValueError au lieu d'être compilée.
+    """
+    if config.duplicate_zones:
+        raise ValueError(
+            f"{source}: duplicate zones are not kept in a compiled map"
+        )
+    compiled = config.graph.freeze()
+    n = compiled.num_zones
+    names = _blob(compiled.names)
+    colors = _blob(
+        [z.color or "" for z in config.graph.zones.values()]
+    )
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, _BYTEORDER, source_checksum(source),
+        config.nb_drones, n, len(compiled.neighbours), compiled.num_links,
+        compiled.id_of(config.start_zone.name),
+        compiled.id_of(config.goal_zone.name),
+        len(names[1]), len(colors[1]),
+    )
+    sections = [
+        array("i", compiled.x), array("i", compiled.y),
+        array("i", compiled.capacity), array("i", compiled.offsets),
+        array("i", compiled.neighbours), array("i", compiled.edge_link),
+        array("i", compiled.link_capacity),
+        names[0], colors[0],
+        array("B", compiled.zone_type), array("B", compiled.move_cost),
+    ]
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    tmp = filename + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(header)
+            for section in sections:
+                section.tofile(f)
+            f.write(names[1])
+            f.write(colors[1])
+        os.replace(tmp, filename)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_compiled_map(
+    filename: str, source: Optional[str] = None
+) -> CompiledMap:
+    """
+    Projette filename en mémoire et construit la CompiledGraph en vues.
+    Lève StaleMapError si le format, la version ou (si source est donné)
+    le checksum de la source ne correspondent pas.
+    """
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _HEADER.size:
+            raise StaleMapError(f"{filename}: truncated header")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    (magic, version, byteorder, checksum, nb_drones, n, slots, links,
+     start, goal, names_len, colors_len) = _HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise StaleMapError(f"{filename}: not a v{FORMAT_VERSION} map")
+    if byteorder != _BYTEORDER:
+        raise StaleMapError(f"{filename}: written with another byte order")
+    if source is not None and checksum != source_checksum(source):
+        raise StaleMapError(f"{filename}: {source} changed since compile")
+    sizes = [n, n, n, n + 1, slots, slots, links, n + 1, n + 1]
+    expected = _HEADER.size + 4 * sum(sizes) + 2 * n + names_len + colors_len
+    if expected != len(buffer):
+        raise StaleMapError(f"{filename}: size does not match its header")
+
+    view = memoryview(buffer)
+    pos = _HEADER.size
+    ints: List[Sequence[int]] = []
+    for size in sizes:
+        end = pos + 4 * size
+        ints.append(view[pos:end].cast("i"))
+        pos = end
+    zone_type = view[pos:pos + n].cast("B")
+    move_cost = view[pos + n:pos + 2 * n].cast("B")
+    pos += 2 * n
+    x, y, capacity, offsets, neighbours, edge_link, link_capacity = ints[:7]
+    names = _split(bytes(view[pos:pos + names_len]), ints[7])
+    colors = _split(bytes(view[pos + names_len:]), ints[8])
+
+    compiled = CompiledGraph(
+        names, x, y, zone_type, capacity, move_cost,  # type: ignore[arg-type]
+        offsets, neighbours, edge_link, link_capacity,
+    )
+    return CompiledMap(
+        compiled, start, goal, nb_drones,
+        [c or None for c in colors], buffer,
+    )
+
+
+def load_map(
+    source: str, compiled_path: Optional[str] = None
+) -> ParsedConfig:
+    """
+    ParsedConfig de source, via son fichier compilé s'il est à jour ;
+    sinon le texte est analysé et le fichier compilé (ré)écrit, sauf si
+    la carte a des zones en double (gardées pour le Validator). Un cache
+    impossible à écrire n'empêche pas le chargement.
+    """
+    compiled_path = compiled_path or default_compiled_path(source)
+    try:
+        return read_compiled_map(compiled_path, source).to_config()
+    except (OSError, StaleMapError):
+        pass
+    config = parse_file(source)
+    if not config.duplicate_zones:
+        try:
+            write_compiled_map(config, compiled_path, source)
+        except OSError:
+            pass
+    return config
+
+
+def _blob(strings: List[str]) -> Tuple[array, bytes]:
+    """Offsets (n + 1 entiers) et concaténation utf-8 des chaînes."""
+    offsets = array("i", [0])
+    parts = []
+    for s in strings:
+        data = s.encode()
+        parts.append(data)
+        offsets.append(offsets[-1] + len(data))
+    return offsets, b"".join(parts)
+
+
+def _split(blob: bytes, offsets: Sequence[int]) -> List[str]:
+    """Inverse de _blob."""
+    return [
+        blob[offsets[i]:offsets[i + 1]].decode()
+        for i in range(len(offsets) - 1)
+    ]
+
+
+def main(argv: List[str]) -> None:
+    """Compile chaque carte .txt donnée en argument dans cache_dir()."""
+    for source in argv:
+        target = default_compiled_path(source)
+        config = parse_file(source)
+        if config.duplicate_zones:
+            print(f"{source}: duplicate zones, not compiled", file=sys.stderr)
+            continue
+        write_compiled_map(config, target, source)
+        print(f"{source} -> {target}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or ["map.txt"])
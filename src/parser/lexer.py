@@ -1,89 +1,152 @@
-from typing import List, Dict, Optional
+import time
+from types import MappingProxyType
+from typing import Iterator, List, Mapping, Optional, Tuple, Union
+from src.visualization.logger import metrics
+
+
+# Partagé par tous les tokens sans [métadonnées] : jamais modifié.
+EMPTY_METADATA: Mapping[str, str] = MappingProxyType({})
+
+TokenValue = Union[int, str, Tuple[str, str], None]
 
 
 class Token:
+    """Un token par ligne utile ; line_number est celui du fichier."""
+
+    __slots__ = ("type", "value", "x", "y", "metadata", "line_number")
+
     def __init__(
         self,
         type_: str,
-        value: Optional[str] = None,
+        value: TokenValue = None,
         x: Optional[int] = None,
         y: Optional[int] = None,
-        metadata: Optional[Dict[str, str]] = None,
+        metadata: Optional[Mapping[str, str]] = None,
         line_number: Optional[int] = None,
-        line_content: Optional[str] = None
     ):
-        self.type = type_             
-        self.value = value           
+        self.type = type_
+        self.value = value
         self.x = x
         self.y = y
-        self.metadata = metadata or {}
+        self.metadata = metadata if metadata else EMPTY_METADATA
         self.line_number = line_number
-        self.line_content = line_content
 
     def __repr__(self):
-        return f"Token(type={self.type}, value={self.value}, x={self.x}, y={self.y}, metadata={self.metadata})"
-
+        return (
+            f"Token(type={self.type}, value={self.value}, x={self.x}, "
+            f"y={self.y}, metadata={dict(self.metadata)})"
+        )
 
 
 class Lexer:
+    """
+    Découpe un fichier de carte en tokens.
+
+    iter_tokens lit le fichier en flux : une seule ligne en mémoire à la
+    fois, les numéros de ligne (et ceux des erreurs) sont ceux du
+    fichier, commentaires et lignes vides compris.
+    """
+
     def __init__(self, filename: str):
         self.filename = filename
-        self.lines: List[str] = []    
-        self.tokens: List[Token] = [] 
+        self.lines: List[Tuple[int, str]] = []
+        self.tokens: List[Token] = []
         self.current_line_number: int = 0
 
-    def read_file(self):
+    def iter_lines(self) -> Iterator[Tuple[int, str]]:
+        """Lignes utiles du fichier, avec leur numéro d'origine."""
         try:
-            with open(self.filename, "r") as f:
-                for raw_line in f:
-                    self.current_line_number += 1
-                    line = raw_line.strip()
-                    # ignorer lignes vides et commentaires
-                    if not line or line.startswith("#"):
-                        continue
-                    self.lines.append(line)
+            f = open(self.filename, "r")
         except FileNotFoundError:
             print(f"Error: file '{self.filename}' not found.")
             raise
+        with f:
+            for number, raw_line in enumerate(f, 1):
+                self.current_line_number = number
+                line = raw_line.strip()
+                # ignorer lignes vides et commentaires
+                if not line or line.startswith("#"):
+                    continue
+                yield number, line
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """Tokens du fichier, produits au fil de la lecture."""
+        if metrics.enabled:
+            yield from self._iter_tokens_timed()
+            return
+        for number, line in self.iter_lines():
+            yield self.tokenize_line(line, number)
+
+    def _iter_tokens_timed(self) -> Iterator[Token]:
+        """iter_tokens, en cumulant le temps passé hors des yield."""
+        total = 0.0
+        clock = time.perf_counter()
+        try:
+            for number, line in self.iter_lines():
+                token = self.tokenize_line(line, number)
+                total += time.perf_counter() - clock
+                yield token
+                clock = time.perf_counter()
+        finally:
+            metrics.add_time("lex", total)
+
+    def read_file(self):
+        """Charge toutes les lignes utiles (préférer iter_tokens)."""
+        self.lines = list(self.iter_lines())
 
     def tokenize_line(self, line: str, line_number: int) -> Token:
+        """Token d'une ligne ; ValueError avec le numéro si invalide."""
+        try:
+            return self._tokenize(line, line_number)
+        except (IndexError, ValueError) as exc:
+            raise ValueError(
+                f"Invalid line {line_number}: {line} ({exc})"
+            ) from exc
+
+    def _tokenize(self, line: str, line_number: int) -> Token:
         if line.startswith("nb_drones"):
             value = int(line.split(":")[1].strip())
-            return Token(type_="nb_drones", value=value, line_number=line_number, line_content=line)
+            return Token(type_="nb_drones", value=value,
+                         line_number=line_number)
 
-        elif line.startswith("start_hub") or line.startswith("end_hub") or line.startswith("hub"):
+        elif (line.startswith("start_hub") or line.startswith("end_hub")
+              or line.startswith("hub")):
             parts = line.split()
             type_ = parts[0][:-1]
             name = parts[1]
             x = int(parts[2])
             y = int(parts[3])
-            metadata = {}
-            if "[" in line and "]" in line:
-                meta_str = line[line.find("[")+1:line.find("]")]
-                for item in meta_str.split():
-                    if "=" in item:
-                        key, val = item.split("=")
-                        metadata[key] = val
-            return Token(type_=type_, value=name, x=x, y=y, metadata=metadata, line_number=line_number, line_content=line)
+            return Token(type_=type_, value=name, x=x, y=y,
+                         metadata=self._metadata(line),
+                         line_number=line_number)
 
         elif line.startswith("connection"):
             parts = line.split(":")[1].strip().split()[0]  # "A-B"
             zone1, zone2 = parts.split("-")
-            metadata = {}
-            if "[" in line and "]" in line:
-                meta_str = line[line.find("[")+1:line.find("]")]
-                for item in meta_str.split():
-                    if "=" in item:
-                        key, val = item.split("=")
-                        metadata[key] = val
-            return Token(type_="connection", value=(zone1, zone2), metadata=metadata, line_number=line_number, line_content=line)
+            return Token(type_="connection", value=(zone1, zone2),
+                         metadata=self._metadata(line),
+                         line_number=line_number)
 
         else:
-            raise ValueError(f"Unknown line type at line {line_number}: {line}")
+            raise ValueError("unknown line type")
+
+    @staticmethod
+    def _metadata(line: str) -> Mapping[str, str]:
+        """Contenu de [clé=valeur ...], ou EMPTY_METADATA."""
+        start = line.find("[")
+        end = line.find("]")
+        if start == -1 or end == -1:
+            return EMPTY_METADATA
+        metadata = {}
+        for item in line[start + 1:end].split():
+            if "=" in item:
+                key, val = item.split("=")
+                metadata[key] = val
+        return metadata or EMPTY_METADATA
 
     def tokenize(self) -> List[Token]:
-        self.tokens = []
-        for i, line in enumerate(self.lines):
-            token = self.tokenize_line(line, i+1)
-            self.tokens.append(token)
+        """Tokens des lignes chargées par read_file."""
+        self.tokens = [
+            self.tokenize_line(line, number) for number, line in self.lines
+        ]
         return self.tokens
@@ -1,8 +1,9 @@
 # src/parser/parser.py
-from typing import List, Optional
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
 from src.models.graph import Graph
 from src.models.zone import Zone, ZoneType
-from .lexer import Token
+from src.visualization.logger import metrics
+from .lexer import Lexer, Token
 
 
 class ParsedConfig:
@@ -14,6 +15,7 @@ class ParsedConfig:
         start_zone: Zone,
         goal_zone: Zone,
         nb_drones: int,
+        duplicate_zones: Sequence[Tuple[str, int]] = (),
     ) -> None:
         """
         Initialize ParsedConfig.
@@ -23,28 +25,34 @@ class ParsedConfig:
             start_zone: The starting zone.
             goal_zone: The goal zone.
             nb_drones: Number of drones to simulate.
+            duplicate_zones: (name, line number) of each zone definition
+                that replaced an earlier one, reported by the Validator.
         """
         self.graph = graph
         self.start_zone = start_zone
         self.goal_zone = goal_zone
         self.nb_drones = nb_drones
+        self.duplicate_zones = duplicate_zones
 
 
 class Parser:
-    """Parse a list of Tokens into a ParsedConfig."""
+    """Parse a stream of Tokens into a ParsedConfig in a single pass."""
 
-    def __init__(self, tokens: List[Token]) -> None:
+    def __init__(self, tokens: Iterable[Token]) -> None:
         """
         Initialize the Parser.
 
         Args:
-            tokens: Token list produced by the Lexer.
+            tokens: Tokens produced by the Lexer, as a list or a generator
+                (Lexer.iter_tokens); they are consumed once.
         """
         self.tokens = tokens
         self.graph = Graph()
         self.start_zone: Optional[Zone] = None
         self.goal_zone: Optional[Zone] = None
         self.nb_drones: int = 0
+        self.duplicate_zones: List[Tuple[str, int]] = []
+        self.terminals: List[Tuple[Zone, Mapping[str, str]]] = []
 
     def parse(self) -> ParsedConfig:
         """
@@ -54,7 +62,8 @@ class Parser:
             A fully populated ParsedConfig instance.
 
         Raises:
-            ValueError: When mandatory fields are missing or invalid.
+            ValueError: When mandatory fields are missing or invalid;
+                errors tied to a line carry its number in the file.
         """
         for token in self.tokens:
             if token.type == "nb_drones":
@@ -71,33 +80,78 @@ class Parser:
                     elif zt == "priority":
                         zone_type = ZoneType.PRIORITY
 
+                try:
+                    capacity = int(token.metadata.get("max_drones", 1))
+                except ValueError as exc:
+                    raise ValueError(
+                        f"Line {token.line_number}: invalid max_drones"
+                    ) from exc
                 zone = Zone(
                     name=token.value,
                     x=token.x,
                     y=token.y,
                     z_type=zone_type,
-                    capacity=int(token.metadata.get("max_drones", 1)),
+                    capacity=capacity,
                     color=token.metadata.get("color"),
                 )
+                if zone.name in self.graph.zones:
+                    self.duplicate_zones.append(
+                        (zone.name, token.line_number or 0)
+                    )
                 self.graph.add_zone(zone)
 
                 if token.type == "start_hub":
                     self.start_zone = zone
+                    self.terminals.append((zone, token.metadata))
                 elif token.type == "end_hub":
                     self.goal_zone = zone
+                    self.terminals.append((zone, token.metadata))
 
             elif token.type == "connection":
                 zone1, zone2 = token.value
-                self.graph.add_connection(zone1, zone2)
+                try:
+                    capacity = int(
+                        token.metadata.get("max_link_capacity", 1)
+                    )
+                    self.graph.add_connection(zone1, zone2, capacity)
+                except ValueError as exc:
+                    raise ValueError(
+                        f"Line {token.line_number}: {exc} "
+                        f"({zone1}-{zone2})"
+                    ) from exc
 
         if self.nb_drones <= 0:
             raise ValueError("nb_drones must be > 0")
         if not self.start_zone or not self.goal_zone:
             raise ValueError("start_hub and end_hub must be defined")
+        # Sans max_drones explicite, départ et arrivée accueillent toute
+        # la flotte : les drones arrivés restent comptés dans goal.
+        for zone, metadata in self.terminals:
+            if "max_drones" not in metadata:
+                zone.capacity = max(zone.capacity, self.nb_drones)
 
         return ParsedConfig(
             graph=self.graph,
             start_zone=self.start_zone,
             goal_zone=self.goal_zone,
             nb_drones=self.nb_drones,
-        )
\ No newline at end of file
+            duplicate_zones=self.duplicate_zones,
+        )
+
+
+def parse_file(filename: str) -> ParsedConfig:
+    """
+    Stream a map file straight into a ParsedConfig.
+
+    Lines are read, tokenized and added to the graph one at a time, so
+    memory does not grow with the number of lines beyond the graph itself.
+    When metrics are enabled, the "parse" phase includes the "lex" time.
+
+    Args:
+        filename: Path of the map file.
+
+    Returns:
+        The ParsedConfig of the map.
+    """
+    with metrics.phase("parse"):
+        return Parser(Lexer(filename).iter_tokens()).parse()
@@ -1,60 +1,224 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from src.visualization.logger import metrics
+from .parser import ParsedConfig
+
+
+ERROR = "error"
+WARNING = "warning"
+
+
+@dataclass(frozen=True)
+class Issue:
+    """Un problème trouvé dans la carte."""
+    severity: str
+    code: str
+    message: str
+    zone: Optional[str] = None
+
+
+@dataclass
+class ValidationReport:
+    """
+    Résultat de Validator.validate : tous les problèmes trouvés, et ce
+    qu'a donné l'analyse d'accessibilité.
+    """
+    issues: List[Issue] = field(default_factory=list)
+    # Zones atteignables depuis le départ (zones bloquées exclues).
+    reachable: Set[str] = field(default_factory=set)
+    # Zones atteignables dont on ne peut que revenir sur ses pas.
+    dead_ends: Set[str] = field(default_factory=set)
+
+    @property
+    def errors(self) -> List[Issue]:
+        return [i for i in self.issues if i.severity == ERROR]
+
+    @property
+    def warnings(self) -> List[Issue]:
+        return [i for i in self.issues if i.severity == WARNING]
+
+    @property
+    def ok(self) -> bool:
+        """True si la carte n'a aucune erreur (avertissements permis)."""
+        return not self.errors
+
+    def raise_for_errors(self) -> None:
+        """Lève ValueError listant toutes les erreurs, s'il y en a."""
+        errors = self.errors
+        if errors:
+            raise ValueError(
+                "; ".join(f"{i.code}: {i.message}" for i in errors)
+            )
+
+
 class Validator:
+    """
+    Vérifie une ParsedConfig sans s'arrêter à la première erreur.
+
+    Toutes les vérifications tiennent en O(V + E) : un seul parcours des
+    listes de voisins (doublons, boucles, voisins inconnus), un des
+    capacités de liens, un BFS depuis le départ et un élagage des
+    impasses.
+    """
+
     def __init__(self, parsed_config: ParsedConfig):
         self.config = parsed_config
 
-    def validate(self) -> None:
+    def validate(self) -> ValidationReport:
+        """Lance toutes les validations et retourne le rapport."""
+        with metrics.phase("validate"):
+            self.report = ValidationReport()
+            terminals_ok = self._check_basic()
+            neighbours = self._check_connections()
+            if terminals_ok:
+                self._check_reachability(neighbours)
+        return self.report
+
+    def _add(self, severity: str, code: str, message: str,
+             zone: Optional[str] = None) -> None:
+        self.report.issues.append(Issue(severity, code, message, zone))
+
+    def _check_basic(self) -> bool:
+        """Vérifie l'en-tête ; False si départ ou arrivée inutilisable."""
+        config = self.config
+        terminals_ok = True
+        if config.nb_drones <= 0:
+            self._add(ERROR, "nb_drones", "nb_drones must be > 0")
+        for label, zone in (("start", config.start_zone),
+                            ("goal", config.goal_zone)):
+            if not zone:
+                terminals_ok = False
+                self._add(ERROR, label, f"{label} zone not defined")
+                continue
+            if config.graph.zones.get(zone.name) is not zone:
+                terminals_ok = False
+                self._add(ERROR, label,
+                          f"{label} zone {zone.name} was redefined",
+                          zone.name)
+            elif not zone.is_accessible():
+                terminals_ok = False
+                self._add(ERROR, label,
+                          f"{label} zone {zone.name} is blocked", zone.name)
+        for name, line in self.config.duplicate_zones:
+            self._add(ERROR, "duplicate_zone",
+                      f"Line {line}: zone {name} defined twice", name)
+        return terminals_ok
+
+    def _check_connections(self) -> Dict[str, Set[str]]:
         """
-        Lancer toutes les validations.
-        Raise ValueError ou custom exceptions si quelque chose ne va pas.
+        Un passage sur graph.connections ; retourne, pour chaque zone
+        franchissable, l'ensemble de ses voisins franchissables.
         """
-        self._check_basic()
-        self._check_connections()
-        self._check_blocked_zones()
-        self._check_reachability()
-        self._check_capacities()
-
-
-    def _check_basic(self):
-        if self.config.nb_drones <= 0:
-            raise ValueError("nb_drones must be > 0")
-        if not self.config.start_zone:
-            raise ValueError("start_zone not defined")
-        if not self.config.goal_zone:
-            raise ValueError("goal_zone not defined")
-
-    def _check_connections(self):
-        for zone_name, neighbors in self.config.graph.adjacency.items():
-            if zone_name not in self.config.graph.zones:
-                raise ValueError(f"Zone {zone_name} in connections does not exist")
-            for neighbor in neighbors:
-                if neighbor not in self.config.graph.zones:
-                    raise ValueError(f"Neighbor {neighbor} does not exist")
-
-    def _check_blocked_zones(self):
-        for zone_name, zone in self.config.graph.zones.items():
-            if zone.z_type == ZoneType.BLOCKED:
-                if self.config.graph.adjacency.get(zone_name):
-                    raise ValueError(f"Blocked zone {zone_name} should have no outgoing connections")
-
-    def _check_reachability(self):
-        if not self._is_reachable(self.config.start_zone.name, self.config.goal_zone.name):
-            raise ValueError("Goal unreachable from start")
-
-    def _check_capacities(self):
-        for (u, v), capacity in self.config.graph.capacities.items():
-            if capacity < 1 or capacity > self.config.nb_drones:
-                raise ValueError(f"Invalid capacity {capacity} for link {u}->{v}")
-
-    # BFS simple pour vérifier accessibilité
-    def _is_reachable(self, start, goal):
-        visited = set()
-        queue = [start]
+        graph = self.config.graph
+        zones = graph.zones
+        names = zones.keys()
+        blocked = set()
+        for name, zone in zones.items():
+            if zone.capacity < 1:
+                self._add(ERROR, "zone_capacity",
+                          f"Zone {name} has capacity {zone.capacity}", name)
+            if not zone.is_accessible():
+                blocked.add(name)
+
+        neighbours: Dict[str, Set[str]] = {}
+        for name, linked in graph.connections.items():
+            if name not in zones:
+                self._add(ERROR, "unknown_zone",
+                          f"Zone {name} in connections does not exist", name)
+                continue
+            unique = set(linked)
+            # cas courant : ni doublon, ni boucle, ni voisin inconnu
+            if len(unique) != len(linked) or name in unique or not (
+                    unique <= names):
+                unique = self._check_neighbours(name, linked)
+            if name not in blocked:
+                neighbours[name] = unique - blocked if blocked else unique
+
+        for name in blocked:
+            for other in set(graph.connections.get(name, ())):
+                if other in zones and other != name:
+                    self._add(WARNING, "blocked_link",
+                              f"Connection {other}-{name} leads into "
+                              f"blocked zone {name}", name)
+
+        nb_drones = self.config.nb_drones
+        for (u, v), capacity in graph.capacities.items():
+            if capacity < 1:
+                self._add(ERROR, "link_capacity",
+                          f"Invalid capacity {capacity} for link {u}-{v}",
+                          u)
+            elif capacity > nb_drones:
+                self._add(WARNING, "link_capacity",
+                          f"Capacity {capacity} of link {u}-{v} "
+                          f"exceeds nb_drones", u)
+        return neighbours
+
+    def _check_neighbours(self, name: str, linked: List[str]) -> Set[str]:
+        """Liste de voisins fautive : signale chaque problème une fois."""
+        zones = self.config.graph.zones
+        seen: Set[str] = set()
+        for other in linked:
+            if other not in zones:
+                self._add(ERROR, "unknown_zone",
+                          f"Neighbour {other} of {name} does not exist",
+                          other)
+            elif other in seen:
+                # a-b en double apparaît dans les deux listes
+                if name < other:
+                    self._add(ERROR, "duplicate_connection",
+                              f"Connection {name}-{other} defined twice",
+                              name)
+            elif other == name:
+                # a-a est ajouté deux fois à la liste de a
+                seen.add(other)
+                self._add(ERROR, "self_loop",
+                          f"Zone {name} is connected to itself", name)
+            else:
+                seen.add(other)
+        seen.discard(name)
+        return seen
+
+    def _check_reachability(self, neighbours: Dict[str, Set[str]]) -> None:
+        """BFS depuis le départ, puis élagage des impasses."""
+        start = self.config.start_zone.name
+        goal = self.config.goal_zone.name
+        reachable = {start}
+        queue = deque([start])
         while queue:
-            current = queue.pop(0)
-            if current == goal:
-                return True
-            visited.add(current)
-            for neighbor in self.config.graph.adjacency.get(current, []):
-                if neighbor not in visited:
-                    queue.append(neighbor)
-        return False
+            new = neighbours[queue.popleft()] - reachable
+            reachable |= new
+            queue.extend(new)
+        self.report.reachable = reachable
+        if goal not in reachable:
+            self._add(ERROR, "unreachable_goal",
+                      f"Goal {goal} unreachable from start {start}", goal)
+            return
+        if len(reachable) < len(neighbours):
+            for name in sorted(neighbours.keys() - reachable):
+                self._add(WARNING, "unreachable_zone",
+                          f"Zone {name} unreachable from start", name)
+
+        # Une zone (hors départ et arrivée) avec un seul voisin encore
+        # utile est une impasse ; la retirer peut en créer une autre.
+        terminals = (start, goal)
+        leaves = [
+            name for name in reachable
+            if len(neighbours[name]) <= 1 and name not in terminals
+        ]
+        # voisins déjà élagués, pour les seules zones touchées
+        pruned: Dict[str, int] = {}
+        dead_ends = self.report.dead_ends
+        while leaves:
+            name = leaves.pop()
+            dead_ends.add(name)
+            for other in neighbours[name]:
+                if other in dead_ends:
+                    continue
+                pruned[other] = pruned.get(other, 0) + 1
+                if (len(neighbours[other]) - pruned[other] == 1
+                        and other not in terminals):
+                    leaves.append(other)
+        for name in sorted(dead_ends):
+            self._add(WARNING, "dead_end",
+                      f"Zone {name} does not lead to goal {goal}", name)
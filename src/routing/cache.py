@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from src.models.graph import Graph
+from src.models.zone import Zone
+
+
+Route = Tuple[Zone, ...]
+
+
+class RouteCache:
+    """
+    Cache LRU borné des routes, partagé par tous les drones.
+
+    Les entrées (départ, but) ne valent que pour une valeur de
+    graph.full_version : dès qu'une zone se remplit, se libère ou change
+    de type, tout le cache est vidé. Les échecs (None) sont aussi mis en
+    cache, les drones bloqués derrière un goulot les redemandant.
+    """
+
+    def __init__(self, graph: Graph, maxsize: int = 1024) -> None:
+        """maxsize : nombre maximal de routes gardées."""
+        self.graph = graph
+        self.maxsize = maxsize
+        self.version = graph.full_version
+        self.entries: "OrderedDict[Tuple[str, str], Optional[Route]]"
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def lookup(
+        self, start: Zone, goal: Zone
+    ) -> Tuple[bool, Optional[List[Zone]]]:
+        """
+        Cherche une route : renvoie (trouvée, route), route étant une
+        nouvelle liste, ou None si le but était inaccessible.
+        """
+        self._check_version()
+        key = (start.name, goal.name)
+        if key not in self.entries:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        route = self.entries[key]
+        return True, None if route is None else list(route)
+
+    def has(self, start: Zone, goal: Zone) -> bool:
+        """True si (start, goal) est en cache ; ne compte ni hit ni miss."""
+        self._check_version()
+        return (start.name, goal.name) in self.entries
+
+    def store(
+        self, start: Zone, goal: Zone, route: Optional[List[Zone]]
+    ) -> None:
+        """Met en cache la route calculée pour (start, goal)."""
+        self._check_version()
+        self.entries[(start.name, goal.name)] = (
+            None if route is None else tuple(route)
+        )
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs hits/misses/évictions/invalidations et taille."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self.entries),
+        }
+
+    def _check_version(self) -> None:
+        """Vide le cache si les zones franchissables ont changé."""
+        version = self.graph.full_version
+        if self.version != version:
+            self.version = version
+            if self.entries:
+                self.entries.clear()
+                self.invalidations += 1
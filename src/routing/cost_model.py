@@ -0,0 +1,80 @@
+from array import array
+from typing import Sequence
+from src.models.compiled_graph import CompiledGraph
+from src.models.zone import ZoneType
+
+
+# Poids d'une zone bloquée (et des cases CSR qui y entrent) : exclue.
+EXCLUDED = -1
+PRIORITY = ZoneType.PRIORITY.value
+BLOCKED = ZoneType.BLOCKED.value
+
+
+class CostModel:
+    """
+    Poids entiers d'entrée dans chaque zone, calculés une fois par carte.
+
+    Un tour vaut scale (nombre de zones + 1) ; une zone prioritaire
+    coûte un de moins. Aucun chemin simple n'entre dans scale zones : la
+    prime ne change jamais le nombre de tours, elle départage seulement
+    les chemins de même durée au profit de celui qui passe par le plus
+    de zones prioritaires. Une zone restreinte coûte 2 * scale, une
+    zone bloquée EXCLUDED.
+
+    weight est indexé par zone, edge_weight par case CSR (poids de la
+    zone d'arrivée) : la boucle interne d'une recherche lit un entier
+    au lieu d'appeler Zone.get_movement_cost.
+    """
+
+    __slots__ = ("compiled", "scale", "weight", "edge_weight")
+
+    def __init__(self, compiled: CompiledGraph) -> None:
+        self.compiled = compiled
+        self.scale = compiled.num_zones + 1
+        self.weight = array("i", (
+            self.zone_weight(v) for v in range(compiled.num_zones)
+        ))
+        weight = self.weight
+        self.edge_weight = array("i", (weight[v] for v in compiled.neighbours))
+
+    def zone_weight(self, zone_id: int) -> int:
+        """Poids d'entrée de zone_id d'après la vue compilée."""
+        compiled = self.compiled
+        z_type = compiled.zone_type[zone_id]
+        if z_type == BLOCKED:
+            return EXCLUDED
+        bonus = 1 if z_type == PRIORITY else 0
+        return compiled.move_cost[zone_id] * self.scale - bonus
+
+    def refresh(self, zone_id: int) -> None:
+        """Recalcule le poids de zone_id et des cases qui y entrent."""
+        weight = self.zone_weight(zone_id)
+        self.weight[zone_id] = weight
+        compiled = self.compiled
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        for u in neighbours[offsets[zone_id]:offsets[zone_id + 1]]:
+            for slot in range(offsets[u], offsets[u + 1]):
+                if neighbours[slot] == zone_id:
+                    self.edge_weight[slot] = weight
+
+    def turns(self, weight: float) -> float:
+        """Nombre de tours d'un poids de chemin (inf reste inf)."""
+        if weight == float("inf"):
+            return weight
+        return -(-int(weight) // self.scale)
+
+    def path_weight(self, path: Sequence[int]) -> int:
+        """Poids de path : ses zones après la première."""
+        weight = self.weight
+        return sum(weight[v] for v in path[1:])
+
+
+def cost_model(compiled: CompiledGraph) -> CostModel:
+    """
+    Le CostModel de compiled, construit au premier appel puis tenu à
+    jour par CompiledGraph.refresh_zone.
+    """
+    costs = compiled.costs
+    if costs is None:
+        costs = compiled.costs = CostModel(compiled)
+    return costs
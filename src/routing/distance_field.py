@@ -0,0 +1,167 @@
+import heapq
+from array import array
+from typing import Iterable, List, Optional, Set
+from src.models.graph import Graph
+from src.models.zone import Zone
+from src.routing.cost_model import cost_model
+
+
+INF = float("inf")
+
+
+class DistanceField:
+    """
+    Distance au but et prochain saut pour chaque zone.
+
+    Construite une fois par Dijkstra inverse depuis le but : dist[z] est
+    le poids minimal (CostModel, somme des poids des zones entrées) de z
+    au but et next_hop[z] le voisin où aller ; une route est une marche
+    de O(longueur) dans la table.
+
+    Zones bloquées et pleines sont « fermées » : aucune route ne les
+    traverse. Une zone pleine garde sa distance (un drone déjà dedans
+    peut en sortir), une zone bloquée n'en a pas. Abonnée au graphe,
+    la table ne répare que la partie qui dépend de la zone modifiée.
+    """
+
+    def __init__(self, graph: Graph, goal: Zone) -> None:
+        """Construit la table et s'abonne aux changements du graphe."""
+        self.graph = graph
+        self.compiled = graph.freeze()
+        self.costs = cost_model(self.compiled)
+        self.zones: List[Zone] = list(graph.zones.values())
+        self.goal = self.compiled.id_of(goal.name)
+        n = self.compiled.num_zones
+        self.closed = bytearray(
+            0 if i == self.goal or (z.is_accessible() and z.has_capacity())
+            else 1
+            for i, z in enumerate(self.zones)
+        )
+        self.dist: List[float] = [INF] * n
+        self.next_hop = array("i", [-1]) * n
+        self.dist[self.goal] = 0
+        self._propagate([(0, self.goal)])
+        graph.subscribe(self.update)
+
+    def distance(self, zone: Zone) -> float:
+        """Nombre de tours de zone au but (inf si inaccessible)."""
+        return self.costs.turns(self.dist[self.compiled.id_of(zone.name)])
+
+    def heuristic(self, zone_id: int) -> float:
+        """
+        Heuristique A* lue dans la table : exacte pour une recherche qui
+        évite les mêmes zones, admissible si elle en évite davantage.
+        """
+        return self.dist[zone_id]
+
+    def route_ids(self, start: int) -> Optional[List[int]]:
+        """Suit la table des prochains sauts de start au but."""
+        if self.dist[start] == INF:
+            return None
+        route = [start]
+        node = start
+        while node != self.goal:
+            node = self.next_hop[node]
+            route.append(node)
+        return route
+
+    def route_from(self, start: Zone) -> Optional[List[Zone]]:
+        """Comme route_ids, avec des objets Zone."""
+        ids = self.route_ids(self.compiled.id_of(start.name))
+        if ids is None:
+            return None
+        return [self.zones[i] for i in ids]
+
+    def update(self, zone: Zone) -> None:
+        """Relit l'état de ``zone`` (bloquée ou pleine) et répare la table."""
+        zone_id = self.compiled.id_of(zone.name)
+        if zone_id == self.goal:
+            return
+        if not zone.is_accessible():
+            self.close(zone_id)
+            # Une zone bloquée n'a plus de distance propre.
+            self.dist[zone_id] = INF
+            self.next_hop[zone_id] = -1
+        elif zone.has_capacity():
+            self.open(zone_id)
+        else:
+            self.close(zone_id)
+            if self.dist[zone_id] == INF:
+                self._reseed([zone_id])
+
+    def close(self, zone_id: int) -> None:
+        """
+        Interdit de passer par zone_id. Seules les zones dont la chaîne de
+        sauts y passait sont remises à zéro, puis recalculées depuis leurs
+        voisins encore valides.
+        """
+        if self.closed[zone_id] or zone_id == self.goal:
+            return
+        self.closed[zone_id] = 1
+        offsets, neighbours = self.compiled.offsets, self.compiled.neighbours
+        affected: Set[int] = set()
+        stack = [zone_id]
+        while stack:
+            v = stack.pop()
+            for slot in range(offsets[v], offsets[v + 1]):
+                u = neighbours[slot]
+                if self.next_hop[u] == v and u not in affected:
+                    affected.add(u)
+                    stack.append(u)
+        for u in affected:
+            self.dist[u] = INF
+            self.next_hop[u] = -1
+
+        self._reseed(affected)
+
+    def open(self, zone_id: int) -> None:
+        """Autorise à nouveau zone_id ; les distances ne font que baisser."""
+        if not self.closed[zone_id]:
+            return
+        self.closed[zone_id] = 0
+        if self.dist[zone_id] < INF:
+            self._propagate([(self.dist[zone_id], zone_id)])
+        else:
+            self._reseed([zone_id])
+
+    def _reseed(self, zone_ids: Iterable[int]) -> None:
+        """Recalcule zone_ids depuis leurs voisins valides, puis propage."""
+        compiled = self.compiled
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        cost, closed, dist = self.costs.weight, self.closed, self.dist
+        pending = set(zone_ids)
+        seeds = []
+        for u in pending:
+            if cost[u] < 0:
+                continue  # bloquée
+            for slot in range(offsets[u], offsets[u + 1]):
+                v = neighbours[slot]
+                if v in pending or closed[v] or dist[v] == INF:
+                    continue
+                d = dist[v] + cost[v]
+                if d < dist[u]:
+                    dist[u] = d
+                    self.next_hop[u] = v
+            if dist[u] < INF:
+                seeds.append((dist[u], u))
+        heapq.heapify(seeds)
+        self._propagate(seeds)
+
+    def _propagate(self, heap: list) -> None:
+        """Relâchement de Dijkstra depuis les zones de heap."""
+        compiled = self.compiled
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        cost, closed, dist, next_hop = (
+            self.costs.weight, self.closed, self.dist, self.next_hop
+        )
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v] or closed[v]:
+                continue
+            step = d + cost[v]
+            for slot in range(offsets[v], offsets[v + 1]):
+                u = neighbours[slot]
+                if step < dist[u] and cost[u] >= 0:
+                    dist[u] = step
+                    next_hop[u] = v
+                    heapq.heappush(heap, (step, u))
@@ -0,0 +1,243 @@
+import heapq
+from typing import List, Optional, Tuple
+from src.models.compiled_graph import CompiledGraph
+from src.models.graph import Graph
+from src.models.zone import Zone, ZoneType
+
+
+RESTRICTED = ZoneType.RESTRICTED.value
+INF = float("inf")
+
+
+class FlowPath:
+    """
+    Un couloir de la décomposition du flot : flow drones partent ensemble
+    toutes les period tours (2 si le chemin entre dans une zone
+    restreinte, dont le lien reste occupé deux tours) et arrivent après
+    length tours.
+    """
+
+    def __init__(
+        self, zones: List[int], flow: int, length: int, period: int
+    ) -> None:
+        self.zones = zones
+        self.flow = flow
+        self.length = length
+        self.period = period
+
+    def arrivals_by(self, turn: int) -> int:
+        """Nombre de drones livrés par ce chemin à la fin de turn."""
+        if turn < self.length:
+            return 0
+        return self.flow * ((turn - self.length) // self.period + 1)
+
+
+class FlowPlan:
+    """
+    Répartition optimale des drones sur les couloirs d'un flot de coût
+    minimal.
+
+    lower_bound minore le nombre de tours de tout planning : aucun drone
+    n'arrive avant le plus court trajet d et au plus F drones (le flot
+    maximal) arrivent par tour, d'où d + ceil(n / F) - 1. turns est la
+    durée obtenue en lançant counts drones sur paths.
+    """
+
+    def __init__(
+        self,
+        compiled: CompiledGraph,
+        paths: List[FlowPath],
+        counts: List[int],
+        turns: int,
+        lower_bound: int,
+    ) -> None:
+        self.compiled = compiled
+        self.paths = paths
+        self.counts = counts
+        self.turns = turns
+        self.lower_bound = lower_bound
+
+    def assign(self) -> List[Tuple[int, int]]:
+        """
+        Affecte chaque drone à un chemin en O(drones) : un couple
+        (indice du chemin, tour de départ) par drone, dans l'ordre des
+        départs.
+        """
+        assignment: List[Tuple[int, int]] = []
+        for index, (path, count) in enumerate(zip(self.paths, self.counts)):
+            for k in range(count):
+                assignment.append((index, (k // path.flow) * path.period))
+        assignment.sort(key=lambda item: (item[1], item[0]))
+        return assignment
+
+
+class _Network:
+    """Réseau résiduel à nœuds dédoublés (zone v : 2v entrée, 2v+1 sortie)."""
+
+    def __init__(self, size: int) -> None:
+        self.head = [-1] * size
+        self.to: List[int] = []
+        self.cap: List[int] = []
+        self.cost: List[int] = []
+        self.next: List[int] = []
+
+    def add_arc(self, u: int, v: int, cap: int, cost: int) -> None:
+        for a, b, c, w in ((u, v, cap, cost), (v, u, 0, -cost)):
+            self.to.append(b)
+            self.cap.append(c)
+            self.cost.append(w)
+            self.next.append(self.head[a])
+            self.head[a] = len(self.to) - 1
+
+
+def plan_flow(
+    graph: Graph, start: Zone, goal: Zone, nb_drones: int
+) -> FlowPlan:
+    """
+    Répartit nb_drones sur des couloirs de capacités disjointes.
+
+    Plus courts chemins successifs (Dijkstra avec potentiels) sur le
+    réseau dédoublé : capacités des zones (départ et but illimités) et
+    des liens. Après chaque augmentation le flot est décomposé en chemins
+    et la meilleure répartition est gardée. Lève ValueError si le but est
+    inaccessible.
+    """
+    compiled = graph.freeze()
+    s, t = compiled.id_of(start.name), compiled.id_of(goal.name)
+    net = _build_network(compiled, s, t, nb_drones)
+    source, sink = 2 * s + 1, 2 * t + 1
+
+    potential = [0] * len(net.head)
+    flow, shortest = 0, 0
+    best: Optional[Tuple[int, List[FlowPath], List[int]]] = None
+    while flow < nb_drones:
+        pushed = _augment(net, potential, source, sink, nb_drones - flow)
+        if not pushed:
+            break
+        flow += pushed
+        paths = _decompose(net, compiled, s, t)
+        if not shortest:
+            shortest = paths[0].length
+        turns, counts = _split(paths, nb_drones)
+        if best is None or turns < best[0]:
+            best = (turns, paths, counts)
+
+    if best is None:
+        raise ValueError("Goal unreachable from start")
+    turns, paths, counts = best
+    lower_bound = shortest + -(-nb_drones // flow) - 1
+    return FlowPlan(compiled, paths, counts, turns, lower_bound)
+
+
+def _build_network(
+    compiled: CompiledGraph, s: int, t: int, nb_drones: int
+) -> _Network:
+    """Construit le réseau résiduel dédoublé du graphe compilé."""
+    net = _Network(2 * compiled.num_zones)
+    offsets, neighbours = compiled.offsets, compiled.neighbours
+    for v in range(compiled.num_zones):
+        if not compiled.is_accessible(v):
+            continue
+        unlimited = v == s or v == t
+        cap = nb_drones if unlimited else min(compiled.capacity[v], nb_drones)
+        cost = 0 if v == s else compiled.move_cost[v]
+        net.add_arc(2 * v, 2 * v + 1, cap, cost)
+        for slot in range(offsets[v], offsets[v + 1]):
+            w = neighbours[slot]
+            if compiled.is_accessible(w) and w != s and v != t:
+                link_cap = compiled.link_capacity[compiled.edge_link[slot]]
+                net.add_arc(2 * v + 1, 2 * w, link_cap, 0)
+    return net
+
+
+def _augment(
+    net: _Network, potential: List[int], source: int, sink: int, limit: int
+) -> int:
+    """Pousse du flot sur un plus court chemin résiduel (quantité)."""
+    size = len(net.head)
+    dist = [INF] * size
+    via = [-1] * size
+    dist[source] = 0
+    pq = [(0, source)]
+    while pq:
+        d, u = heapq.heappop(pq)
+        if d > dist[u]:
+            continue
+        arc = net.head[u]
+        while arc != -1:
+            if net.cap[arc] > 0:
+                v = net.to[arc]
+                nd = d + net.cost[arc] + potential[u] - potential[v]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    via[v] = arc
+                    heapq.heappush(pq, (nd, v))
+            arc = net.next[arc]
+    if dist[sink] == INF:
+        return 0
+    for v in range(size):
+        if dist[v] < INF:
+            potential[v] += int(dist[v])
+
+    pushed, v = limit, sink
+    while v != source:
+        arc = via[v]
+        pushed = min(pushed, net.cap[arc])
+        v = net.to[arc ^ 1]
+    v = sink
+    while v != source:
+        arc = via[v]
+        net.cap[arc] -= pushed
+        net.cap[arc ^ 1] += pushed
+        v = net.to[arc ^ 1]
+    return pushed
+
+
+def _decompose(
+    net: _Network, compiled: CompiledGraph, s: int, t: int
+) -> List[FlowPath]:
+    """Décompose le flot courant en chemins départ-but."""
+    # Le flot d'un arc direct est la capacité résiduelle de son jumeau.
+    used = [
+        net.cap[arc ^ 1] if arc % 2 == 0 else 0 for arc in range(len(net.to))
+    ]
+    paths: List[FlowPath] = []
+    while True:
+        zones, arcs = [s], []
+        u = 2 * s + 1
+        while u != 2 * t + 1:
+            arc = net.head[u]
+            while arc != -1 and (arc % 2 or used[arc] == 0):
+                arc = net.next[arc]
+            if arc == -1:
+                return paths
+            arcs.append(arc)
+            u = net.to[arc]
+            if u % 2 == 0:
+                zones.append(u // 2)
+        amount = min(used[arc] for arc in arcs)
+        for arc in arcs:
+            used[arc] -= amount
+        length = sum(compiled.move_cost[z] for z in zones[1:])
+        restricted = any(compiled.zone_type[z] == RESTRICTED for z in zones)
+        paths.append(FlowPath(zones, amount, length, 2 if restricted else 1))
+
+
+def _split(paths: List[FlowPath], nb_drones: int) -> Tuple[int, List[int]]:
+    """Plus petite durée pour nb_drones sur paths, et la répartition."""
+    lo = min(p.length for p in paths)
+    hi = max(p.length for p in paths) + 2 * nb_drones
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if sum(p.arrivals_by(mid) for p in paths) >= nb_drones:
+            hi = mid
+        else:
+            lo = mid + 1
+    counts = [p.arrivals_by(lo) for p in paths]
+    # Retire le surplus des chemins les plus lents d'abord.
+    surplus = sum(counts) - nb_drones
+    for i in sorted(range(len(paths)), key=lambda i: -paths[i].length):
+        take = min(surplus, counts[i])
+        counts[i] -= take
+        surplus -= take
+    return lo, counts
@@ -0,0 +1,269 @@
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple
+from src.models.compiled_graph import CompiledGraph
+from src.routing.cost_model import cost_model
+
+
+INF = float("inf")
+DEFAULT_TILE = 16
+# Marque de prev : zone atteinte depuis le départ par la recherche locale.
+FROM_START = -1
+
+Heuristic = Callable[[int], float]
+LinkOpen = Callable[[int], bool]
+# Arêtes abstraites d'une frontière : (autre frontière, poids).
+Edges = List[Tuple[int, int]]
+
+
+class Tile:
+    """
+    Une tuile de la hiérarchie : ses zones, ses frontières (zones qui
+    ont un voisin dans une autre tuile) et, calculés à la demande, les
+    plus courts chemins internes entre frontières.
+    """
+
+    __slots__ = ("members", "borders", "edges", "prev", "dirty")
+
+    def __init__(self) -> None:
+        self.members: List[int] = []
+        self.borders: List[int] = []
+        # edges[b] : frontières atteintes depuis b sans quitter la tuile ;
+        # prev[b] : prédécesseurs de cette recherche, pour raffiner.
+        self.edges: Dict[int, Edges] = {}
+        self.prev: Dict[int, Dict[int, int]] = {}
+        self.dirty = True
+
+
+class ZoneHierarchy:
+    """
+    Découpage de la carte en tuiles de tile x tile d'après Zone.x /
+    Zone.y (style HPA*), gardé à côté du Graph.
+
+    Chaque zone frontière est un nœud abstrait ; deux frontières d'une
+    même tuile sont reliées par leur plus court chemin interne, deux
+    voisines de tuiles différentes par leur lien. Ces distances étant
+    exactes, une route abstraite raffinée est un plus court chemin du
+    graphe : mêmes poids (CostModel) et mêmes obstacles (zones bloquées
+    ou pleines, liens saturés au premier pas) que Dijkstra.
+
+    Une tuile n'est calculée qu'à son premier usage ; un changement de
+    zone (type, place libre) ne marque que sa tuile, recalculée au
+    prochain passage. build() calcule tout d'avance.
+    """
+
+    def __init__(self, compiled: CompiledGraph,
+                 tile: int = DEFAULT_TILE) -> None:
+        self.compiled = compiled
+        self.tile_size = max(1, tile)
+        self.costs = cost_model(compiled)
+        self.tile_of: List[int] = []
+        self.tiles: List[Tile] = []
+        index: Dict[Tuple[int, int], int] = {}
+        for v in range(compiled.num_zones):
+            key = (compiled.x[v] // self.tile_size,
+                   compiled.y[v] // self.tile_size)
+            if key not in index:
+                index[key] = len(self.tiles)
+                self.tiles.append(Tile())
+            self.tile_of.append(index[key])
+            self.tiles[index[key]].members.append(v)
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        tile_of = self.tile_of
+        self.is_border = bytearray(compiled.num_zones)
+        # exits[v] : cases CSR de v vers une autre tuile
+        self.exits: Dict[int, List[int]] = {}
+        for v in range(compiled.num_zones):
+            exits = [
+                slot for slot in range(offsets[v], offsets[v + 1])
+                if tile_of[neighbours[slot]] != tile_of[v]
+            ]
+            if exits:
+                self.is_border[v] = 1
+                self.exits[v] = exits
+                self.tiles[tile_of[v]].borders.append(v)
+        self.tiles_rebuilt = 0
+        self.expanded = 0
+
+    def build(self) -> None:
+        """Calcule toutes les tuiles (prétraitement complet)."""
+        for tile in self.tiles:
+            if tile.dirty:
+                self._rebuild(tile)
+
+    def zone_changed(self, zone_id: int) -> None:
+        """Une zone a changé de type ou de place libre : sa tuile."""
+        self.tiles[self.tile_of[zone_id]].dirty = True
+
+    def route(self, start: int, goal: int, h: Heuristic,
+              link_open: Optional[LinkOpen] = None) -> Optional[List[int]]:
+        """
+        Plus court chemin de start à goal, ou None. h est une heuristique
+        admissible vers goal (A* sur les frontières), link_open (si donné)
+        filtre les liens sortant de start.
+        """
+        self.expanded = 1
+        if start == goal:
+            return [start]
+        compiled, can_move = self.compiled, self.compiled.can_move
+        if not can_move(goal):
+            return None
+        tile_of, is_border = self.tile_of, self.is_border
+        out_dist, out_prev = self._local(start, link_open)
+        into, next_hop = self._local_to(goal)
+        self.expanded = len(out_dist) + len(into)
+
+        best, last = out_dist.get(goal, INF), goal
+        dist: Dict[int, float] = {}
+        prev: Dict[int, int] = {}
+        heap = []
+        for b, d in out_dist.items():
+            if is_border[b]:
+                dist[b], prev[b] = d, FROM_START
+                heap.append((d + h(b), d, b))
+        heapq.heapify(heap)
+        neighbours, edge_weight = compiled.neighbours, self.costs.edge_weight
+        while heap:
+            f, d, u = heapq.heappop(heap)
+            if f >= best:
+                break
+            if d > dist[u]:
+                continue
+            self.expanded += 1
+            if u in into and d + into[u] < best:
+                best, last = d + into[u], u
+            tile = self.tiles[tile_of[u]]
+            edges: Edges = []
+            if u != start:
+                # depuis start, la recherche locale a déjà tout couvert
+                if tile.dirty:
+                    self._rebuild(tile)
+                edges.extend(tile.edges.get(u, ()))
+            for slot in self.exits[u]:
+                v = neighbours[slot]
+                if not can_move(v):
+                    continue
+                if (u == start and link_open is not None
+                        and not link_open(compiled.edge_link[slot])):
+                    continue
+                edges.append((v, edge_weight[slot]))
+            for v, w in edges:
+                nd = d + w
+                if nd < dist.get(v, INF):
+                    dist[v], prev[v] = nd, u
+                    heapq.heappush(heap, (nd + h(v), nd, v))
+        if best == INF:
+            return None
+        return self._refine(start, goal, last, prev, out_prev, next_hop)
+
+    def _refine(self, start: int, goal: int, last: int,
+                prev: Dict[int, int], out_prev: Dict[int, int],
+                next_hop: Dict[int, int]) -> List[int]:
+        """Déplie la route abstraite en zones, tuile par tuile."""
+        # de last au but par la recherche locale inverse
+        tail = []
+        node = last
+        while node != goal:
+            node = next_hop[node]
+            tail.append(node)
+        if last == goal and last not in prev:
+            # chemin direct, sans frontière
+            return _walk(out_prev, start, goal)
+        abstract = [last]
+        while prev[abstract[-1]] != FROM_START:
+            abstract.append(prev[abstract[-1]])
+        abstract.reverse()
+        route = _walk(out_prev, start, abstract[0])
+        tile_of = self.tile_of
+        for u, v in zip(abstract, abstract[1:]):
+            if tile_of[u] == tile_of[v]:
+                route.extend(_walk(self.tiles[tile_of[u]].prev[u], u, v)[1:])
+            else:
+                route.append(v)
+        return route + tail
+
+    def _rebuild(self, tile: Tile) -> None:
+        """Plus courts chemins internes entre les frontières de tile."""
+        self.tiles_rebuilt += 1
+        tile.edges, tile.prev = {}, {}
+        can_move, is_border = self.compiled.can_move, self.is_border
+        for b in tile.borders:
+            if not can_move(b):
+                continue
+            dist, prev = self._local(b, None)
+            # Un chemin qui traverse une autre frontière c se retrouve par
+            # b -> c -> v : seules les frontières atteintes sans en croiser
+            # une autre gardent une arête (bien moins d'arêtes, même coût).
+            edges, through = [], {b: False}
+            for v in sorted(dist, key=dist.__getitem__):
+                if v == b:
+                    continue
+                p = prev[v]
+                through[v] = p != b and (through[p] or bool(is_border[p]))
+                if is_border[v] and not through[v]:
+                    edges.append((v, int(dist[v])))
+            tile.edges[b] = edges
+            tile.prev[b] = prev
+        tile.dirty = False
+
+    def _local(self, start: int, link_open: Optional[LinkOpen]) -> Tuple[
+        Dict[int, float], Dict[int, int]
+    ]:
+        """Dijkstra depuis start sans quitter sa tuile : dist et prev."""
+        compiled = self.compiled
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        edge_weight, can_move = self.costs.edge_weight, compiled.can_move
+        tile_of, home = self.tile_of, self.tile_of[start]
+        dist: Dict[int, float] = {start: 0}
+        prev: Dict[int, int] = {start: FROM_START}
+        heap = [(0, start)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for slot in range(offsets[u], offsets[u + 1]):
+                v = neighbours[slot]
+                if tile_of[v] != home or not can_move(v):
+                    continue
+                if (u == start and link_open is not None
+                        and not link_open(compiled.edge_link[slot])):
+                    continue
+                nd = d + edge_weight[slot]
+                if nd < dist.get(v, INF):
+                    dist[v], prev[v] = nd, u
+                    heapq.heappush(heap, (nd, v))
+        return dist, prev
+
+    def _local_to(self, goal: int) -> Tuple[Dict[int, float],
+                                            Dict[int, int]]:
+        """
+        Dijkstra inverse depuis goal dans sa tuile : coût de chaque zone
+        franchissable jusqu'au but, et son prochain saut.
+        """
+        compiled = self.compiled
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        weight, can_move = self.costs.weight, compiled.can_move
+        tile_of, home = self.tile_of, self.tile_of[goal]
+        dist: Dict[int, float] = {goal: 0}
+        next_hop: Dict[int, int] = {}
+        heap = [(0, goal)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            step = d + weight[v]
+            for u in neighbours[offsets[v]:offsets[v + 1]]:
+                if tile_of[u] == home and can_move(u) and step < dist.get(
+                    u, INF
+                ):
+                    dist[u], next_hop[u] = step, v
+                    heapq.heappush(heap, (step, u))
+        return dist, next_hop
+
+
+def _walk(prev: Dict[int, int], start: int, end: int) -> List[int]:
+    """Chemin de start à end en remontant prev."""
+    path = [end]
+    while path[-1] != start:
+        path.append(prev[path[-1]])
+    path.reverse()
+    return path
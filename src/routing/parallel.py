@@ -0,0 +1,265 @@
+import multiprocessing
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.models.compiled_graph import CompiledGraph
+from src.models.graph import Graph
+from src.models.zone import Zone
+from src.routing.strategies.astar import AStar
+from src.routing.strategies.dijkstra import Dijkstra
+
+
+# Requêtes (départ, but) en ids ; route en ids ou None.
+Query = Tuple[int, int]
+RouteIds = Optional[List[int]]
+
+# En dessous, une passe planifie sur place : envoyer un lot aux
+# processus coûte plus que quelques recherches.
+MIN_BATCH = 32
+ROUTERS = {"dijkstra": Dijkstra, "astar": AStar}
+
+# Bloc partagé : en-tête _HEADER (zones, cases CSR, liens, octets des
+# noms), puis les sections int32 de _INT_SECTIONS, les sections
+# uint8 de _BYTE_SECTIONS et les noms séparés par \0. Les sections
+# « dynamiques » sont recopiées avant chaque lot : c'est l'instantané
+# de capacité que voient tous les processus.
+_INT_SECTIONS = (
+    ("x", "n"), ("y", "n"), ("offsets", "n1"), ("neighbours", "slots"),
+    ("edge_link", "slots"), ("link_capacity", "links"),
+    ("capacity", "n"), ("occupancy", "n"),
+    ("link_usage", "links"), ("link_stamp", "links"),
+)
+_BYTE_SECTIONS = (("zone_type", "n"), ("move_cost", "n"))
+_HEADER = struct.Struct("4i")
+_DYNAMIC = (
+    "capacity", "occupancy", "link_usage", "link_stamp", "zone_type",
+    "move_cost",
+)
+
+
+def _buffer(shared: SharedMemory) -> memoryview:
+    """Tampon d'un bloc ouvert (SharedMemory.buf vaut None une fois fermé)."""
+    buf = shared.buf
+    if buf is None:
+        raise ValueError(f"shared memory block {shared.name} is closed")
+    return buf
+
+
+def _layout(n: int, slots: int, links: int) -> Dict[str, Tuple[int, int]]:
+    """(début en octets, éléments) de chaque section du bloc partagé."""
+    count = {"n": n, "n1": n + 1, "slots": slots, "links": links}
+    layout, pos = {}, _HEADER.size
+    for name, size in _INT_SECTIONS:
+        layout[name] = (pos, count[size])
+        pos += 4 * count[size]
+    for name, size in _BYTE_SECTIONS:
+        layout[name] = (pos, count[size])
+        pos += count[size]
+    layout["names"] = (pos, 0)
+    return layout
+
+
+class ParallelPlanner:
+    """
+    Calcul de routes indépendantes dans un pool de processus.
+
+    La vue compilée est copiée une fois dans une SharedMemory (CSR,
+    coordonnées, noms) ; avant chaque lot, seuls type, capacité, coût,
+    occupation et compteurs de liens y sont recopiés. Les processus
+    relisent ces tableaux sans copie, comme un .flymap projeté, et ne
+    renvoient que des listes d'ids. Les requêtes d'un lot voient toutes
+    le même état : l'arbitrage des pas reste au TurnManager.
+
+    strategy vaut "dijkstra" ou "astar" (mêmes poids que CostModel) ;
+    un TurnManager n'accepte le pool que si son routeur est du même type.
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        workers: Optional[int] = None,
+        strategy: str = "dijkstra",
+        min_batch: int = MIN_BATCH,
+    ) -> None:
+        if strategy not in ROUTERS:
+            raise ValueError(f"Unknown parallel strategy '{strategy}'")
+        self.graph = graph
+        self.workers = workers or os.cpu_count() or 1
+        self.strategy = strategy
+        self.min_batch = min_batch
+        self._shared: Optional[SharedMemory] = None
+        self._shared_for: Optional[CompiledGraph] = None
+        self._layout: Dict[str, Tuple[int, int]] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def plan(self, queries: Sequence[Tuple[Zone, Zone]]) -> List[
+        Optional[List[Zone]]
+    ]:
+        """Route de chaque (départ, but), ou None ; dans l'ordre."""
+        compiled = self.graph.freeze()
+        zones = list(self.graph.zones.values())
+        ids = [
+            (compiled.id_of(start.name), compiled.id_of(goal.name))
+            for start, goal in queries
+        ]
+        return [
+            None if route is None else [zones[i] for i in route]
+            for route in self.plan_ids(ids)
+        ]
+
+    def plan_ids(self, queries: Sequence[Query]) -> List[RouteIds]:
+        """Variante entière de plan, sur les ids de la vue compilée."""
+        if not queries:
+            return []
+        shared = self._snapshot()
+        chunk = -(-len(queries) // self.workers)
+        job = (
+            shared.name, self.strategy, self.graph.type_version,
+            self.graph.turn, bool(self.graph.saturated_links),
+        )
+        pool = self._executor()
+        futures = [
+            pool.submit(_plan_chunk, job, list(queries[i:i + chunk]))
+            for i in range(0, len(queries), chunk)
+        ]
+        return [route for future in futures for route in future.result()]
+
+    def close(self) -> None:
+        """Arrête les processus et libère la mémoire partagée."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._release()
+
+    def __enter__(self) -> "ParallelPlanner":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            context = None
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=context
+            )
+        return self._pool
+
+    def _snapshot(self) -> SharedMemory:
+        """Partage la vue compilée (si nouvelle) et son état courant."""
+        compiled = self.graph.freeze()
+        shared = self._shared
+        if shared is None or compiled is not self._shared_for:
+            shared = self._share(compiled)
+        buf = _buffer(shared)
+        for name in _DYNAMIC:
+            pos, size = self._layout[name]
+            data = memoryview(getattr(compiled, name)).cast("B")
+            buf[pos:pos + len(data)] = data
+        return shared
+
+    def _share(self, compiled: CompiledGraph) -> SharedMemory:
+        """Copie toute la vue compilée dans un nouveau bloc partagé."""
+        self._release()
+        names = "\0".join(compiled.names).encode()
+        n, slots = compiled.num_zones, len(compiled.neighbours)
+        layout = _layout(n, slots, compiled.num_links)
+        shared = SharedMemory(create=True,
+                              size=layout["names"][0] + len(names) or 1)
+        buf = _buffer(shared)
+        _HEADER.pack_into(buf, 0, n, slots, compiled.num_links, len(names))
+        for name, (pos, size) in layout.items():
+            if name == "names":
+                buf[pos:pos + len(names)] = names
+                continue
+            data = memoryview(getattr(compiled, name)).cast("B")
+            buf[pos:pos + len(data)] = data
+        self._shared, self._shared_for, self._layout = (
+            shared, compiled, layout,
+        )
+        return shared
+
+    def _release(self) -> None:
+        if self._shared is not None:
+            self._shared.close()
+            self._shared.unlink()
+            self._shared = None
+            self._shared_for = None
+
+
+# Côté processus : bloc partagé attaché, vue compilée sur ses tableaux et
+# routeur, par nom de bloc ; reconstruits si le bloc ou le type_version
+# change.
+_attached: Dict[str, Tuple[SharedMemory, CompiledGraph, Any, int]] = {}
+
+
+def _plan_chunk(job: Tuple[str, str, int, int, bool],
+                queries: List[Query]) -> List[RouteIds]:
+    """Calcule un morceau de lot dans un processus du pool."""
+    name, strategy, type_version, turn, saturated = job
+    compiled, router = _attach(name, strategy, type_version)
+    link_open = (
+        (lambda link: compiled.link_open(link, turn)) if saturated else None
+    )
+    return [
+        router.search(compiled, start, goal, compiled.can_move, link_open)
+        for start, goal in queries
+    ]
+
+
+def _attach(name: str, strategy: str,
+            type_version: int) -> Tuple[CompiledGraph, Any]:
+    entry = _attached.get(name)
+    if entry is None:
+        _detach()
+        shared = SharedMemory(name=name)
+        entry = (shared, _view(shared), None, -1)
+    shared, compiled, router, version = entry
+    if router is None or version != type_version:
+        # poids et heuristique suivent le type des zones ; search ne lit
+        # que la vue compilée, le routeur n'a pas besoin du vrai graphe
+        compiled.costs = None
+        router = ROUTERS[strategy](Graph())
+    _attached[name] = (shared, compiled, router, type_version)
+    return compiled, router
+
+
+def _detach() -> None:
+    """Ferme le bloc précédent (vue compilée lâchée d'abord)."""
+    blocks = []
+    for shared, compiled, _, _ in _attached.values():
+        compiled.costs = None  # CostModel <-> vue : cycle
+        blocks.append(shared)
+    _attached.clear()
+    for shared in blocks:
+        shared.close()
+
+
+def _view(shared: SharedMemory) -> CompiledGraph:
+    """CompiledGraph dont les tableaux sont des vues sur le bloc."""
+    buf = _buffer(shared)
+    n, slots, links, names_len = _HEADER.unpack_from(buf)
+    layout = _layout(n, slots, links)
+    arrays: Dict[str, Any] = {}
+    for name, (pos, size) in layout.items():
+        if name == "names":
+            continue
+        if name in dict(_BYTE_SECTIONS):
+            arrays[name] = buf[pos:pos + size].cast("B")
+        else:
+            arrays[name] = buf[pos:pos + 4 * size].cast("i")
+    pos = layout["names"][0]
+    names = bytes(buf[pos:pos + names_len]).decode().split("\0") if n else []
+    compiled = CompiledGraph(
+        names, arrays["x"], arrays["y"], arrays["zone_type"],
+        arrays["capacity"], arrays["move_cost"], arrays["offsets"],
+        arrays["neighbours"], arrays["edge_link"], arrays["link_capacity"],
+        arrays["occupancy"],
+    )
+    compiled.link_usage = arrays["link_usage"]
+    compiled.link_stamp = arrays["link_stamp"]
+    return compiled
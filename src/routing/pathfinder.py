@@ -1,85 +1,190 @@
 import heapq
-from typing import Dict , List , Optional , Set , Tuple
-from models.zone import Zone , ZoneType
-from models.graph import graph
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from src.models.compiled_graph import CompiledGraph
+from src.models.zone import Zone
+from src.models.graph import Graph
+from src.routing.cost_model import cost_model
+from src.routing.strategies.dijkstra import Dijkstra
 
 
-class DijkstraPathfinder :
+Path = Tuple[int, ...]
 
-    def __init__(self,graph:Graph):
-        self.graph = graph
-        self.distance:Dict[str , int] = {}
-        self.predecessors :Dict[str , Optional[str]] = {}
 
+class DijkstraPathfinder:
+    """
+    Plus courts chemins avec un ensemble explicite de zones à éviter.
+    L'occupation est ignorée : seules les zones bloquées et celles de
+    blocked_zones sont des obstacles.
+    """
 
+    def __init__(self, graph: Graph):
+        self.graph = graph
+        self.dijkstra = Dijkstra(graph)
+        # k plus courts chemins par (départ, but, k, disjoint), valables
+        # pour une vue compilée et un graph.type_version donnés.
+        self._paths: Dict[Tuple[int, int, int, bool], List[Path]] = {}
+        self._paths_for: Tuple[Optional[CompiledGraph], int] = (None, -1)
 
     def find_path(
         self,
-        start:Zone,
-        goal:Zone,
-        Blocked_zones:Optional[Set[str]] = None
-    ) ->Optional[List[Zone]]:
-
-    if Blocked_zones is None:
-        Blocked_zones = set()
-    
-
-    dist:Dict[str,int] = {zone.name : float('-inf') for zone in self.graph.zones.values()}
-    prev:Dict[str,Optional[str]] = {zone.name for zone in self.graph.zones.values()}
-    dist[start.name] = 0
-
-    counter = 0
-    pq:List[Tuple[int , int , str]] = [(0,counter,start.name)]
-    visited :Set[str] = set()
-
-    while pq:
-        current_dist,_,current_name = heapq.heappop(pq)
-        if current_name in visited:
-            continue
-        visited.add(current_name)
-        if current_name == goal.name:
-            break
-        current_zone = self.graph.get_zone(current_name)
-        if current_zone:
-            continue
-
-        for neighbor in self.graph.get_neighbors(current_zone):
-            if neighbor.name in Blocked_zones:
-                continue
-            if not neighbor.is_accessible():
-                continue
-            edge_cost = neighbor.get_movement_cost()
-            if edge_cost == 0:
-                continue
-
-            new_dist = current_dist + edge_cost
-            if new_dist < dist[neighbor.name]:
-                dist[neighbor.name] = new_dist
-                prev[neighbor.name] = current_name
-                counter +=1
-                heapq.heappush(pq,(new_dist,counter,neighbor.name))
-
-        if dist[goal.name] == float('-inf'):
+        start: Zone,
+        goal: Zone,
+        blocked_zones: Optional[Set[str]] = None
+    ) -> Optional[List[Zone]]:
+        """
+        Chemin le moins coûteux de start à goal évitant blocked_zones,
+        ou None s'il n'existe pas.
+        """
+        if blocked_zones is None:
+            blocked_zones = set()
+
+        compiled = self.graph.freeze()
+        names = compiled.names
+
+        def passable(v: int) -> bool:
+            return (compiled.is_accessible(v)
+                    and names[v] not in blocked_zones)
+
+        ids = self.dijkstra.search(
+            compiled, compiled.id_of(start.name), compiled.id_of(goal.name),
+            passable,
+        )
+        if ids is None:
             return None
-        path:List[Zone] = []
-        current : Optional[str] =  goal.name
-        while current is not None:
-            zone = self.graph.get_zone(current)
-            if zone :
-                path.append(zone)
-            current = prev[current]
-        return list(reversed(path))
-
+        return [self.graph.zones[names[i]] for i in ids]
 
     def find_k_shortest_paths(
         self,
-        start:Zone,
-        goal:Zone,
-        k:int ,
-        Blocked_zones:Optional[Set[str]] =None
-        )->List[list[Zone]]List:
-
-        paths:List[list[Zone]] = []
-        condidates :List[Tuple[int , List[Zone]]] = []
-
-
+        start: Zone,
+        goal: Zone,
+        k: int,
+        disjoint: bool = False,
+    ) -> List[List[Zone]]:
+        """
+        Jusqu'à k chemins sans boucle de start à goal, du moins coûteux
+        au plus coûteux (algorithme de Yen).
+
+        Avec disjoint, chaque chemin évite les zones intermédiaires des
+        précédents : moins de chemins, mais qui ne se gênent pas.
+        Mis en cache jusqu'au prochain changement de topologie ou de
+        type de zone.
+        """
+        compiled = self.graph.freeze()
+        version = (compiled, self.graph.type_version)
+        if self._paths_for != version:
+            self._paths_for = version
+            self._paths = {}
+        key = (compiled.id_of(start.name), compiled.id_of(goal.name),
+               k, disjoint)
+        paths = self._paths.get(key)
+        if paths is None:
+            search = self._disjoint if disjoint else self._yen
+            paths = self._paths[key] = search(compiled, key[0], key[1], k)
+        zones = list(self.graph.zones.values())
+        return [[zones[i] for i in path] for path in paths]
+
+    def _yen(self, compiled: CompiledGraph, start: int, goal: int,
+             k: int) -> List[Path]:
+        """Yen : chaque chemin trouvé propose une déviation par zone."""
+        first = self.dijkstra.search(
+            compiled, start, goal, compiled.is_accessible
+        )
+        if first is None or k < 1:
+            return []
+        found: List[Path] = [tuple(first)]
+        seen = {found[0]}
+        candidates: List[Tuple[int, Path]] = []
+        while len(found) < k:
+            last = found[-1]
+            for j in range(len(last) - 1):
+                root = last[:j + 1]
+                spur = last[j]
+                # liens déjà pris depuis cette racine, zones de la racine
+                cut = {
+                    compiled.link_between(spur, path[j + 1])
+                    for path in found if path[:j + 1] == root
+                }
+                avoid = set(root[:-1])
+
+                def passable(v: int) -> bool:
+                    return v not in avoid and compiled.is_accessible(v)
+
+                tail = self.dijkstra.search(
+                    compiled, spur, goal, passable,
+                    lambda link: link not in cut,
+                )
+                if tail is None:
+                    continue
+                path = root[:-1] + tuple(tail)
+                if path not in seen:
+                    seen.add(path)
+                    heapq.heappush(
+                        candidates, (path_cost(compiled, path), path)
+                    )
+            if not candidates:
+                break
+            found.append(heapq.heappop(candidates)[1])
+        return found
+
+    def _disjoint(self, compiled: CompiledGraph, start: int, goal: int,
+                  k: int) -> List[Path]:
+        """Plus courts chemins successifs, sans zone intermédiaire commune."""
+        used: Set[int] = set()
+        cut: Set[int] = set()
+        found: List[Path] = []
+
+        def passable(v: int) -> bool:
+            return v not in used and compiled.is_accessible(v)
+
+        while len(found) < k:
+            path = self.dijkstra.search(
+                compiled, start, goal, passable, lambda link: link not in cut
+            )
+            if path is None:
+                break
+            found.append(tuple(path))
+            used.update(path[1:-1])
+            # un lien direct départ-but n'a pas de zone intermédiaire
+            cut.add(compiled.link_between(path[0], path[1]))
+        return found
+
+
+def path_cost(compiled: CompiledGraph, path: Sequence[int]) -> int:
+    """
+    Poids de path (CostModel) : les chemins de Yen sont classés par
+    durée, puis par nombre de zones prioritaires.
+    """
+    return cost_model(compiled).path_weight(path)
+
+
+def assign_by_load(
+    graph: Graph, paths: Sequence[Sequence[Zone]], count: int
+) -> List[int]:
+    """
+    Indice du chemin de chacun de count drones, répartis par charge.
+
+    Un chemin débite au plus « goulot » drones par tour (plus petite
+    capacité de ses zones intermédiaires et de ses liens) : le n-ième
+    drone qui le prend arrive vers coût + n / goulot. Chaque drone prend
+    le chemin où il arriverait le plus tôt, le moins coûteux à égalité.
+    """
+    if not paths:
+        return []
+    estimates = []
+    for index, path in enumerate(paths):
+        throughput = min(
+            [zone.capacity for zone in path[1:-1]]
+            + [graph.link_capacity(a.name, b.name)
+               for a, b in zip(path, path[1:])]
+        )
+        cost = sum(zone.get_movement_cost() for zone in path[1:])
+        estimates.append((cost, index, max(1, throughput)))
+    heap = [(cost, cost, index) for cost, index, _ in estimates]
+    heapq.heapify(heap)
+    assigned = []
+    for _ in range(count):
+        finish, cost, index = heapq.heappop(heap)
+        assigned.append(index)
+        throughput = estimates[index][2]
+        heapq.heappush(heap, (finish + 1 / throughput, cost, index))
+    return assigned
@@ -0,0 +1,252 @@
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from src.models.compiled_graph import CompiledGraph
+from src.models.graph import Graph
+from src.models.zone import Zone, ZoneType
+from .flow import FlowPlan
+
+
+RESTRICTED = ZoneType.RESTRICTED.value
+INF = float("inf")
+
+# Un plan est la liste des états (instant, id de zone) d'un drone, en
+# commençant par (0, start). L'instant t sépare le tour t du tour t + 1 ;
+# un mouvement du tour t + 1 va de l'état en t à l'état en t + 1 (t + 2
+# pour entrer dans une zone restreinte, le drone restant sur le lien).
+# Les attentes peuvent rester implicites : (0, start), (5, a) signifie que
+# le drone reste dans start jusqu'à l'instant 4.
+Plan = List[Tuple[int, int]]
+State = Tuple[int, int]
+
+
+class ReservationTable:
+    """
+    Réservations espace-temps par (zone, instant) et (lien, tour).
+    Départ et arrivée ne sont jamais limités : tous les drones partent du
+    premier et finissent dans le second.
+    """
+
+    def __init__(
+        self, compiled: CompiledGraph, start: int, goal: int
+    ) -> None:
+        self.compiled = compiled
+        self.start = start
+        self.goal = goal
+        self.zones: Dict[Tuple[int, int], int] = defaultdict(int)
+        self.links: Dict[Tuple[int, int], int] = defaultdict(int)
+        self.latest = 0
+
+    def zone_free(self, zone: int, time: int) -> bool:
+        """True si un drone de plus peut être dans zone à time."""
+        if zone == self.start or zone == self.goal:
+            return True
+        return self.zones.get((zone, time), 0) < self.compiled.capacity[zone]
+
+    def link_free(self, link: int, turn: int) -> bool:
+        """True si un drone de plus peut emprunter link pendant turn."""
+        used = self.links.get((link, turn), 0)
+        return used < self.compiled.link_capacity[link]
+
+    def reserve_zone(self, zone: int, time: int) -> None:
+        """Réserve une place de zone à time."""
+        self.zones[(zone, time)] += 1
+        self.latest = max(self.latest, time)
+
+    def reserve_link(self, link: int, turn: int) -> None:
+        """Réserve une place de link pendant turn."""
+        self.links[(link, turn)] += 1
+
+
+class Schedule:
+    """Résultat de Scheduler.plan : un plan par id de drone."""
+
+    def __init__(
+        self, compiled: CompiledGraph, plans: Dict[int, Plan]
+    ) -> None:
+        self.compiled = compiled
+        self.plans = plans
+
+    @property
+    def turns(self) -> int:
+        """Nombre de tours avant l'arrivée du dernier drone."""
+        return max((plan[-1][0] for plan in self.plans.values()), default=0)
+
+    def path(self, drone_id: int) -> List[str]:
+        """Noms des zones visitées par un drone, sans les attentes."""
+        names: List[str] = []
+        for _, zone in self.plans[drone_id]:
+            name = self.compiled.names[zone]
+            if not names or names[-1] != name:
+                names.append(name)
+        return names
+
+    def turn_moves(self) -> List[List[Tuple[int, str]]]:
+        """
+        Déplacements de chaque tour, par drone_id croissant, au format de
+        TurnManager.run_turn : (drone_id, zone), ou (drone_id, "de-vers")
+        pendant le premier des deux tours d'entrée dans une zone
+        restreinte.
+        """
+        names, zone_type = self.compiled.names, self.compiled.zone_type
+        turns: List[List[Tuple[int, str]]] = [[] for _ in range(self.turns)]
+        for drone_id in sorted(self.plans):
+            plan = self.plans[drone_id]
+            for (_, here), (time, there) in zip(plan, plan[1:]):
+                if here == there:
+                    continue
+                if zone_type[there] == RESTRICTED:
+                    turns[time - 2].append(
+                        (drone_id, f"{names[here]}-{names[there]}")
+                    )
+                turns[time - 1].append((drone_id, names[there]))
+        return turns
+
+    def moves_by_turn(self) -> List[List[str]]:
+        """Lignes de mouvement de chaque tour (D<id>-<zone>)."""
+        return [
+            [f"D{drone_id}-{zone}" for drone_id, zone in turn]
+            for turn in self.turn_moves()
+        ]
+
+
+class Scheduler:
+    """
+    Planifie tous les drones à l'avance par A* coopératif espace-temps.
+
+    Chaque drone cherche son arrivée au plus tôt compte tenu des
+    réservations des précédents, puis réserve ses zones et liens.
+    Capacités de zones et de liens et transit de deux tours vers les
+    zones restreintes sont respectés : rejouer le plan ne lève jamais
+    de CapacityError.
+    """
+
+    def __init__(self, graph: Graph, start: Zone, goal: Zone) -> None:
+        self.compiled = graph.freeze()
+        self.start = self.compiled.id_of(start.name)
+        self.goal = self.compiled.id_of(goal.name)
+        self.dist = self._distances_to_goal()
+
+    def plan(self, nb_drones: int) -> Schedule:
+        """
+        Planifie nb_drones drones (ids 1..nb_drones) du départ au but.
+        Lève ValueError si le but est inaccessible.
+        """
+        if self.dist[self.start] == INF:
+            raise ValueError("Goal unreachable from start")
+        table = ReservationTable(self.compiled, self.start, self.goal)
+        plans: Dict[int, Plan] = {}
+        for drone_id in range(1, nb_drones + 1):
+            plan = self._plan_one(table)
+            self._reserve(table, plan)
+            plans[drone_id] = plan
+        return Schedule(self.compiled, plans)
+
+    def plan_from_flow(self, flow_plan: FlowPlan) -> Schedule:
+        """
+        Schedule en O(drones) à partir des couloirs de flow.plan_flow.
+        Aucune recherche : les départs suivent FlowPlan.assign, dont les
+        capacités garantissent l'absence de collision.
+        """
+        move_cost = self.compiled.move_cost
+        plans: Dict[int, Plan] = {}
+        for drone_id, (index, departure) in enumerate(flow_plan.assign(), 1):
+            zones = flow_plan.paths[index].zones
+            plan: Plan = [(0, zones[0])]
+            time = departure
+            for zone in zones[1:]:
+                time += move_cost[zone]
+                plan.append((time, zone))
+            plans[drone_id] = plan
+        return Schedule(self.compiled, plans)
+
+    def _distances_to_goal(self) -> List[float]:
+        """Dijkstra inverse : nombre minimal de tours de chaque zone au but."""
+        compiled = self.compiled
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        dist = [INF] * compiled.num_zones
+        dist[self.goal] = 0
+        pq = [(0, self.goal)]
+        while pq:
+            d, v = heapq.heappop(pq)
+            if d > dist[v]:
+                continue
+            # Entrer dans v coûte move_cost[v] tours, quel que soit le côté.
+            step = d + compiled.move_cost[v]
+            for slot in range(offsets[v], offsets[v + 1]):
+                u = neighbours[slot]
+                if compiled.is_accessible(u) and step < dist[u]:
+                    dist[u] = step
+                    heapq.heappush(pq, (step, u))
+        return dist
+
+    def _plan_one(self, table: ReservationTable) -> Plan:
+        """A* espace-temps d'un drone face aux réservations courantes."""
+        compiled, dist, goal = self.compiled, self.dist, self.goal
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        edge_link, zone_type = compiled.edge_link, compiled.zone_type
+        horizon = table.latest + int(dist[self.start]) + 2 * compiled.num_zones
+
+        start = (self.start, 0)
+        parent: Dict[State, Optional[State]] = {start: None}
+        counter = 0
+        # (f, -t, counter, zone, t) : à égalité, l'état le plus avancé dans
+        # le temps, donc le plus proche du but, passe d'abord.
+        pq = [(dist[self.start], 0, counter, self.start, 0)]
+        while pq:
+            _, _, _, zone, time = heapq.heappop(pq)
+            if zone == goal:
+                plan: Plan = []
+                state: Optional[Tuple[int, int]] = (zone, time)
+                while state is not None:
+                    plan.append((state[1], state[0]))
+                    state = parent[state]
+                plan.reverse()
+                return plan
+            if time >= horizon:
+                continue
+
+            successors: List[Tuple[int, int]] = []
+            if table.zone_free(zone, time + 1):
+                successors.append((zone, time + 1))
+            for slot in range(offsets[zone], offsets[zone + 1]):
+                v = neighbours[slot]
+                link = edge_link[slot]
+                if dist[v] == INF or not table.link_free(link, time):
+                    continue
+                if zone_type[v] == RESTRICTED:
+                    if (table.link_free(link, time + 1)
+                            and table.zone_free(v, time + 2)):
+                        successors.append((v, time + 2))
+                elif table.zone_free(v, time + 1):
+                    successors.append((v, time + 1))
+
+            for state in successors:
+                if state in parent:
+                    continue
+                parent[state] = (zone, time)
+                counter += 1
+                v, t = state
+                heapq.heappush(pq, (t + dist[v], -t, counter, v, t))
+
+        raise ValueError("No schedule found within the planning horizon")
+
+    def _reserve(self, table: ReservationTable, plan: Plan) -> None:
+        """Réserve les zones et liens utilisés par un plan."""
+        for (time, here), (arrival, there) in zip(plan, plan[1:]):
+            table.reserve_zone(there, arrival)
+            if here == there:
+                continue
+            link = self._link_between(here, there)
+            for turn in range(time, arrival):
+                table.reserve_link(link, turn)
+
+    def _link_between(self, u: int, v: int) -> int:
+        """Id du lien u-v."""
+        compiled = self.compiled
+        for slot in range(compiled.offsets[u], compiled.offsets[u + 1]):
+            if compiled.neighbours[slot] == v:
+                return compiled.edge_link[slot]
+        raise KeyError(
+            f"No link between {compiled.names[u]} and {compiled.names[v]}"
+        )
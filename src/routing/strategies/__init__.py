@@ -0,0 +1,38 @@
+from typing import Any, Dict, Type
+from src.models.graph import Graph
+from .bfs import BFS
+from .dijkstra import Dijkstra
+from .astar import AStar
+from .dstar_lite import DStarLite
+from .hpa import HPAStar
+
+
+STRATEGIES: Dict[str, Type[Any]] = {
+    "bfs": BFS,
+    "dijkstra": Dijkstra,
+    "astar": AStar,
+    "dstar": DStarLite,
+    "hpa": HPAStar,
+}
+
+
+def get_strategy(name: str, graph: Graph) -> Any:
+    """
+    Build a routing strategy by name.
+
+    Args:
+        name: One of the keys of STRATEGIES.
+        graph: The zone/connection graph.
+
+    Returns:
+        A strategy instance exposing ``find_route(start, goal)``.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name not in STRATEGIES:
+        raise ValueError(
+            f"Unknown routing strategy '{name}' "
+            f"(expected one of {', '.join(STRATEGIES)})"
+        )
+    return STRATEGIES[name](graph)
@@ -13,6 +13,7 @@ class BFS:
     def __init__(self, graph: Graph):
         self.graph = graph
         self.prev: Dict[Zone, Optional[Zone]] = {}
+        self.nodes_expanded = 0
 
     def find_route(self, start: Zone, goal: Zone) -> Optional[List[Zone]]:
         """
@@ -25,9 +26,14 @@ class BFS:
         queue.append(start)
         visited.add(start)
         self.prev = {start: None}
+        self.nodes_expanded = 0
+        # Liens saturés ce tour : fermés jusqu'au tour suivant, donc
+        # seulement pour le premier pas.
+        check_links = self.graph.saturated_links > 0
 
         while queue:
             current = queue.popleft()
+            self.nodes_expanded += 1
 
             if current == goal:
                 # Reconstituer le chemin
@@ -42,12 +48,55 @@ class BFS:
             for neighbor_name in self.graph.connections[current.name]:
                 neighbor = self.graph.get_zone(neighbor_name)
                 if neighbor and neighbor not in visited and self.can_visit(neighbor):
+                    if (check_links and current is start
+                            and not self.graph.link_available(
+                                current.name, neighbor_name)):
+                        continue
                     visited.add(neighbor)
                     queue.append(neighbor)
                     self.prev[neighbor] = current
 
         return None
 
+    def find_route_ids(self, start: int, goal: int) -> Optional[List[int]]:
+        """
+        Variante entière de find_route sur le graphe compilé (Graph.freeze).
+        Ne touche aucun objet Zone : capacité et type sont lus dans les
+        tableaux du CompiledGraph. Retourne une liste d'ids ou None.
+        """
+        compiled = self.graph.freeze()
+        offsets = compiled.offsets
+        neighbours = compiled.neighbours
+        can_move = compiled.can_move
+        edge_link = compiled.edge_link
+        link_open = self.graph.link_filter()
+        prev: Dict[int, int] = {start: -1}
+        queue = deque([start])
+        self.nodes_expanded = 0
+
+        while queue:
+            current = queue.popleft()
+            self.nodes_expanded += 1
+            if current == goal:
+                route = []
+                node = goal
+                while node != -1:
+                    route.append(node)
+                    node = prev[node]
+                route.reverse()
+                return route
+
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbours[slot]
+                if neighbor not in prev and can_move(neighbor) and (
+                    link_open is None or current != start
+                    or link_open(edge_link[slot])
+                ):
+                    prev[neighbor] = current
+                    queue.append(neighbor)
+
+        return None
+
     def can_visit(self, zone: Zone) -> bool:
         """
         Vérifie si une zone peut être visitée par BFS pour un drone
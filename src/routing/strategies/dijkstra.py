@@ -0,0 +1,138 @@
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple
+from src.models.compiled_graph import CompiledGraph
+from src.models.graph import Graph
+from src.models.zone import Zone
+from src.routing.cost_model import cost_model
+
+
+Heuristic = Callable[[int], float]
+Passable = Callable[[int], bool]
+LinkOpen = Callable[[int], bool]
+
+
+class Dijkstra:
+    """
+    Plus court chemin pondéré par le coût d'entrée des zones (CostModel :
+    une zone restreinte coûte 2 tours ; à durée égale, le chemin qui
+    passe par le plus de zones prioritaires).
+
+    Même interface que BFS.find_route ; la recherche tourne sur le graphe
+    compilé et s'arrête dès que l'objectif est fixé. nodes_expanded
+    compte les zones fixées par le dernier appel.
+    """
+
+    def __init__(self, graph: Graph) -> None:
+        self.graph = graph
+        self.nodes_expanded = 0
+        self._compiled: Optional[CompiledGraph] = None
+        self._zones: List[Zone] = []
+
+    def find_route(self, start: Zone, goal: Zone) -> Optional[List[Zone]]:
+        """
+        Chemin le moins coûteux de start à goal, ou None.
+        Comme BFS.can_visit, lit l'état courant des zones : bloquées et
+        pleines sont des obstacles.
+        """
+        compiled = self._sync()
+        zones = self._zones
+
+        def passable(v: int) -> bool:
+            zone = zones[v]
+            return zone.is_accessible() and zone.has_capacity()
+
+        ids = self.search(
+            compiled, compiled.id_of(start.name), compiled.id_of(goal.name),
+            passable, self.graph.link_filter(),
+        )
+        if ids is None:
+            return None
+        return [zones[i] for i in ids]
+
+    def find_route_ids(self, start: int, goal: int) -> Optional[List[int]]:
+        """Variante entière de find_route sur les tableaux compilés."""
+        compiled = self._sync()
+        return self.search(
+            compiled, start, goal, compiled.can_move,
+            self.graph.link_filter(),
+        )
+
+    def heuristic(
+        self, compiled: CompiledGraph, goal: int
+    ) -> Optional[Heuristic]:
+        """Heuristique A* vers goal (None pour Dijkstra)."""
+        return None
+
+    def search(
+        self,
+        compiled: CompiledGraph,
+        start: int,
+        goal: int,
+        passable: Passable,
+        link_open: Optional[LinkOpen] = None,
+    ) -> Optional[List[int]]:
+        """
+        Recherche best-first commune à Dijkstra et A*.
+        passable dit si une zone peut être traversée, link_open (si donné)
+        si un lien sortant de start peut l'être ce tour (les liens plus
+        loin seront libérés d'ici là) ; retourne la liste d'ids de start
+        à goal, ou None.
+        """
+        h = self.heuristic(compiled, goal)
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        edge_link = compiled.edge_link
+        weight = cost_model(compiled).edge_weight
+        dist: Dict[int, float] = {start: 0}
+        prev: Dict[int, int] = {start: -1}
+        closed = set()
+        counter = 0
+        # (f, h, counter, zone) : à f égal, on développe d'abord la zone la
+        # plus proche du but, pour ne pas explorer tout un plateau de plus
+        # courts chemins équivalents sur les grilles.
+        h0 = h(start) if h else 0
+        pq: List[Tuple[float, float, int, int]] = [(h0, h0, 0, start)]
+        self.nodes_expanded = 0
+
+        while pq:
+            _, _, _, current = heapq.heappop(pq)
+            if current in closed:
+                continue
+            closed.add(current)
+            self.nodes_expanded += 1
+            if current == goal:
+                route = []
+                node = goal
+                while node != -1:
+                    route.append(node)
+                    node = prev[node]
+                route.reverse()
+                return route
+
+            base = dist[current]
+            for slot in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbours[slot]
+                step = weight[slot]
+                if step < 0 or neighbor in closed or not passable(neighbor):
+                    continue
+                if (link_open is not None and current == start
+                        and not link_open(edge_link[slot])):
+                    continue
+                new_dist = base + step
+                if new_dist < dist.get(neighbor, float("inf")):
+                    dist[neighbor] = new_dist
+                    prev[neighbor] = current
+                    counter += 1
+                    estimate = h(neighbor) if h else 0
+                    heapq.heappush(
+                        pq, (new_dist + estimate, estimate, counter, neighbor)
+                    )
+
+        return None
+
+    def _sync(self) -> CompiledGraph:
+        """Vue compilée, avec la table des zones rafraîchie si besoin."""
+        compiled = self.graph.freeze()
+        if compiled is not self._compiled:
+            self._compiled = compiled
+            self._zones = list(self.graph.zones.values())
+        return compiled
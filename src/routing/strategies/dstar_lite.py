@@ -0,0 +1,206 @@
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+from src.models.compiled_graph import BLOCKED, CompiledGraph
+from src.models.graph import Graph
+from src.models.zone import Zone
+from src.routing.cost_model import cost_model
+from .dijkstra import LinkOpen
+
+
+INF = float("inf")
+
+
+class GoalSearch:
+    """
+    Recherche incrémentale (LPA*) à rebours depuis un but, partagée par
+    tous les drones qui le visent.
+
+    g[u] est le coût connu de u au but, rhs[u] celui que donnent ses
+    voisins (min de g[v] + poids d'entrée de v, v franchissable) ; u est
+    cohérent si les deux sont égaux. Sans heuristique, la clé d'une zone
+    ne dépend pas du départ : chaque requête poursuit la même recherche
+    jusqu'à ce que son départ soit fixé, comme D* Lite avec h = 0.
+
+    Une zone qui se remplit, se libère ou change de type est notée dans
+    dirty ; la requête suivante ne recalcule que ses voisins, et seules
+    les zones dont le coût change repassent dans la file.
+    """
+
+    def __init__(self, compiled: CompiledGraph, goal: int) -> None:
+        n = compiled.num_zones
+        self.compiled = compiled
+        self.cost = cost_model(compiled).weight
+        self.goal = goal
+        self.g: List[float] = [INF] * n
+        self.rhs: List[float] = [INF] * n
+        self.rhs[goal] = 0
+        self.heap: List[Tuple[float, int]] = [(0, goal)]
+        self.dirty: Set[int] = set()
+        self.expanded = 0
+
+    def route(self, start: int,
+              link_open: Optional[LinkOpen] = None) -> Optional[List[int]]:
+        """
+        Chemin le moins coûteux de start au but, ou None. link_open (si
+        donné) filtre les liens sortant de start, comme Dijkstra.search.
+        """
+        self.expanded = 0
+        self.repair()
+        if start == self.goal:
+            return [start]
+        compiled = self.compiled
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        cost, can_move, g = self.cost, compiled.can_move, self.g
+
+        self.settle(start)
+        best, node = INF, -1
+        for slot in range(offsets[start], offsets[start + 1]):
+            v = neighbours[slot]
+            if not can_move(v):
+                continue
+            if link_open is not None:
+                if not link_open(compiled.edge_link[slot]):
+                    continue
+                # premier pas détourné : g[v] doit être exact lui aussi
+                self.settle(v)
+            if g[v] + cost[v] < best:
+                best, node = g[v] + cost[v], v
+        if node < 0:
+            return None
+
+        # g décroît strictement le long du chemin : la marche s'arrête.
+        route = [start, node]
+        while node != self.goal:
+            best, step = INF, -1
+            for slot in range(offsets[node], offsets[node + 1]):
+                v = neighbours[slot]
+                if g[v] + cost[v] < best and can_move(v):
+                    best, step = g[v] + cost[v], v
+            node = step
+            route.append(node)
+        return route
+
+    def repair(self) -> None:
+        """Recalcule rhs autour des zones modifiées depuis la requête."""
+        if not self.dirty:
+            return
+        offsets, neighbours = self.compiled.offsets, self.compiled.neighbours
+        touched = set(self.dirty)
+        for v in self.dirty:
+            touched.update(neighbours[offsets[v]:offsets[v + 1]])
+        self.dirty.clear()
+        for u in touched:
+            self._update(u)
+
+    def settle(self, start: int) -> None:
+        """Développe la file jusqu'à ce que g[start] soit exact."""
+        compiled = self.compiled
+        offsets, neighbours = compiled.offsets, compiled.neighbours
+        cost, can_move = self.cost, compiled.can_move
+        heap, g, rhs, goal = self.heap, self.g, self.rhs, self.goal
+        while heap:
+            key, u = heap[0]
+            if g[start] == rhs[start] and key >= g[start]:
+                return
+            heapq.heappop(heap)
+            if g[u] == rhs[u] or key != min(g[u], rhs[u]):
+                continue  # entrée périmée
+            self.expanded += 1
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+                if not can_move(u):
+                    continue
+                step = g[u] + cost[u]
+                for slot in range(offsets[u], offsets[u + 1]):
+                    p = neighbours[slot]
+                    if step < rhs[p] and p != goal:
+                        rhs[p] = step
+                        heapq.heappush(heap, (min(g[p], step), p))
+            else:
+                # u s'est allongé : seuls les voisins qui passaient par
+                # lui sont à recalculer
+                step = g[u] + cost[u]
+                g[u] = INF
+                self._update(u)
+                if not can_move(u):
+                    continue
+                for slot in range(offsets[u], offsets[u + 1]):
+                    p = neighbours[slot]
+                    if rhs[p] == step:
+                        self._update(p)
+
+    def _update(self, u: int) -> None:
+        """Recalcule rhs[u] et remet u dans la file s'il est incohérent."""
+        if u != self.goal:
+            compiled = self.compiled
+            offsets, neighbours = compiled.offsets, compiled.neighbours
+            cost, can_move, g = self.cost, compiled.can_move, self.g
+            best = INF
+            if compiled.zone_type[u] != BLOCKED:
+                for slot in range(offsets[u], offsets[u + 1]):
+                    v = neighbours[slot]
+                    if g[v] + cost[v] < best and can_move(v):
+                        best = g[v] + cost[v]
+            self.rhs[u] = best
+        if self.g[u] != self.rhs[u]:
+            heapq.heappush(self.heap, (min(self.g[u], self.rhs[u]), u))
+
+
+class DStarLite:
+    """
+    Replanification incrémentale, même interface que Dijkstra (mêmes
+    coûts d'entrée, zones bloquées et pleines évitées, liens saturés
+    fermés au premier pas).
+
+    Une GoalSearch par but, abonnée au graphe : un changement de zone ne
+    répare que la partie de l'arbre qui en dépend, au lieu de relancer
+    toute la recherche. nodes_expanded compte les zones développées par
+    le dernier appel : zéro si la réparation suffit.
+    """
+
+    def __init__(self, graph: Graph) -> None:
+        self.graph = graph
+        self.nodes_expanded = 0
+        self._compiled: Optional[CompiledGraph] = None
+        self._zones: List[Zone] = []
+        self._searches: Dict[int, GoalSearch] = {}
+        graph.subscribe(self._zone_changed)
+
+    def find_route(self, start: Zone, goal: Zone) -> Optional[List[Zone]]:
+        """Chemin le moins coûteux de start à goal, ou None."""
+        compiled = self._sync()
+        ids = self.find_route_ids(
+            compiled.id_of(start.name), compiled.id_of(goal.name)
+        )
+        if ids is None:
+            return None
+        return [self._zones[i] for i in ids]
+
+    def find_route_ids(self, start: int, goal: int) -> Optional[List[int]]:
+        """Variante entière de find_route sur les tableaux compilés."""
+        compiled = self._sync()
+        search = self._searches.get(goal)
+        if search is None:
+            search = self._searches[goal] = GoalSearch(compiled, goal)
+        route = search.route(start, self.graph.link_filter())
+        self.nodes_expanded = search.expanded
+        return route
+
+    def _sync(self) -> CompiledGraph:
+        """Vue compilée ; une topologie nouvelle repart de zéro."""
+        compiled = self.graph.freeze()
+        if compiled is not self._compiled:
+            self._compiled = compiled
+            self._zones = list(self.graph.zones.values())
+            self._searches = {}
+        return compiled
+
+    def _zone_changed(self, zone: Zone) -> None:
+        """Abonné du graphe : note la zone pour chaque recherche."""
+        if not self._searches:
+            return
+        zone_id = self._compiled.index.get(zone.name)  # type: ignore
+        if zone_id is None:
+            return
+        for search in self._searches.values():
+            search.dirty.add(zone_id)
@@ -0,0 +1,64 @@
+import math
+from typing import Callable, Dict
+from src.models.compiled_graph import CompiledGraph
+from src.routing.cost_model import cost_model
+
+
+def manhattan(dx: int, dy: int) -> float:
+    """Distance L1 d'un écart de coordonnées."""
+    return abs(dx) + abs(dy)
+
+
+def euclidean(dx: int, dy: int) -> float:
+    """Distance L2 d'un écart de coordonnées."""
+    return math.hypot(dx, dy)
+
+
+METRICS: Dict[str, Callable[[int, int], float]] = {
+    "manhattan": manhattan,
+    "euclidean": euclidean,
+}
+
+
+def admissible_scale(
+    compiled: CompiledGraph, metric: Callable[[int, int], float]
+) -> float:
+    """
+    Plus grand facteur k tel que k * metric(u, v) ne dépasse jamais le
+    poids d'entrée dans v depuis u (CostModel), sur tous les liens.
+
+    Les coordonnées des cartes sont libres : une distance brute ne minore
+    pas le coût. Mise à l'échelle par k, elle le minore (inégalité
+    triangulaire). Retourne 0.0 si aucun lien n'a de longueur.
+    """
+    x, y, cost = compiled.x, compiled.y, cost_model(compiled).weight
+    offsets, neighbours = compiled.offsets, compiled.neighbours
+    scale = math.inf
+    for u in range(compiled.num_zones):
+        for slot in range(offsets[u], offsets[u + 1]):
+            v = neighbours[slot]
+            length = metric(x[v] - x[u], y[v] - y[u])
+            if length > 0 and cost[v] > 0:
+                scale = min(scale, cost[v] / length)
+    return 0.0 if scale == math.inf else scale
+
+
+class CoordinateHeuristic:
+    """Heuristique A* admissible sur Zone.x / Zone.y vers un but."""
+
+    def __init__(
+        self, compiled: CompiledGraph, goal: int, scale: float,
+        metric: Callable[[int, int], float] = manhattan,
+    ) -> None:
+        self.x = compiled.x
+        self.y = compiled.y
+        self.gx = compiled.x[goal]
+        self.gy = compiled.y[goal]
+        self.scale = scale
+        self.metric = metric
+
+    def __call__(self, zone_id: int) -> float:
+        """Coût restant estimé de zone_id au but."""
+        return self.scale * self.metric(
+            self.gx - self.x[zone_id], self.gy - self.y[zone_id]
+        )
@@ -0,0 +1,73 @@
+from typing import List, Optional
+from src.models.compiled_graph import CompiledGraph
+from src.models.graph import Graph
+from src.models.zone import Zone
+from src.routing.hierarchy import DEFAULT_TILE, ZoneHierarchy
+from .heuristics import CoordinateHeuristic, admissible_scale, manhattan
+
+
+class HPAStar:
+    """
+    Routage hiérarchique (HPA*) pour les très grandes cartes, même
+    interface et mêmes routes que Dijkstra.
+
+    Une ZoneHierarchy par vue compilée, abonnée au graphe : une zone qui
+    change ne fait recalculer que sa tuile. Une requête ne cherche en
+    détail que dans les tuiles du départ et du but, puis sur les seules
+    zones frontières. nodes_expanded compte les zones développées par le
+    dernier appel (recherches locales et abstraite).
+    """
+
+    def __init__(self, graph: Graph, tile: int = DEFAULT_TILE) -> None:
+        self.graph = graph
+        self.tile = tile
+        self.nodes_expanded = 0
+        self.hierarchy: Optional[ZoneHierarchy] = None
+        self._zones: List[Zone] = []
+        # échelle A* et type_version pour lequel elle a été calculée
+        self._scale = 0.0
+        self._scaled_for = -1
+        graph.subscribe(self._zone_changed)
+
+    def find_route(self, start: Zone, goal: Zone) -> Optional[List[Zone]]:
+        """Chemin le moins coûteux de start à goal, ou None."""
+        compiled = self._sync()
+        ids = self.find_route_ids(
+            compiled.id_of(start.name), compiled.id_of(goal.name)
+        )
+        if ids is None:
+            return None
+        return [self._zones[i] for i in ids]
+
+    def find_route_ids(self, start: int, goal: int) -> Optional[List[int]]:
+        """Variante entière de find_route sur les tableaux compilés."""
+        compiled = self._sync()
+        if self._scaled_for != self.graph.type_version:
+            # les poids, donc l'échelle admissible, suivent les types
+            self._scaled_for = self.graph.type_version
+            self._scale = admissible_scale(compiled, manhattan)
+        hierarchy = self.hierarchy
+        route = hierarchy.route(  # type: ignore[union-attr]
+            start, goal, CoordinateHeuristic(compiled, goal, self._scale),
+            self.graph.link_filter(),
+        )
+        self.nodes_expanded = hierarchy.expanded  # type: ignore
+        return route
+
+    def _sync(self) -> CompiledGraph:
+        """Vue compilée ; une topologie nouvelle redécoupe les tuiles."""
+        compiled = self.graph.freeze()
+        if self.hierarchy is None or self.hierarchy.compiled is not compiled:
+            self.hierarchy = ZoneHierarchy(compiled, self.tile)
+            self._scaled_for = -1
+            self._zones = list(self.graph.zones.values())
+        return compiled
+
+    def _zone_changed(self, zone: Zone) -> None:
+        """Abonné du graphe : marque la tuile de la zone."""
+        hierarchy = self.hierarchy
+        if hierarchy is None:
+            return
+        zone_id = hierarchy.compiled.index.get(zone.name)
+        if zone_id is not None:
+            hierarchy.zone_changed(zone_id)
@@ -0,0 +1,341 @@
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import signal
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, List, Optional, Set
+from src.models.drone import Drone, DroneState
+from src.parser.parser import parse_file
+from src.parser.validator import Validator
+from src.routing.scheduler import Scheduler
+from src.simulation.simulator import Simulator
+from src.simulation.turn_manager import TurnManager
+from src.visualization.logger import CHROME, JSONL, metrics
+
+
+# Colonnes des résultats, dans l'ordre du CSV.
+FIELDS = [
+    "map", "status", "drones", "arrived", "turns", "moves",
+    "parse_time", "validate_time", "simulate_time", "wall_time",
+    "peak_memory_kb", "error",
+]
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_TURNS = 10000
+# Chemins entre lesquels les drones sont répartis au départ (0 : aucun).
+DEFAULT_SPREAD = 3
+# Affectation des routes au départ : couloirs du flot de coût minimal
+# (TurnManager.flow_routes) ou spread plus courts chemins (spread_routes).
+FLOW = "flow"
+SPREAD = "spread"
+# Stratégie hors ligne : toute la flotte planifiée d'avance par le
+# Scheduler (A* coopératif espace-temps) au lieu de TurnManager.
+SCHEDULE = "schedule"
+
+
+class MapTimeout(Exception):
+    """Levée dans le processus de travail quand une carte dépasse son temps."""
+
+
+def find_maps(patterns: Iterable[str]) -> List[str]:
+    """
+    Cartes désignées par des dossiers (tous leurs .txt) ou des motifs
+    glob, triées et sans doublon.
+    """
+    found: Set[str] = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.txt")
+        found.update(p for p in glob.glob(pattern) if os.path.isfile(p))
+    return sorted(found)
+
+
+def run_map(
+    filename: str,
+    strategy: str = "dstar",
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    log: Optional[str] = None,
+    spread: int = DEFAULT_SPREAD,
+    routes: str = FLOW,
+) -> Dict[str, Any]:
+    """
+    Lexe, analyse, valide puis simule filename jusqu'à l'arrivée de tous
+    les drones. Ne lève jamais : un échec devient status et error.
+    Si log est donné, les métriques de la carte y sont écrites (voir
+    src.visualization.logger). Les drones partent sur les couloirs d'un
+    flot de coût minimal (routes FLOW), ou répartis sur les spread plus
+    courts chemins (routes SPREAD) ; strategy SCHEDULE remplace la
+    simulation par le plan du Scheduler.
+
+    status vaut "ok", "invalid" (refusée par le Validator), "stuck" (plus
+    aucun mouvement possible, ou max_turns atteint), "timeout" ou "error".
+    peak_memory_kb est le pic RSS du processus : exact quand chaque carte
+    a son processus, comme dans run_batch.
+    """
+    result: Dict[str, Any] = dict.fromkeys(FIELDS)
+    result.update(map=filename, error="")
+    # délai de SIGALRM ; None : pas de limite, ou pas de SIGALRM ici
+    alarm = timeout if hasattr(signal, "SIGALRM") else None
+    if alarm is not None:
+        signal.signal(signal.SIGALRM, _on_alarm)
+    if log:
+        metrics.enable(log)
+    started = time.perf_counter()
+    try:
+        try:
+            if alarm is not None:
+                signal.setitimer(signal.ITIMER_REAL, alarm)
+            _simulate(filename, strategy, max_turns, spread, routes,
+                      result)
+        finally:
+            if alarm is not None:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            if log:
+                metrics.disable()
+    except MapTimeout:
+        result.update(status="timeout", error=f"exceeded {timeout}s")
+    except Exception as exc:
+        result.update(status="error", error=f"{type(exc).__name__}: {exc}")
+    result["wall_time"] = round(time.perf_counter() - started, 6)
+    result["peak_memory_kb"] = _peak_rss_kb()
+    return result
+
+
+def _on_alarm(signum: int, frame: Any) -> None:
+    raise MapTimeout()
+
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sur macOS, en kilo-octets ailleurs
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _simulate(filename: str, strategy: str, max_turns: int, spread: int,
+              routes: str, result: Dict[str, Any]) -> None:
+    """Les étapes de run_map ; remplit result au fur et à mesure."""
+    clock = time.perf_counter()
+    config = parse_file(filename)
+    now = time.perf_counter()
+    result["parse_time"] = round(now - clock, 6)
+    clock = now
+
+    report = Validator(config).validate()
+    now = time.perf_counter()
+    result["validate_time"] = round(now - clock, 6)
+    clock = now
+    result["drones"] = config.nb_drones
+    if not report.ok:
+        result.update(
+            status="invalid",
+            error="; ".join(i.message for i in report.errors),
+        )
+        return
+
+    if strategy == SCHEDULE:
+        schedule = Scheduler(
+            config.graph, config.start_zone, config.goal_zone
+        ).plan(config.nb_drones)
+        lines = schedule.turn_moves()[:max_turns]
+        result.update(
+            simulate_time=round(time.perf_counter() - clock, 6),
+            status="ok" if schedule.turns <= max_turns else "stuck",
+            turns=len(lines), moves=sum(len(line) for line in lines),
+            arrived=sum(
+                plan[-1][0] <= max_turns for plan in schedule.plans.values()
+            ),
+        )
+        return
+
+    drones = [
+        Drone(i, path=[config.start_zone], goal=config.goal_zone)
+        for i in range(1, config.nb_drones + 1)
+    ]
+    manager = TurnManager(
+        drones, Simulator(config.graph, drones), strategy=strategy
+    )
+    if routes == FLOW:
+        manager.flow_routes()
+    elif spread:
+        manager.spread_routes(spread)
+    turns = moves = 0
+    status = "ok"
+    while not all(d.is_at_destination(d.goal) for d in drones):
+        if turns >= max_turns:
+            status = "stuck"
+            break
+        # un déplacement par drone et par tour au plus (départ sur le
+        # lien d'une zone restreinte compris) : les lignes de sortie
+        moved = len(manager.run_turn())
+        turns += 1
+        moves += moved
+        # Aucun mouvement ni transit en cours : le tour suivant serait
+        # identique, la simulation est bloquée.
+        if not moved and not any(
+            d.state == DroneState.IN_TRANSIT for d in drones
+        ):
+            status = "stuck"
+            break
+    result["simulate_time"] = round(time.perf_counter() - clock, 6)
+    result.update(
+        status=status, turns=turns, moves=moves,
+        arrived=sum(d.is_at_destination(d.goal) for d in drones),
+    )
+
+
+def run_batch(
+    maps: List[str],
+    jobs: Optional[int] = None,
+    strategy: str = "dstar",
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    log_dir: Optional[str] = None,
+    log_format: str = JSONL,
+    spread: int = DEFAULT_SPREAD,
+    routes: str = FLOW,
+) -> List[Dict[str, Any]]:
+    """
+    Lance run_map sur chaque carte dans un ProcessPoolExecutor, un
+    processus neuf par carte (pic mémoire propre à la carte, pas d'état
+    partagé). Si un processus meurt, le pool casse : les cartes perdues
+    sont rejouées chacune seule, et seule la fautive est en échec.
+    Avec log_dir, chaque carte y écrit ses métriques au format
+    log_format. Résultats dans l'ordre de maps.
+    """
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    args = {
+        name: (strategy, timeout, max_turns,
+               _log_path(log_dir, log_format, name), spread, routes)
+        for name in maps
+    }
+    results: Dict[str, Dict[str, Any]] = {}
+    crashed = []
+    with _pool(jobs) as pool:
+        futures: Dict[str, Future] = {
+            name: pool.submit(run_map, name, *args[name]) for name in maps
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except BrokenProcessPool:
+                crashed.append(name)
+    for name in crashed:
+        with _pool(1) as pool:
+            try:
+                results[name] = pool.submit(
+                    run_map, name, *args[name]
+                ).result()
+            except BrokenProcessPool:
+                results[name] = dict.fromkeys(FIELDS)
+                results[name].update(
+                    map=name, status="error", error="worker process died"
+                )
+    return [results[name] for name in maps]
+
+
+def _log_path(log_dir: Optional[str], log_format: str,
+              name: str) -> Optional[str]:
+    """Fichier de métriques de la carte name dans log_dir, ou None."""
+    if not log_dir:
+        return None
+    suffix = ".trace.json" if log_format == CHROME else ".jsonl"
+    stem = os.path.splitext(os.path.relpath(name))[0]
+    return os.path.join(log_dir, stem.replace(os.sep, "_") + suffix)
+
+
+def _pool(jobs: Optional[int]) -> ProcessPoolExecutor:
+    """Pool à un processus par tâche, via forkserver quand il existe."""
+    context = None
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+    return ProcessPoolExecutor(
+        max_workers=jobs, mp_context=context, max_tasks_per_child=1
+    )
+
+
+def write_csv(results: List[Dict[str, Any]], out: Any) -> None:
+    writer = csv.DictWriter(out, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(results)
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totaux du lot : cartes par status, tours, mouvements, temps."""
+    by_status: Dict[str, int] = {}
+    for r in results:
+        by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+    done = [r for r in results if r["status"] == "ok"]
+    return {
+        "maps": len(results),
+        "status": by_status,
+        "turns": sum(r["turns"] for r in done),
+        "moves": sum(r["moves"] for r in done),
+        "wall_time": round(
+            sum(r["wall_time"] or 0 for r in results), 6
+        ),
+        "peak_memory_kb": max(
+            (r["peak_memory_kb"] or 0 for r in results), default=0
+        ),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée sans interface graphique ; 1 si une carte échoue."""
+    parser = argparse.ArgumentParser(
+        description="Simulate many maps in parallel, without a GUI."
+    )
+    parser.add_argument("maps", nargs="+",
+                        help="map files, directories or glob patterns")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--strategy", default="dstar",
+                        help="routing strategy of the turn manager, or "
+                             f"'{SCHEDULE}' to plan every drone up front")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="seconds allowed per map")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    parser.add_argument("--routes", choices=(FLOW, SPREAD), default=FLOW,
+                        help="start routes: min-cost flow corridors, or "
+                             "the --spread shortest paths")
+    parser.add_argument("--spread", type=int, default=DEFAULT_SPREAD,
+                        help="shortest paths to spread drones over with "
+                             "--routes spread (0: none)")
+    parser.add_argument("--csv", help="write per-map results here")
+    parser.add_argument("--json", help="write results and totals here")
+    parser.add_argument("--log-dir",
+                        help="write per-map metrics (timers, counters) here")
+    parser.add_argument("--log-format", choices=(JSONL, CHROME),
+                        default=JSONL)
+    args = parser.parse_args(argv)
+
+    maps = find_maps(args.maps)
+    if not maps:
+        parser.error("no map matches " + " ".join(args.maps))
+    results = run_batch(
+        maps, args.jobs, args.strategy, args.timeout, args.max_turns,
+        args.log_dir, args.log_format, args.spread, args.routes,
+    )
+    summary = summarize(results)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            write_csv(results, f)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "maps": results}, f, indent=2)
+    if not args.csv and not args.json:
+        write_csv(results, sys.stdout)
+    print(json.dumps(summary), file=sys.stderr)
+    return 0 if summary["status"].get("ok", 0) == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,35 +1,191 @@
-from typing import List
+import heapq
+import time
+from bisect import bisect_right, insort
+from typing import Dict, List, Optional, Set, Tuple
 from src.models.graph import Graph
 from src.models.drone import Drone, DroneState
+from src.models.zone import Zone
+from src.visualization.logger import metrics
 
 
 class Simulator:
     """
     Moteur de simulation pour faire avancer les drones tour par tour.
+
+    Seuls les drones actifs sont visités à chaque tour :
+    - un drone arrivé sort définitivement de l'ensemble actif ;
+    - un drone dont la prochaine zone est pleine attend dans la file de
+      cette zone et n'est réveillé que quand elle libère une place ;
+    - un drone sans prochaine zone praticable reste garé jusqu'à
+      wake / wake_parked (après un recalcul de chemin par exemple) ;
+    - un drone arrêté par un lien saturé réessaie au tour suivant.
+    Le résultat est celui d'un parcours complet de la liste : un drone
+    réveillé pendant un tour est traité dans ce tour s'il vient après
+    celui qui a libéré la place, au tour suivant sinon.
     """
 
     def __init__(self, graph: Graph, drones: List[Drone]):
         self.graph = graph
         self.drones = drones
+        self._position: Dict[int, int] = {
+            d.drone_id: i for i, d in enumerate(drones)
+        }
+        self._active: Set[int] = set(range(len(drones)))
+        # Files d'attente par zone pleine (positions triées) et zone
+        # attendue par chaque drone en file.
+        self._waiting: Dict[str, List[int]] = {}
+        self._parked_on: Dict[int, str] = {}
+        self._stuck: Set[int] = set()
+        # Drone réveillé pour une zone : s'il n'y entre pas, il passe la
+        # main au suivant de la file.
+        self._woken_for: Dict[int, str] = {}
+        self._heap: Optional[List[int]] = None
+        self._cursor = -1
+        graph.subscribe(self._on_zone_change)
+
+    def tick(self) -> List[Tuple[int, str]]:
+        """
+        Fait avancer chaque drone actif d'un pas, dans l'ordre de la liste.
+        Retourne les déplacements du tour : (drone_id, zone atteinte).
+        Mesuré (phase "simulate", compteur "moves") et clôt le tour des
+        métriques quand elles sont actives.
+        """
+        if metrics.enabled:
+            started = time.perf_counter()
+            moves = self._tick()
+            metrics.add_time("simulate", time.perf_counter() - started,
+                             emit=False)
+            metrics.count("moves", len(moves))
+            metrics.end_turn()
+            return moves
+        return self._tick()
 
-    def tick(self):
-        for drone in self.drones:
+    def end_turn(self, moves: List[Tuple[int, str]]) -> None:
+        """
+        Clôt un tour dont TurnManager a fait les pas, sans déplacer aucun
+        drone : ceux posés sur leur but passent ARRIVED et sortent de
+        l'ensemble actif, les compteurs de liens repartent à zéro.
+        Compteur "moves" et fin du tour des métriques.
+        """
+        for pos in list(self._active):
+            drone = self.drones[pos]
             if drone.is_at_destination(drone.goal):
                 drone.state = DroneState.ARRIVED
-                continue
+                self._active.discard(pos)
+        self.graph.next_turn()
+        if metrics.enabled:
+            metrics.count("moves", len(moves))
+            metrics.end_turn()
+
+    def _tick(self) -> List[Tuple[int, str]]:
+        moves: List[Tuple[int, str]] = []
+        heap = self._heap = sorted(self._active)
+        self._active = set()
+        while heap:
+            pos = heapq.heappop(heap)
+            self._cursor = pos
+            self._step(pos, moves)
+            woken_for = self._woken_for.pop(pos, None)
+            if woken_for is not None:
+                self._release(self.graph.zones[woken_for])
+        self._heap = None
+        self._cursor = -1
+        self.graph.next_turn()
+        return moves
+
+    def _step(self, pos: int, moves: List[Tuple[int, str]]) -> None:
+        """Un pas du drone pos, comme dans un parcours complet."""
+        drone = self.drones[pos]
+        if drone.is_at_destination(drone.goal):
+            drone.state = DroneState.ARRIVED
+            return
+
+        if drone.state == DroneState.IN_TRANSIT:
+            if drone.update_transit() and drone.current_zone:
+                moves.append((drone.drone_id, drone.current_zone.name))
+            self._active.add(pos)
+            return
+
+        next_zone = drone.next_zone
+
+        if next_zone and self.graph.can_move(drone, next_zone.name):
+            if drone.current_zone:
+                drone.current_zone.vacate(drone.drone_id)
+                self.graph.use_link(drone.current_zone.name, next_zone.name)
+
+            next_zone.occupy(drone.drone_id)
+            drone.advance()
+            moves.append((drone.drone_id, next_zone.name))
+            self._active.add(pos)
+        else:
+            if not drone.is_at_destination(drone.goal):
+                drone.state = DroneState.WAITING
+            self._park(pos, next_zone)
+
+    def active_drones(self) -> List[Drone]:
+        """Drones visités au prochain tour, dans l'ordre de la liste."""
+        return [self.drones[pos] for pos in sorted(self._active)]
+
+    def wake(self, drone: Drone) -> None:
+        """Remet un drone garé dans l'ensemble actif."""
+        pos = self._position[drone.drone_id]
+        self._unpark(pos)
+        self._stuck.discard(pos)
+        self._schedule(pos)
+
+    def wake_parked(self) -> None:
+        """Réveille tous les drones garés, en file ou sans issue."""
+        for pos in list(self._parked_on):
+            self._unpark(pos)
+            self._schedule(pos)
+        for pos in self._stuck:
+            self._schedule(pos)
+        self._stuck.clear()
+
+    def _schedule(self, pos: int) -> None:
+        """Traite pos dans ce tour s'il n'est pas encore passé, sinon après."""
+        if self._heap is not None and pos > self._cursor:
+            if pos not in self._heap:
+                heapq.heappush(self._heap, pos)
+        else:
+            self._active.add(pos)
 
-            if drone.state == DroneState.IN_TRANSIT:
-                drone.update_transit()
-                continue
+    def _park(self, pos: int, next_zone: Optional[Zone]) -> None:
+        """Met un drone bloqué dans la file de sa prochaine zone pleine."""
+        if next_zone is None or not next_zone.is_accessible():
+            self._stuck.add(pos)
+            return
+        if next_zone.has_capacity():
+            # Seul le lien est saturé : il se libère au tour suivant.
+            self._active.add(pos)
+            return
+        insort(self._waiting.setdefault(next_zone.name, []), pos)
+        self._parked_on[pos] = next_zone.name
 
-            next_zone = drone.next_zone
+    def _unpark(self, pos: int) -> None:
+        """Retire pos de la file où il attend, s'il y en a une."""
+        name = self._parked_on.pop(pos, None)
+        if name is None:
+            return
+        queue = self._waiting[name]
+        queue.remove(pos)
+        if not queue:
+            del self._waiting[name]
 
-            if next_zone and self.graph.can_move(drone, next_zone.name):
-                if drone.current_zone:
-                    drone.current_zone.vacate(drone.drone_id)
+    def _on_zone_change(self, zone: Zone) -> None:
+        """Appelé par le graphe : une zone pleine a pu libérer une place."""
+        if zone.is_accessible() and zone.has_capacity():
+            self._release(zone)
 
-                next_zone.occupy(drone.drone_id)
-                drone.advance()
-            else:
-                if not drone.is_at_destination(drone.goal):
-                    drone.state = DroneState.WAITING
\ No newline at end of file
+    def _release(self, zone: Zone) -> None:
+        """Réveille un drone de la file de zone, s'il reste de la place."""
+        queue = self._waiting.get(zone.name)
+        if not queue or not zone.has_capacity():
+            return
+        # Le premier drone après le curseur peut encore en profiter ce tour ;
+        # sinon le premier de la file la tentera au tour suivant.
+        i = bisect_right(queue, self._cursor) if self._heap is not None else 0
+        pos = queue[i if i < len(queue) else 0]
+        self._unpark(pos)
+        self._woken_for[pos] = zone.name
+        self._schedule(pos)
@@ -0,0 +1,327 @@
+import bisect
+import mmap
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+from src.models.drone import Drone, DroneState
+from src.models.graph import Graph
+
+
+MAGIC = b"FLYLOG\0\0"
+FORMAT_VERSION = 1
+SUFFIX = ".flylog"
+# Un instantané complet tous les DEFAULT_INTERVAL tours : aller au tour
+# t relit au plus ce nombre de deltas.
+DEFAULT_INTERVAL = 100
+
+# magic, version, ordre des octets (1 = little), bourrage, drones,
+# zones, intervalle des instantanés, octets des noms de zones. Suivent
+# les drone_id (int32) et les noms séparés par \0, complétés à 4 octets.
+_HEADER = struct.Struct("<8sIB3x4I")
+# Un enregistrement par tour : genre, bourrage, tour, drones, zones.
+#   DELTA : ids (int32) des n drones changés, leur zone, leur cible de
+#           transit, les ids des m zones changées, leur occupation, puis
+#           l'état des n drones (uint8).
+#   SNAPSHOT : zone et cible des n = tous les drones, occupation des
+#           m = toutes les zones, puis l'état des drones.
+# Les octets d'état sont complétés à 4 : tout reste aligné.
+_RECORD = struct.Struct("<B3x3I")
+DELTA, SNAPSHOT = 0, 1
+_BYTEORDER = 1 if sys.byteorder == "little" else 2
+
+STATES = list(DroneState)
+CODE = {state: code for code, state in enumerate(STATES)}
+
+
+class StaleLogError(ValueError):
+    """Fichier de tours illisible ou d'une autre version."""
+
+
+def _padded(n: int) -> int:
+    return (n + 3) & ~3
+
+
+class TurnState:
+    """
+    État d'une simulation après un tour : zone, cible de transit (-1 :
+    aucune) et code d'état (indice dans STATES) de chaque drone, dans
+    l'ordre de la flotte enregistrée, et occupation de chaque zone.
+    """
+
+    def __init__(self, turn: int, zone: array, target: array,
+                 state: array, occupancy: array) -> None:
+        self.turn = turn
+        self.zone = zone
+        self.target = target
+        self.state = state
+        self.occupancy = occupancy
+
+    def copy(self) -> "TurnState":
+        return TurnState(
+            self.turn, array("i", self.zone), array("i", self.target),
+            array("B", self.state), array("i", self.occupancy),
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TurnState):
+            return NotImplemented
+        return (self.zone == other.zone and self.target == other.target
+                and self.state == other.state
+                and self.occupancy == other.occupancy)
+
+
+def capture(graph: Graph, drones: Sequence[Drone], turn: int) -> TurnState:
+    """TurnState courant de drones sur graph."""
+    zone, target = array("i"), array("i")
+    for d in drones:
+        current, aim = d.current_zone, d.transit_target
+        zone.append(current.zone_id if current is not None else -1)
+        target.append(aim.zone_id if aim is not None else -1)
+    state = array("B", [CODE[d.state] for d in drones])
+    return TurnState(turn, zone, target, state,
+                     array("i", graph.freeze().occupancy))
+
+
+class TurnLogWriter:
+    """
+    Journal de tours en ajout seul : un instantané au tour 0 et tous les
+    interval tours, sinon seulement les drones et les zones qui ont
+    changé. Un enregistrement tronqué (arrêt brutal) est ignoré à la
+    lecture : le journal reste lisible jusqu'au dernier tour complet.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        graph: Graph,
+        drones: Sequence[Drone],
+        interval: int = DEFAULT_INTERVAL,
+    ) -> None:
+        self.graph = graph
+        self.drones = drones
+        self.interval = max(1, interval)
+        self.turn = 0
+        names = "\0".join(graph.zones).encode()
+        self._out: BinaryIO = open(filename, "wb")
+        self._out.write(_HEADER.pack(
+            MAGIC, FORMAT_VERSION, _BYTEORDER, len(drones),
+            len(graph.zones), self.interval, len(names),
+        ))
+        array("i", [d.drone_id for d in drones]).tofile(self._out)
+        self._out.write(names.ljust(_padded(len(names)), b"\0"))
+        self._last = capture(graph, drones, 0)
+        self._write_snapshot(self._last)
+
+    def record(self) -> None:
+        """Enregistre l'état après le tour qui vient d'être joué."""
+        self.turn += 1
+        state = capture(self.graph, self.drones, self.turn)
+        if self.turn % self.interval == 0:
+            self._write_snapshot(state)
+        else:
+            self._write_delta(self._last, state)
+        self._last = state
+
+    def _write_snapshot(self, state: TurnState) -> None:
+        out = self._out
+        out.write(_RECORD.pack(SNAPSHOT, state.turn, len(state.zone),
+                               len(state.occupancy)))
+        state.zone.tofile(out)
+        state.target.tofile(out)
+        state.occupancy.tofile(out)
+        out.write(state.state.tobytes().ljust(_padded(len(state.state)),
+                                              b"\0"))
+
+    def _write_delta(self, last: TurnState, state: TurnState) -> None:
+        drones, zone, target, codes = (
+            array("i"), array("i"), array("i"), array("B"),
+        )
+        if (state.zone != last.zone or state.target != last.target
+                or state.state != last.state):
+            for i in range(len(state.zone)):
+                if (state.zone[i] != last.zone[i]
+                        or state.target[i] != last.target[i]
+                        or state.state[i] != last.state[i]):
+                    drones.append(i)
+                    zone.append(state.zone[i])
+                    target.append(state.target[i])
+                    codes.append(state.state[i])
+        zones, occupancy = array("i"), array("i")
+        if state.occupancy != last.occupancy:
+            for i, count in enumerate(state.occupancy):
+                if count != last.occupancy[i]:
+                    zones.append(i)
+                    occupancy.append(count)
+        out = self._out
+        out.write(_RECORD.pack(DELTA, state.turn, len(drones), len(zones)))
+        for column in (drones, zone, target, zones, occupancy):
+            column.tofile(out)
+        out.write(codes.tobytes().ljust(_padded(len(codes)), b"\0"))
+
+    def close(self) -> None:
+        self._out.close()
+
+    def __enter__(self) -> "TurnLogWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class TurnLog:
+    """
+    Journal relu par projection mémoire. L'ouverture ne parcourt que les
+    en-têtes d'enregistrements ; state_at(t) part de l'instantané le
+    plus proche avant t et rejoue au plus interval deltas.
+    """
+
+    def __init__(self, filename: str) -> None:
+        with open(filename, "rb") as f:
+            if f.seek(0, 2) < _HEADER.size:
+                raise StaleLogError(f"{filename}: truncated header")
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._buffer)
+        (magic, version, byteorder, n, zones, interval,
+         names_len) = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise StaleLogError(f"{filename}: not a v{FORMAT_VERSION} log")
+        if byteorder != _BYTEORDER:
+            raise StaleLogError(f"{filename}: written with another byte "
+                                "order")
+        self.interval = interval
+        pos = _HEADER.size
+        self.drone_ids = array("i", view[pos:pos + 4 * n].cast("i"))
+        pos += 4 * n
+        blob = bytes(view[pos:pos + names_len])
+        self.names = blob.decode().split("\0") if zones else []
+        pos += _padded(names_len)
+        self._view = view
+        self._zones = zones
+        # (genre, début des données, drones, zones) de chaque tour
+        self._records: List[Tuple[int, int, int, int]] = []
+        self._snapshots: List[int] = []
+        while pos + _RECORD.size <= len(view):
+            kind, turn, a, b = _RECORD.unpack_from(view, pos)
+            size = 4 * (3 * a + 2 * b) if kind == DELTA else 4 * (2 * a + b)
+            end = pos + _RECORD.size + size + _padded(a)
+            if end > len(view) or turn != len(self._records):
+                break  # enregistrement tronqué
+            if kind == SNAPSHOT:
+                self._snapshots.append(turn)
+            self._records.append((kind, pos + _RECORD.size, a, b))
+            pos = end
+
+    @property
+    def turns(self) -> int:
+        """Dernier tour enregistré (0 : état initial seul)."""
+        return len(self._records) - 1
+
+    def state_at(self, turn: int) -> TurnState:
+        """État après turn (0 : avant le premier tour)."""
+        if not 0 <= turn <= self.turns:
+            raise IndexError(f"turn {turn} not in 0..{self.turns}")
+        base = self._snapshots[bisect.bisect_right(self._snapshots, turn) - 1]
+        state = self._load_snapshot(base)
+        for t in range(base + 1, turn + 1):
+            self._apply(t, state)
+        return state
+
+    def states(self) -> Iterator[TurnState]:
+        """
+        États de chaque tour dans l'ordre, en un seul passage. L'objet
+        rendu est modifié au tour suivant : copy() pour le garder.
+        """
+        if self.turns < 0:
+            return
+        state = self._load_snapshot(0)
+        yield state
+        for t in range(1, self.turns + 1):
+            if self._records[t][0] == SNAPSHOT:
+                state = self._load_snapshot(t)
+            else:
+                self._apply(t, state)
+            yield state
+
+    def position(self, state: TurnState,
+                 drone_id: int) -> Tuple[Optional[str], DroneState]:
+        """Nom de la zone et état d'un drone dans state."""
+        i = self.drone_ids.index(drone_id)
+        zone = state.zone[i]
+        return (self.names[zone] if zone >= 0 else None,
+                STATES[state.state[i]])
+
+    def _load_snapshot(self, turn: int) -> TurnState:
+        _, pos, n, m = self._records[turn]
+        view = self._view
+        ints = 4 * (2 * n + m)
+        return TurnState(
+            turn, _column("i", view[pos:pos + 4 * n]),
+            _column("i", view[pos + 4 * n:pos + 8 * n]),
+            _column("B", view[pos + ints:pos + ints + n]),
+            _column("i", view[pos + 8 * n:pos + ints]),
+        )
+
+    def _apply(self, turn: int, state: TurnState) -> None:
+        """Applique le delta de turn à state."""
+        _, pos, n, m = self._records[turn]
+        ints = self._view[pos:pos + 4 * (3 * n + 2 * m)].cast("i")
+        codes = self._view[pos + 4 * (3 * n + 2 * m):][:n]
+        zone, target, states = state.zone, state.target, state.state
+        for k in range(n):
+            i = ints[k]
+            zone[i] = ints[n + k]
+            target[i] = ints[2 * n + k]
+            states[i] = codes[k]
+        occupancy = state.occupancy
+        for k in range(m):
+            occupancy[ints[3 * n + k]] = ints[3 * n + m + k]
+        state.turn = turn
+
+    def close(self) -> None:
+        self._view.release()
+        self._buffer.close()
+
+
+def _column(typecode: str, data: memoryview) -> array:
+    """Copie data dans un array (les états restent modifiables)."""
+    column = array(typecode)
+    column.frombytes(data)
+    return column
+
+
+def first_divergence(a: TurnLog, b: TurnLog) -> Optional[int]:
+    """
+    Premier tour où les deux journaux diffèrent (positions, états ou
+    occupation), ou None s'ils sont identiques. Deux flottes ou deux
+    cartes différentes divergent dès le tour 0.
+    """
+    if a.drone_ids != b.drone_ids or a.names != b.names:
+        return 0
+    for sa, sb in zip(a.states(), b.states()):
+        if sa != sb:
+            return sa.turn
+    if a.turns != b.turns:
+        return min(a.turns, b.turns) + 1
+    return None
+
+
+def main(argv: List[str]) -> None:
+    """
+    turn_log.py run.flylog [tour]   : positions des drones au tour
+    turn_log.py run.flylog other.flylog : premier tour divergent
+    """
+    log = TurnLog(argv[0])
+    if len(argv) > 1 and not argv[1].isdigit():
+        turn = first_divergence(log, TurnLog(argv[1]))
+        print("identical" if turn is None else f"diverge at turn {turn}")
+        return
+    state = log.state_at(int(argv[1]) if len(argv) > 1 else log.turns)
+    print(f"turn {state.turn}/{log.turns}")
+    for drone_id in log.drone_ids:
+        zone, drone_state = log.position(state, drone_id)
+        print(f"D{drone_id} {zone or '-'} {drone_state.name}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,9 +1,21 @@
 # turn_manager.py
-from typing import List
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
 from src.models.drone import Drone, DroneState
 from src.simulation.simulator import Simulator
+from src.routing.cache import RouteCache
+from src.routing.distance_field import DistanceField
+from src.routing.flow import plan_flow
+from src.routing.parallel import ROUTERS, ParallelPlanner
+from src.routing.pathfinder import DijkstraPathfinder, assign_by_load
+from src.routing.strategies import get_strategy
+from src.routing.strategies.astar import AStar
 from src.routing.strategies.bfs import BFS
-from src.models.zone import CapacityError
+from src.models.graph import link_key
+from src.models.zone import Zone, ZoneType
+from src.visualization.logger import metrics
+
 
 class TurnManager:
     """
@@ -12,36 +24,423 @@ class TurnManager:
     - Fait avancer tous les drones
     """
 
-    def __init__(self, drones: List[Drone], simulator: Simulator, bfs: BFS):
+    def __init__(
+        self,
+        drones: List[Drone],
+        simulator: Simulator,
+        bfs: Optional[BFS] = None,
+        strategy: str = "dstar",
+        route_cache: Optional[RouteCache] = None,
+        planner: Optional[ParallelPlanner] = None,
+    ):
+        """
+        bfs : routeur explicite (tout objet exposant find_route)
+        strategy : nom de la stratégie ("dstar", "bfs", "dijkstra",
+                   "astar", "hpa") utilisée si aucun routeur n'est
+                   fourni ; "dstar" répare sa recherche au lieu de la
+                   relancer, "hpa" découpe les grandes cartes en tuiles,
+                   "astar" lit la table d'un DistanceField du but
+        route_cache : cache LRU partagé par tous les drones (créé par défaut)
+        planner : pool de processus ; une passe dont au moins
+                  planner.min_batch routes manquent au cache les calcule
+                  en parallèle, sur le même instantané des zones. Son
+                  planner.strategy doit être celle du routeur
+                  (ValueError sinon : "dstar" ou "hpa" n'ont pas de pool)
+        """
         self.drones = drones
         self.simulator = simulator
-        self.bfs = bfs
+        self.router = bfs if bfs is not None else get_strategy(
+            strategy, simulator.graph
+        )
+        self.route_cache = (
+            route_cache if route_cache is not None
+            else RouteCache(simulator.graph)
+        )
+        self._seen_version = simulator.graph.full_version
+        self.pathfinder = DijkstraPathfinder(simulator.graph)
+        if planner is not None and (
+            type(self.router) is not ROUTERS[planner.strategy]
+        ):
+            raise ValueError(
+                f"parallel planner computes '{planner.strategy}' routes, "
+                f"the turn manager routes with "
+                f"{type(self.router).__name__}"
+            )
+        self.planner = planner
+
+    def spread_routes(self, k: int = 3, disjoint: bool = False) -> None:
+        """
+        Donne aux drones au repos un des k plus courts chemins de leur
+        zone à leur but, répartis par charge (assign_by_load), au lieu
+        du même chemin pour tous : les couloirs parallèles servent dès
+        le premier tour. Un drone bloqué en route recalcule ensuite son
+        chemin comme les autres.
+        """
+        groups: Dict[Tuple[str, str], List[Drone]] = {}
+        for drone in self.drones:
+            start, goal = drone.current_zone, drone.goal
+            if (drone.state == DroneState.IDLE and start and goal
+                    and start != goal):
+                groups.setdefault((start.name, goal.name), []).append(drone)
+        graph = self.simulator.graph
+        for group in groups.values():
+            start, goal = group[0].current_zone, group[0].goal
+            assert start is not None and goal is not None
+            paths = self.pathfinder.find_k_shortest_paths(
+                start, goal, k, disjoint
+            )
+            for drone, index in zip(
+                group, assign_by_load(graph, paths, len(group))
+            ):
+                drone.path = paths[index]
+                drone.path_index = 0
+                drone.state = DroneState.MOVING
 
-    def run_turn(self):
+    def flow_routes(self) -> None:
+        """
+        Comme spread_routes, mais les couloirs et le nombre de drones par
+        couloir viennent d'un flot de coût minimal (flow.plan_flow) :
+        capacités des zones et des liens respectées, durée totale
+        minimale. Les départs sont ensuite arbitrés tour par tour.
+        Lève ValueError si un but est inaccessible.
+        """
+        groups: Dict[Tuple[str, str], List[Drone]] = {}
         for drone in self.drones:
+            start, goal = drone.current_zone, drone.goal
+            if (drone.state == DroneState.IDLE and start and goal
+                    and start != goal):
+                groups.setdefault((start.name, goal.name), []).append(drone)
+        graph = self.simulator.graph
+        zones = list(graph.zones.values())
+        for group in groups.values():
+            start, goal = group[0].current_zone, group[0].goal
+            assert start is not None and goal is not None
+            flow = plan_flow(graph, start, goal, len(group))
+            # premiers partis, premiers servis : l'ordre des départs
+            for drone, (index, _) in zip(group, flow.assign()):
+                drone.path = [zones[i] for i in flow.paths[index].zones]
+                drone.path_index = 0
+                drone.state = DroneState.MOVING
+
+    def find_route(self, start: Zone, goal: Zone) -> Optional[List[Zone]]:
+        """Route via le cache : recalcule seulement si full_version bouge."""
+        found, route = self.route_cache.lookup(start, goal)
+        if not found:
+            self._use_field(goal)
+            if metrics.enabled:
+                return self._plan(start, goal)
+            route = self.router.find_route(start, goal)
+            self.route_cache.store(start, goal, route)
+        elif metrics.enabled:
+            metrics.count("cache_hits")
+        return route
+
+    def _use_field(self, goal: Zone) -> None:
+        """
+        A* : construit au premier besoin le DistanceField de goal (puis
+        tenu à jour par le graphe) et le donne comme heuristique.
+        """
+        router = self.router
+        if not isinstance(router, AStar):
+            return
+        graph = self.simulator.graph
+        field = router.distance_field
+        if (field is None or field.compiled is not graph.freeze()
+                or field.zones[field.goal] is not goal):
+            router.distance_field = DistanceField(graph, goal)
+
+    def _plan(self, start: Zone, goal: Zone) -> Optional[List[Zone]]:
+        """find_route sur un défaut de cache, mesuré (phase "plan")."""
+        started = time.perf_counter()
+        route = self.router.find_route(start, goal)
+        metrics.add_time("plan", time.perf_counter() - started, emit=False)
+        metrics.count("replans")
+        metrics.count("nodes_expanded",
+                      getattr(self.router, "nodes_expanded", 0))
+        self.route_cache.store(start, goal, route)
+        return route
+
+    def run_turn(self) -> List[Tuple[int, str]]:
+        """
+        Un tour en deux phases : chaque drone actif (re)calcule son
+        chemin et annonce son prochain pas, puis tous les pas sont
+        arbitrés ensemble (_resolve) et appliqués d'un coup (_commit).
+        Le résultat ne dépend pas de l'ordre de la liste, et aucune
+        CapacityError n'est levée.
+
+        Si les pas appliqués ont rempli ou libéré une zone, ou saturé un
+        lien, les drones restés sur place recalculent leur chemin et une
+        nouvelle passe a lieu (un détour a pu s'ouvrir, une zone a pu se
+        libérer) ; chaque drone bouge au plus une fois par tour, d'une
+        zone au plus. Le simulateur ne fait que clore le tour.
+
+        Entrer dans une zone restreinte prend deux tours : le drone part
+        sur le lien (déplacement « de-vers ») avec sa place réservée,
+        puis s'y pose au début du tour suivant (_land).
+
+        Retourne les déplacements du tour, (drone_id, zone atteinte ou
+        lien « de-vers »).
+        """
+        # Les drones garés par le simulateur ne sont revus que si une zone
+        # s'est remplie, libérée ou a changé de type : un autre chemin a
+        # pu s'ouvrir. Sinon leur recalcul donnerait le même résultat.
+        graph = self.simulator.graph
+        version = graph.full_version
+        if version != self._seen_version:
+            self._seen_version = version
+            self.simulator.wake_parked()
+
+        moves: List[Tuple[int, str]] = []
+        pending: List[Drone] = []
+        for drone in self.simulator.active_drones():
+            if drone.state == DroneState.IN_TRANSIT:
+                moves.append(self._land(drone))
+            else:
+                pending.append(drone)
+        blocked: Set[int] = set()
+        while pending:
+            version = graph.full_version
+            intents = self._intents(pending)
+            started = time.perf_counter()
+            admitted = self._resolve(intents)
+            moves.extend(self._commit(admitted))
+            if metrics.enabled:
+                metrics.add_time("simulate", time.perf_counter() - started,
+                                 emit=False)
+            moved = {d.drone_id for d in admitted}
+            blocked -= moved
+            for drone in intents:
+                if drone.drone_id not in moved:
+                    # Zone pleine ou lien saturé : recalcul à la passe
+                    # suivante, ou au prochain tour
+                    drone.state = DroneState.WAITING
+                    blocked.add(drone.drone_id)
+            if not moved or graph.full_version == version:
+                break
+            pending = [d for d in pending if d.drone_id not in moved]
+        if blocked and metrics.enabled:
+            metrics.count("blocked_moves", len(blocked))
+
+        self.simulator.end_turn(moves)
+        return moves
+
+    def _intents(self, drones: List[Drone]) -> List[Drone]:
+        """Recalcule les chemins si besoin ; drones qui veulent avancer."""
+        intents: List[Drone] = []
+        planned = self._plan_parallel(drones) if self.planner else {}
+        for drone in drones:
             # Si drone bloqué ou sans path, on tente de recalculer un chemin
-            if drone.state in [DroneState.WAITING, DroneState.IDLE] or not drone.path:
-                if hasattr(drone, 'goal') and drone.goal and drone.current_zone:
-                    new_path = self.bfs.find_route(drone.current_zone, drone.goal)
+            idle = drone.state in [DroneState.WAITING, DroneState.IDLE]
+            if idle or not drone.path:
+                if drone.goal and drone.current_zone:
+                    key = (drone.current_zone.name, drone.goal.name)
+                    new_path = (
+                        planned[key] if key in planned
+                        else self.find_route(drone.current_zone, drone.goal)
+                    )
                     if new_path:
                         drone.path = new_path
                         drone.path_index = 0
                         drone.state = DroneState.MOVING
+                    elif drone.next_zone is not None:
+                        # Aucun chemin libre de bout en bout : le drone
+                        # garde le sien, sa zone suivante peut se libérer
+                        # dans ce tour (convoi) ; _resolve en décide.
+                        drone.state = DroneState.MOVING
                     else:
                         drone.state = DroneState.WAITING
 
-            # Vérifier si le drone peut avancer vers la prochaine zone
             if drone.state == DroneState.MOVING and drone.next_zone:
-                try:
-                    # Tente d'occuper la prochaine zone
-                    drone.next_zone.occupy(drone.drone_id)
-                    # Libère la zone précédente
-                    if drone.current_zone:
-                        drone.current_zone.vacate(drone.drone_id)
-                    drone.advance()
-                except CapacityError:
-                    # Zone pleine, reste en WAITING et recalculera au prochain tour
-                    drone.state = DroneState.WAITING
+                intents.append(drone)
+        return intents
+
+    def _plan_parallel(
+        self, drones: List[Drone]
+    ) -> Dict[Tuple[str, str], Optional[List[Zone]]]:
+        """
+        Routes manquantes de la passe, calculées ensemble par le pool si
+        elles sont assez nombreuses (sinon {} : calcul sur place).
+        """
+        planner = self.planner
+        assert planner is not None
+        queries: Dict[Tuple[str, str], Tuple[Zone, Zone]] = {}
+        for drone in drones:
+            start, goal = drone.current_zone, drone.goal
+            if (drone.state in (DroneState.WAITING, DroneState.IDLE)
+                    or not drone.path) and start and goal:
+                key = (start.name, goal.name)
+                if key not in queries and not self.route_cache.has(
+                    start, goal
+                ):
+                    queries[key] = (start, goal)
+        if len(queries) < planner.min_batch:
+            return {}
+        with metrics.phase("plan"):
+            routes = planner.plan(list(queries.values()))
+        if metrics.enabled:
+            metrics.count("replans", len(routes))
+        planned = {}
+        for (key, (start, goal)), route in zip(queries.items(), routes):
+            self.route_cache.store(start, goal, route)
+            planned[key] = route
+        return planned
+
+    def _resolve(self, intents: List[Drone]) -> List[Drone]:
+        """
+        Choisit les pas annoncés qui seront faits ce tour.
+
+        Priorité (déterministe) : le moins d'étapes restantes, puis le
+        plus petit drone_id. Chaque zone admet autant de drones qu'elle a
+        de places ; un drone admis qui quitte une zone pleine y libère
+        une place pour le suivant (convoi). Les cycles de zones pleines
+        (échanges, rotations) passent en bloc si les liens le permettent.
+        """
+        graph = self.simulator.graph
+        order = sorted(
+            intents,
+            key=lambda d: (len(d.path) - d.path_index, d.drone_id),
+        )
+        free: Dict[str, int] = {}
+        budget: Dict[Tuple[str, str], int] = {}
+        waiting: Dict[str, Deque[Drone]] = {}
+        leaving: Dict[str, List[Drone]] = {}
+        for drone in order:
+            target = drone.next_zone
+            current = drone.current_zone
+            assert target is not None and current is not None
+            if target.name not in free:
+                free[target.name] = (
+                    target.capacity - target.occupancy
+                    if target.is_accessible() else 0
+                )
+            waiting.setdefault(target.name, deque()).append(drone)
+            if current.holds(drone.drone_id):
+                leaving.setdefault(current.name, []).append(drone)
+            key = link_key(current.name, target.name)
+            if key not in budget:
+                budget[key] = graph.link_remaining(current.name, target.name)
+
+        admitted: List[Drone] = []
+        moved: Set[int] = set()
+        zones = deque(waiting)
+        while zones:
+            name = zones.popleft()
+            queue = waiting[name]
+            while queue and free[name] > 0:
+                drone = queue.popleft()
+                current = drone.current_zone
+                assert current is not None
+                key = link_key(current.name, name)
+                if budget[key] <= 0:
+                    continue
+                budget[key] -= 1
+                free[name] -= 1
+                admitted.append(drone)
+                moved.add(drone.drone_id)
+                if current.holds(drone.drone_id):
+                    # place libérée : le suivant du convoi peut entrer
+                    free[current.name] = free.get(current.name, 0) + 1
+                    if waiting.get(current.name):
+                        zones.append(current.name)
+
+        if len(admitted) < len(order):
+            admitted.extend(self._cycles(order, moved, leaving, budget))
+        return admitted
+
+    def _cycles(
+        self,
+        order: List[Drone],
+        moved: Set[int],
+        leaving: Dict[str, List[Drone]],
+        budget: Dict[Tuple[str, str], int],
+    ) -> List[Drone]:
+        """
+        Drones restants formant des cycles de zones pleines : chacun
+        vise la zone d'un drone qui veut en sortir (le premier par
+        priorité), et la chaîne revient au départ. Tout le cycle bouge
+        ensemble, sans changer l'occupation d'aucune zone.
+        """
+        def leader(drone: Drone) -> Optional[Drone]:
+            target = drone.next_zone
+            assert target is not None
+            if not target.is_accessible():
+                return None
+            for other in leaving.get(target.name, ()):
+                if other.drone_id not in moved:
+                    return other
+            return None
+
+        found: List[Drone] = []
+        done: Set[int] = set()
+        for first in order:
+            if first.drone_id in moved or first.drone_id in done:
+                continue
+            chain: List[Drone] = []
+            on_chain: Dict[int, int] = {}
+            drone: Optional[Drone] = first
+            while drone is not None and drone.drone_id not in done:
+                if drone.drone_id in on_chain:
+                    cycle = chain[on_chain[drone.drone_id]:]
+                    if self._take_links(cycle, budget):
+                        found.extend(cycle)
+                        moved.update(d.drone_id for d in cycle)
+                    break
+                on_chain[drone.drone_id] = len(chain)
+                chain.append(drone)
+                drone = leader(drone)
+            done.update(on_chain)
+        return found
+
+    @staticmethod
+    def _take_links(
+        cycle: List[Drone], budget: Dict[Tuple[str, str], int]
+    ) -> bool:
+        """Réserve les liens du cycle s'ils ont tous assez de passages."""
+        need: Dict[Tuple[str, str], int] = {}
+        for drone in cycle:
+            current, target = drone.current_zone, drone.next_zone
+            assert current is not None and target is not None
+            key = link_key(current.name, target.name)
+            need[key] = need.get(key, 0) + 1
+        if any(budget[key] < n for key, n in need.items()):
+            return False
+        for key, n in need.items():
+            budget[key] -= n
+        return True
+
+    def _commit(self, admitted: List[Drone]) -> List[Tuple[int, str]]:
+        """
+        Applique les pas admis : toutes les sorties, puis les entrées.
+        Vers une zone restreinte, le drone y prend sa place mais reste
+        sur le lien jusqu'au tour suivant.
+        """
+        graph = self.simulator.graph
+        moves = []
+        for drone in admitted:
+            current = drone.current_zone
+            assert current is not None
+            current.vacate(drone.drone_id)
+        for drone in admitted:
+            current, target = drone.current_zone, drone.next_zone
+            assert current is not None and target is not None
+            target.occupy(drone.drone_id)
+            graph.use_link(current.name, target.name)
+            if target.z_type == ZoneType.RESTRICTED:
+                drone.start_transit_to_restricted(target)
+                moves.append((drone.drone_id,
+                              f"{current.name}-{target.name}"))
+            else:
+                drone.advance()
+                moves.append((drone.drone_id, target.name))
+        return moves
 
-        # Avance tous les drones d'un pas dans le simulateur
-        self.simulator.tick()
\ No newline at end of file
+    def _land(self, drone: Drone) -> Tuple[int, str]:
+        """
+        Second tour d'un transit : le drone, déjà compté dans la zone
+        restreinte, y entre ; le lien compte encore son passage.
+        """
+        current, target = drone.current_zone, drone.transit_target
+        assert current is not None and target is not None
+        self.simulator.graph.use_link(current.name, target.name)
+        drone.update_transit()
+        return drone.drone_id, target.name
@@ -0,0 +1,279 @@
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from src.models.compiled_graph import BLOCKED
+from src.models.drone import Drone, DroneState
+from src.models.graph import Graph
+
+
+# DroneState <-> code du tableau state.
+STATES = list(DroneState)
+CODE = {state: code for code, state in enumerate(STATES)}
+MOVING = CODE[DroneState.MOVING]
+IN_TRANSIT = CODE[DroneState.IN_TRANSIT]
+WAITING = CODE[DroneState.WAITING]
+ARRIVED = CODE[DroneState.ARRIVED]
+
+
+class VectorSimulator:
+    """
+    Équivalent « struct of arrays » de Simulator.
+
+    L'état des drones tient dans des tableaux NumPy (code d'état, début et
+    longueur du chemin dans un tampon plat, path_index, transits) et
+    l'occupation dans un compteur par zone : un tour se réduit à quelques
+    passes vectorisées sur les drones pas encore arrivés.
+
+    Simulator.tick traite les drones dans l'ordre de la liste : un drone
+    peut entrer dans une zone libérée plus tôt dans le tour. Ici les
+    admissions sont résolues en une passe dans ce même ordre, face aux
+    places laissées par les drones précédents (par zone, et par lien pour
+    max_link_capacity) : tick renvoie les mêmes mouvements que le moteur
+    objet.
+    """
+
+    def __init__(self, graph: Graph, drones: Sequence[Drone]) -> None:
+        """
+        Construit les tableaux depuis des Drone (dans l'ordre de
+        Simulator.tick) et l'occupation courante des zones.
+        """
+        compiled = graph.freeze()
+        index = compiled.index
+        routes: List[List[int]] = []
+        route_of: List[int] = []
+        seen = {}
+        # chemins partagés (intern_path) : un calcul par chemin distinct
+        by_path: Dict[int, int] = {}
+        for drone in drones:
+            route = by_path.get(id(drone.path))
+            if route is None:
+                key = tuple(z.zone_id for z in drone.path)
+                if key not in seen:
+                    seen[key] = len(routes)
+                    routes.append(list(key))
+                route = by_path[id(drone.path)] = seen[key]
+            route_of.append(route)
+        goals = [index[d.goal.name] if d.goal else -1 for d in drones]
+        ids = [d.drone_id for d in drones]
+        self._setup(graph, routes, route_of, goals, ids)
+
+        self.state[:] = [CODE[d.state] for d in drones]
+        self.path_index[:] = [d.path_index for d in drones]
+        self.transit_remaining[:] = [d.transit_remaining for d in drones]
+        self.has_target[:] = [d.transit_target is not None for d in drones]
+        self.occupancy[:] = compiled.occupancy
+        self.registered[:] = [
+            d.current_zone is not None
+            and d.current_zone.holds(d.drone_id)
+            for d in drones
+        ]
+        self.active = np.flatnonzero(self.state != ARRIVED)
+
+    @classmethod
+    def from_routes(
+        cls,
+        graph: Graph,
+        routes: Sequence[Sequence[int]],
+        route_of: Sequence[int],
+        goal: int,
+    ) -> "VectorSimulator":
+        """
+        Flotte construite directement depuis des routes partagées (ids de
+        zones), sans objets Drone : route_of donne l'indice de route de
+        chaque drone. Les drones, numérotés à partir de 1, partent IDLE
+        de la première zone de leur route et y sont comptés.
+        """
+        sim = cls.__new__(cls)
+        n = len(route_of)
+        sim._setup(graph, routes, route_of, [goal] * n, range(1, n + 1))
+        starts = sim.paths[sim.path_start]
+        sim.occupancy[:] = np.bincount(starts, minlength=len(sim.occupancy))
+        sim.registered[:] = True
+        sim.active = np.arange(n)
+        return sim
+
+    def _setup(
+        self,
+        graph: Graph,
+        routes: Sequence[Sequence[int]],
+        route_of: Sequence[int],
+        goals: Sequence[int],
+        drone_ids: Sequence[int],
+    ) -> None:
+        """Alloue le tampon plat des chemins et les tableaux par drone."""
+        compiled = graph.freeze()
+        self.names = compiled.names
+        self.capacity = np.asarray(compiled.capacity, dtype=np.int64)
+        zone_type = np.asarray(compiled.zone_type, dtype=np.int64)
+        self.blocked = zone_type == BLOCKED
+        self.occupancy = np.zeros(compiled.num_zones, dtype=np.int64)
+        self.link_capacity = np.asarray(
+            compiled.link_capacity, dtype=np.int64
+        )
+        # Cases CSR triées par u * zones + v, pour retrouver un lien.
+        offsets_csr = np.asarray(compiled.offsets, dtype=np.int64)
+        tails = np.repeat(
+            np.arange(compiled.num_zones, dtype=np.int64),
+            np.diff(offsets_csr),
+        )
+        keys = tails * compiled.num_zones + np.asarray(
+            compiled.neighbours, dtype=np.int64
+        )
+        order = np.argsort(keys, kind="stable")
+        self._slot_keys = keys[order]
+        self._slot_link = np.asarray(
+            compiled.edge_link, dtype=np.int64
+        )[order]
+
+        lengths = np.array([len(r) for r in routes], dtype=np.int64)
+        offsets = np.zeros(len(lengths), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        # Une case sentinelle : « pas de zone » indexe une case valide.
+        self.paths = np.array(
+            [z for route in routes for z in route] + [-1], dtype=np.int64
+        )
+        route_index = np.asarray(route_of, dtype=np.int64)
+        n = len(route_index)
+        self.drone_ids = np.asarray(drone_ids, dtype=np.int64)
+        self.goal = np.asarray(goals, dtype=np.int64)
+        empty = np.zeros(0, np.int64)
+        self.path_start = offsets[route_index] if n else empty
+        self.path_len = lengths[route_index] if n else empty
+        self.state = np.zeros(n, dtype=np.int8)
+        self.path_index = np.zeros(n, dtype=np.int64)
+        self.transit_remaining = np.zeros(n, dtype=np.int64)
+        self.has_target = np.zeros(n, dtype=bool)
+        self.registered = np.zeros(n, dtype=bool)
+        self.active = np.zeros(0, dtype=np.int64)
+
+    @property
+    def all_arrived(self) -> bool:
+        """True quand tous les drones sont ARRIVED."""
+        return self.active.size == 0
+
+    def _zone_at(self, drones: np.ndarray, offset: int) -> np.ndarray:
+        """Zone à path_index + offset de chaque drone (-1 après la fin)."""
+        pos = self.path_index[drones] + offset
+        inside = pos < self.path_len[drones]
+        sentinel = len(self.paths) - 1
+        slot = np.where(inside, self.path_start[drones] + pos, sentinel)
+        return self.paths[slot]
+
+    def _link_of(self, cur: np.ndarray, nxt: np.ndarray) -> np.ndarray:
+        """Lien cur-nxt de chaque mouvement (-1 si aucun)."""
+        links = np.full(len(cur), -1, dtype=np.int64)
+        both = (cur >= 0) & (nxt >= 0)
+        if not both.any() or not len(self._slot_keys):
+            return links
+        keys = cur[both] * len(self.occupancy) + nxt[both]
+        i = np.searchsorted(self._slot_keys, keys)
+        i = np.minimum(i, len(self._slot_keys) - 1)
+        found = self._slot_keys[i] == keys
+        links[np.flatnonzero(both)[found]] = self._slot_link[i[found]]
+        return links
+
+    def tick_ids(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Avance tous les drones d'un tour ; renvoie (ids de drones, ids de
+        zones) des mouvements du tour, dans l'ordre des drones.
+        """
+        act = self.active
+        cur = self._zone_at(act, 0)
+        at_dest = (self.state[act] == ARRIVED) | (
+            (cur == self.goal[act]) & (self.path_index[act] > 0)
+        )
+        self.state[act[at_dest]] = ARRIVED
+
+        # Transits : décompte, puis entrée dans la zone suivante (le drone
+        # reste compté dans la zone quittée, comme Drone.update_transit).
+        transit = ~at_dest & (self.state[act] == IN_TRANSIT)
+        t_idx = act[transit]
+        self.transit_remaining[t_idx] -= 1
+        finished = self.transit_remaining[t_idx] <= 0
+        done = t_idx[finished & self.has_target[t_idx]]
+        self.path_index[done] += 1
+        self.state[done] = MOVING
+        self.registered[done] = False
+
+        cand = ~at_dest & ~transit
+        c_idx = act[cand]
+        c_cur = cur[cand]
+        nxt = self._zone_at(c_idx, 1)
+        wants = nxt >= 0
+        wants[wants] = ~self.blocked[nxt[wants]]
+        moved = self._admit(c_idx, c_cur, nxt, wants)
+
+        leaving = c_cur[moved & self.registered[c_idx] & (c_cur >= 0)]
+        size = len(self.occupancy)
+        self.occupancy -= np.bincount(leaving, minlength=size)
+        self.occupancy += np.bincount(nxt[moved], minlength=size)
+        m_idx = c_idx[moved]
+        self.registered[m_idx] = True
+        self.path_index[m_idx] += 1
+        self.state[m_idx] = MOVING
+        self.state[c_idx[~moved]] = WAITING
+
+        self.active = act[self.state[act] != ARRIVED]
+
+        movers = np.concatenate((done, m_idx))
+        zones = np.concatenate((self._zone_at(done, 0), nxt[moved]))
+        keep = zones >= 0
+        movers, zones = movers[keep], zones[keep]
+        order = np.argsort(movers, kind="stable")
+        return self.drone_ids[movers[order]], zones[order]
+
+    def tick(self) -> List[Tuple[int, str]]:
+        """Comme tick_ids, au format de Simulator.tick."""
+        ids, zones = self.tick_ids()
+        names = self.names
+        return [(int(i), names[z]) for i, z in zip(ids, zones)]
+
+    def _admit(
+        self,
+        drones: np.ndarray,
+        cur: np.ndarray,
+        nxt: np.ndarray,
+        wants: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Résout les capacités dans l'ordre des drones : le drone i bouge
+        ssi sa zone suivante (et son lien) a encore de la place une fois
+        appliqués les mouvements des drones précédents. Chaque décision ne
+        dépend que des précédentes : une seule passe, places libres par
+        zone et par lien tenues à jour au fil des admissions.
+        """
+        moved = np.zeros(len(drones), dtype=bool)
+        cand = np.flatnonzero(wants)
+        if not cand.size:
+            return moved
+        capacity, occupancy = self.capacity, self.occupancy
+        link_capacity = self.link_capacity
+        frees = (self.registered[drones] & (cur >= 0)).tolist()
+        cur_ids, nxt_ids = cur.tolist(), nxt.tolist()
+        links = self._link_of(cur, nxt).tolist()
+        # places restantes des zones et liens déjà touchés ce tour
+        room: Dict[int, int] = {}
+        link_room: Dict[int, int] = {}
+        for i in cand.tolist():
+            zone = nxt_ids[i]
+            free = room.get(zone)
+            if free is None:
+                free = int(capacity[zone] - occupancy[zone])
+            if free <= 0:
+                continue
+            link = links[i]
+            if link >= 0:
+                left = link_room.get(link)
+                if left is None:
+                    left = int(link_capacity[link])
+                if left <= 0:
+                    continue
+                link_room[link] = left - 1
+            room[zone] = free - 1
+            if frees[i]:
+                zone = cur_ids[i]
+                free = room.get(zone)
+                if free is None:
+                    free = int(capacity[zone] - occupancy[zone])
+                room[zone] = free + 1
+            moved[i] = True
+        return moved
@@ -0,0 +1,151 @@
+import shutil
+import sys
+import time
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
+from src.models.graph import Graph
+from src.models.zone import Zone, ZoneType
+
+
+# Carte en caractères pour suivre une simulation dans un terminal (SSH
+# compris), sans matplotlib. Séquences ANSI : effacement, placement du
+# curseur en (ligne, colonne) et effacement de fin de ligne.
+
+SYMBOL = {
+    ZoneType.NORMAL: ".",
+    ZoneType.PRIORITY: "+",
+    ZoneType.RESTRICTED: "~",
+    ZoneType.BLOCKED: "#",
+}
+START_SYMBOL = "S"
+GOAL_SYMBOL = "G"
+DEFAULT_FPS = 10.0
+
+Cell = Tuple[int, int]
+
+
+class ConsoleRenderer:
+    """
+    Une cellule par zone, placée d'après Zone.x / Zone.y (mise à
+    l'échelle si la carte dépasse le terminal ; plusieurs zones peuvent
+    partager une cellule). Une cellule vide montre le type de sa zone,
+    sinon le nombre de drones (« * » à partir de 10).
+
+    update() ne réécrit que les cellules changées depuis l'image
+    précédente, en un seul write, et au plus fps fois par seconde :
+    appelé à chaque tour, il saute les images en trop au lieu de
+    ralentir la simulation.
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        start: Optional[Zone] = None,
+        goal: Optional[Zone] = None,
+        out: TextIO = sys.stdout,
+        size: Optional[Tuple[int, int]] = None,
+        fps: float = DEFAULT_FPS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """size : (colonnes, lignes) ; par défaut, celle du terminal."""
+        self.out = out
+        self.clock = clock
+        self.interval = 1 / fps if fps > 0 else 0.0
+        self._compiled = graph.freeze()
+        zones = list(graph.zones.values())
+        if size is None:
+            columns, lines = shutil.get_terminal_size()
+            size = (columns, lines - 1)  # une ligne pour l'état
+        xs = [z.x for z in zones] or [0]
+        ys = [z.y for z in zones] or [0]
+        x0, y0 = min(xs), min(ys)
+        span_x, span_y = max(xs) - x0, max(ys) - y0
+        self.width = max(1, min(size[0], span_x + 1))
+        self.height = max(1, min(size[1], span_y + 1))
+
+        # cellule de chaque zone ; y croît vers le haut de l'écran
+        self.cell_of: List[Cell] = []
+        for zone in zones:
+            col = (zone.x - x0) * (self.width - 1) // max(1, span_x)
+            row = (y0 + span_y - zone.y) * (self.height - 1) // max(
+                1, span_y
+            )
+            self.cell_of.append((row, col))
+        self.base: Dict[Cell, str] = {}
+        for zone, cell in zip(zones, self.cell_of):
+            self.base.setdefault(cell, SYMBOL[zone.z_type])
+        for hub, symbol in ((start, START_SYMBOL), (goal, GOAL_SYMBOL)):
+            if hub is not None:
+                self.base[self.cell_of[self._compiled.id_of(hub.name)]] = (
+                    symbol
+                )
+        self._shown: Dict[Cell, str] = {}
+        self._status = ""
+        self._last = -float("inf")
+        self.frames = 0
+        self.skipped = 0
+
+    def cells(self) -> Dict[Cell, str]:
+        """Caractère de chaque cellule occupée par une zone."""
+        shown = dict(self.base)
+        occupancy = self._compiled.occupancy
+        counts: Dict[Cell, int] = {}
+        for zone_id, cell in enumerate(self.cell_of):
+            if occupancy[zone_id]:
+                counts[cell] = counts.get(cell, 0) + occupancy[zone_id]
+        for cell, count in counts.items():
+            shown[cell] = str(count) if count < 10 else "*"
+        return shown
+
+    def draw(self, status: str = "") -> None:
+        """Efface l'écran et dessine toute la carte."""
+        shown = self.cells()
+        rows = [[" "] * self.width for _ in range(self.height)]
+        for (row, col), char in shown.items():
+            rows[row][col] = char
+        self.out.write(
+            "\x1b[2J\x1b[H" + "\n".join("".join(r) for r in rows)
+            + self._status_line(status)
+        )
+        self.out.flush()
+        self._shown = shown
+        self._status = status
+        self._last = self.clock()
+        self.frames += 1
+
+    def update(self, status: str = "", force: bool = False) -> bool:
+        """
+        Réécrit les cellules qui ont changé et la ligne d'état. Sans
+        force, ne fait rien (et retourne False) si la dernière image
+        date de moins de 1 / fps seconde.
+        """
+        now = self.clock()
+        if not force and now - self._last < self.interval:
+            self.skipped += 1
+            return False
+        if not self.frames:
+            self.draw(status)
+            return True
+        shown = self.cells()
+        parts = [
+            f"\x1b[{row + 1};{col + 1}H{char}"
+            for (row, col), char in shown.items()
+            if self._shown.get((row, col)) != char
+        ]
+        if status != self._status:
+            parts.append(self._status_line(status))
+        if parts:
+            self.out.write("".join(parts))
+            self.out.flush()
+        self._shown = shown
+        self._status = status
+        self._last = now
+        self.frames += 1
+        return True
+
+    def close(self) -> None:
+        """Place le curseur sous la carte."""
+        self.out.write(f"\x1b[{self.height + 2};1H")
+        self.out.flush()
+
+    def _status_line(self, status: str) -> str:
+        return f"\x1b[{self.height + 1};1H\x1b[K{status}"
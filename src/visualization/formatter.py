@@ -0,0 +1,69 @@
+from typing import Iterable, List, TextIO, Tuple
+
+
+# Sortie standard d'une simulation : une ligne par tour, les
+# déplacements « D<id>-<zone> » séparés par des espaces (« D<id>-<de>-
+# <vers> » au premier des deux tours d'entrée dans une zone restreinte).
+
+Move = Tuple[int, str]
+
+DEFAULT_BUFFER = 1 << 16
+
+
+def format_move(drone_id: int, zone: str) -> str:
+    return f"D{drone_id}-{zone}"
+
+
+def format_turn(moves: Iterable[Move]) -> str:
+    """
+    Ligne d'un tour, par drone_id croissant. Un drone bouge au plus une
+    fois par tour : deux déplacements du même drone ne forment pas une
+    sortie valide (ValueError).
+    """
+    ordered = sorted(moves)
+    for (drone_id, _), (other, _) in zip(ordered, ordered[1:]):
+        if drone_id == other:
+            raise ValueError(f"D{drone_id} moves twice in one turn")
+    return " ".join(format_move(i, zone) for i, zone in ordered)
+
+
+class MoveWriter:
+    """
+    Écrit les lignes de tour dans out par blocs : elles s'accumulent en
+    mémoire et partent en un seul out.write dès que buffer_size
+    caractères sont en attente, puis à flush() ou close(). Aucun appel
+    d'écriture par déplacement, ni même par tour.
+    """
+
+    def __init__(self, out: TextIO, buffer_size: int = DEFAULT_BUFFER):
+        self.out = out
+        self.buffer_size = buffer_size
+        self.turns = 0
+        self._lines: List[str] = []
+        self._pending = 0
+
+    def write_turn(self, moves: Iterable[Move]) -> None:
+        """Ajoute la ligne d'un tour (vide si personne n'a bougé)."""
+        line = format_turn(moves) + "\n"
+        self._lines.append(line)
+        self._pending += len(line)
+        self.turns += 1
+        if self._pending >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._lines:
+            self.out.write("".join(self._lines))
+            self._lines = []
+            self._pending = 0
+        self.out.flush()
+
+    def close(self) -> None:
+        """Vide le tampon ; out reste ouvert (il appartient à l'appelant)."""
+        self.flush()
+
+    def __enter__(self) -> "MoveWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,220 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+
+# Instrumentation de la chaîne lex → parse → validate → plan → simulate.
+#
+# Tout passe par l'instance unique metrics. Désactivée (par défaut),
+# chaque point de mesure se résume à un test de metrics.enabled : les
+# appelants font « if metrics.enabled: ... » avant tout calcul.
+
+JSONL = "jsonl"
+CHROME = "chrome"
+ENV_VAR = "FLY_IN_LOG"
+
+
+class Histogram:
+    """Effectifs par puissance de deux (0, 1, 2, 4, 8...) des valeurs."""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        bucket = 0 if value < 1 else 1 << (int(value).bit_length() - 1)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": {str(k): v for k, v in sorted(self.buckets.items())},
+        }
+
+
+class Metrics:
+    """
+    Chronos de phase, compteurs et histogrammes par tour.
+
+    - phase(nom) chronomètre un bloc ; add_time cumule une durée mesurée
+      ailleurs (le lexer, entrelacé avec le parser) ;
+    - count(nom, n) incrémente un compteur global et celui du tour ;
+    - les temps « plan » et « simulate » sont cumulés par tour ;
+    - end_turn() clôt un tour : ses compteurs et sa durée vont dans les
+      histogrammes et, en JSON lines, une ligne par tour est écrite.
+    En CHROME, les phases et tours deviennent des événements « X » et
+    les compteurs par tour des événements « C », écrits à close().
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.format = JSONL
+        self._out: Optional[IO[str]] = None
+        self._events: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self.reset()
+
+    def reset(self) -> None:
+        self.counters: Dict[str, int] = {}
+        self.turn_counters: Dict[str, int] = {}
+        self.turn_times: Dict[str, float] = {}
+        self.phases: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.turn = 0
+        self._turn_start = time.perf_counter()
+
+    def enable(self, path: Optional[str] = None,
+               fmt: Optional[str] = None) -> None:
+        """
+        Active la mesure ; si path est donné, y écrit les événements au
+        format fmt (déduit de l'extension : .json → CHROME, sinon JSONL).
+        """
+        self.close()
+        self.reset()
+        if fmt is None:
+            fmt = CHROME if path and path.endswith(".json") else JSONL
+        if fmt not in (JSONL, CHROME):
+            raise ValueError(f"Unknown log format '{fmt}'")
+        self.format = fmt
+        self._out = open(path, "w") if path else None
+        self._events = []
+        self._origin = time.perf_counter()
+        self.enabled = True
+
+    def enable_from_env(self) -> bool:
+        """Active la mesure si FLY_IN_LOG donne un fichier de sortie."""
+        path = os.environ.get(ENV_VAR)
+        if path:
+            self.enable(path)
+        return bool(path)
+
+    def disable(self) -> None:
+        """Écrit le résumé, ferme la sortie et coupe la mesure."""
+        self.close()
+        self.enabled = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Chronomètre le bloc ; ne mesure rien si désactivé."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started, started)
+
+    def add_time(self, name: str, seconds: float,
+                 started: Optional[float] = None, emit: bool = True) -> None:
+        """
+        Cumule seconds dans la phase name (started : début, si connu).
+        emit=False pour les phases répétées dans un tour (plan,
+        simulate) : leur total du tour figure dans l'enregistrement du
+        tour au lieu d'un événement chacune.
+        """
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        if emit:
+            self._emit({"type": "phase", "name": name, "duration": seconds},
+                       name, started, seconds)
+        else:
+            self.turn_times[name] = self.turn_times.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+        self.turn_counters[name] = self.turn_counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float) -> None:
+        """Ajoute value à l'histogramme name."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add(value)
+
+    def end_turn(self) -> None:
+        """Clôt le tour courant : histogrammes, ligne ou événement."""
+        now = time.perf_counter()
+        duration = now - self._turn_start
+        self.observe("turn_us", duration * 1e6)
+        for name, value in self.turn_counters.items():
+            self.observe(name, value)
+        for name, seconds in self.turn_times.items():
+            self.observe(name + "_us", seconds * 1e6)
+        record = {
+            "type": "turn", "turn": self.turn, "duration": duration,
+            "times": self.turn_times, "counters": self.turn_counters,
+        }
+        self._emit(record, "turn", self._turn_start, duration)
+        if self.format == CHROME and self.turn_counters:
+            self._events.append({
+                "name": "turn_counters", "ph": "C", "pid": 1, "tid": 1,
+                "ts": self._us(self._turn_start), "args": self.turn_counters,
+            })
+        self.turn += 1
+        self.turn_counters = {}
+        self.turn_times = {}
+        self._turn_start = now
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "type": "summary",
+            "turns": self.turn,
+            "phases": self.phases,
+            "counters": self.counters,
+            "histograms": {
+                name: h.to_dict() for name, h in self.histograms.items()
+            },
+        }
+
+    def close(self) -> None:
+        """Écrit le résumé (JSON lines) ou la trace (Chrome) et ferme."""
+        out, self._out = self._out, None
+        if out is None:
+            return
+        with out:
+            if self.format == JSONL:
+                out.write(json.dumps(self.summary()) + "\n")
+            else:
+                self._events.append({
+                    "name": "summary", "ph": "i", "s": "g", "pid": 1,
+                    "tid": 1, "ts": self._us(time.perf_counter()),
+                    "args": self.summary(),
+                })
+                json.dump({"traceEvents": self._events}, out)
+        self._events = []
+
+    def _emit(self, record: Dict[str, Any], name: str,
+              started: Optional[float], seconds: float) -> None:
+        if self._out is None:
+            return
+        if self.format == JSONL:
+            self._out.write(json.dumps(record) + "\n")
+        else:
+            if started is None:
+                # durée cumulée (lexer) : placée juste avant maintenant
+                started = time.perf_counter() - seconds
+            self._events.append({
+                "name": name, "ph": "X", "pid": 1,
+                "tid": 1 if record["type"] == "turn" else 2,
+                "ts": self._us(started), "dur": seconds * 1e6,
+                "args": dict(record.get("times", {}),
+                             **record.get("counters", {})),
+            })
+
+    def _us(self, clock: float) -> float:
+        return (clock - self._origin) * 1e6
+
+
+metrics = Metrics()
@@ -0,0 +1,256 @@
+from typing import Any, List, Optional, Sequence, Tuple
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import EllipseCollection, LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.patches import Patch
+from src.models.drone import Drone, DroneState
+from src.models.graph import Graph
+from src.models.zone import Zone, ZoneType
+
+
+# Dessin par lots : une LineCollection pour tous les liens, une
+# EllipseCollection pour toutes les zones, coordonnées en tableaux
+# NumPy. Le coût ne dépend plus du nombre d'artistes matplotlib.
+
+ZONE_COLOR = {
+    ZoneType.NORMAL: "#00bcd4",
+    ZoneType.PRIORITY: "#4caf50",
+    ZoneType.RESTRICTED: "#f44336",
+    ZoneType.BLOCKED: "#616161",
+}
+START_COLOR = "#69f0ae"
+GOAL_COLOR = "#ffd740"
+DRONE_COLOR = "#ff4081"
+BACKGROUND = "#1a1a2e"
+ZONE_RADIUS = 0.5
+# Au-delà de ce nombre de zones visibles, seuls départ et arrivée sont
+# nommés : les étiquettes suivent le zoom.
+LABEL_LIMIT = 200
+
+Positions = np.ndarray
+
+
+class MapRenderer:
+    """
+    Carte dessinée en quelques artistes, dans une fenêtre ou un fichier.
+
+    Les liens viennent de l'adjacence CSR du graphe compilé (chaque lien
+    une fois, u < v) ; aucun ensemble Python n'est construit. Les noms
+    des zones ne sont dessinés que si au plus label_limit zones sont
+    dans la vue.
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        start: Optional[Zone] = None,
+        goal: Optional[Zone] = None,
+        label_limit: int = LABEL_LIMIT,
+    ) -> None:
+        compiled = graph.freeze()
+        self.names = compiled.names
+        self.label_limit = label_limit
+        self.xy = np.column_stack((
+            np.asarray(compiled.x, dtype=float),
+            np.asarray(compiled.y, dtype=float),
+        ))
+
+        palette = np.zeros((max(t.value for t in ZoneType) + 1, 4))
+        for z_type, color in ZONE_COLOR.items():
+            palette[z_type.value] = to_rgba(color)
+        self.colors = palette[np.asarray(compiled.zone_type, dtype=np.intp)]
+        self.terminals: List[int] = []
+        for zone, color in ((start, START_COLOR), (goal, GOAL_COLOR)):
+            if zone is not None:
+                zone_id = compiled.id_of(zone.name)
+                self.colors[zone_id] = to_rgba(color)
+                self.terminals.append(zone_id)
+
+        offsets = np.asarray(compiled.offsets, dtype=np.intp)
+        neighbours = np.asarray(compiled.neighbours, dtype=np.intp)
+        sources = np.repeat(np.arange(len(self.names)), np.diff(offsets))
+        once = sources < neighbours
+        self.segments = np.stack(
+            (self.xy[sources[once]], self.xy[neighbours[once]]), axis=1
+        )
+        self._labels: List[Any] = []
+
+    def draw(self, ax: Axes) -> None:
+        """Dessine liens, zones, légende et étiquettes dans ax."""
+        ax.set_facecolor(BACKGROUND)
+        ax.set_title("Drone Network Map", color="white", fontsize=14,
+                     fontweight="bold")
+        ax.set_xlabel("X", color="white")
+        ax.set_ylabel("Y", color="white")
+        ax.tick_params(colors="white")
+        for spine in ax.spines.values():
+            spine.set_edgecolor("#444466")
+
+        # une vue (2, 2) par lien : LineCollection attend une séquence
+        ax.add_collection(LineCollection(
+            list(self.segments), colors="#aaaacc", linewidths=1.5,
+            linestyles="--", zorder=1,
+        ))
+        diameter = np.full(len(self.xy), 2 * ZONE_RADIUS)
+        ax.add_collection(EllipseCollection(
+            diameter, diameter, np.zeros(len(self.xy)), units="xy",
+            offsets=self.xy, offset_transform=ax.transData,
+            facecolors=self.colors, edgecolors="white", linewidths=1.5,
+            zorder=2,
+        ))
+        ax.legend(
+            handles=[
+                Patch(color=START_COLOR, label="Start"),
+                Patch(color=GOAL_COLOR, label="Goal"),
+            ] + [
+                Patch(color=color, label=z_type.name.capitalize())
+                for z_type, color in ZONE_COLOR.items()
+            ],
+            loc="upper left", facecolor="#2a2a4a", labelcolor="white",
+            fontsize=9,
+        )
+
+        pad = 1.5
+        if len(self.xy):
+            low, high = self.xy.min(axis=0), self.xy.max(axis=0)
+            ax.set_xlim(low[0] - pad, high[0] + pad)
+            ax.set_ylim(low[1] - pad, high[1] + pad)
+        ax.set_aspect("equal")
+        self._update_labels(ax)
+        ax.callbacks.connect("xlim_changed", self._update_labels)
+        ax.callbacks.connect("ylim_changed", self._update_labels)
+
+    def _update_labels(self, ax: Axes) -> None:
+        """Nomme les zones visibles, ou seulement départ et arrivée."""
+        for label in self._labels:
+            label.remove()
+        (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        x, y = self.xy[:, 0], self.xy[:, 1]
+        visible = np.flatnonzero((x >= x0) & (x <= x1) & (y >= y0)
+                                 & (y <= y1))
+        if len(visible) <= self.label_limit:
+            shown = visible.tolist()
+        else:
+            in_view = set(visible.tolist())
+            shown = [i for i in self.terminals if i in in_view]
+        self._labels = [
+            ax.text(
+                self.xy[i, 0], self.xy[i, 1], self.names[i],
+                ha="center", va="center", fontsize=8, fontweight="bold",
+                color="white", zorder=3,
+            )
+            for i in shown
+        ]
+
+    def figure(self, size: Tuple[float, float] = (10, 8),
+               dpi: float = 100) -> Figure:
+        """Figure dessinée sans pyplot ni fenêtre (canevas Agg)."""
+        fig = Figure(figsize=size, dpi=dpi, facecolor=BACKGROUND,
+                     layout="tight")
+        FigureCanvasAgg(fig)
+        self.draw(fig.add_subplot())
+        return fig
+
+    def save(self, path: str, dpi: float = 100) -> None:
+        """Écrit la carte dans path (format d'après l'extension)."""
+        self.figure(dpi=dpi).savefig(path, facecolor=BACKGROUND)
+
+    def show(self) -> None:
+        """Ouvre la carte dans une fenêtre matplotlib."""
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=(10, 8), facecolor=BACKGROUND)
+        self.draw(fig.add_subplot())
+        fig.tight_layout()
+        plt.show()
+
+
+def drone_positions(drones: Sequence[Drone]) -> Positions:
+    """(x, y) de chaque drone ; un drone en transit est mi-chemin."""
+    positions = np.zeros((len(drones), 2))
+    for i, drone in enumerate(drones):
+        zone = drone.current_zone
+        if zone is None:
+            positions[i] = np.nan
+            continue
+        target = drone.transit_target
+        if drone.state == DroneState.IN_TRANSIT and target is not None:
+            positions[i] = ((zone.x + target.x) / 2, (zone.y + target.y) / 2)
+        else:
+            positions[i] = (zone.x, zone.y)
+    return positions
+
+
+def record_run(manager: Any, drones: Sequence[Drone],
+               max_turns: int = 10000) -> List[Positions]:
+    """
+    Joue les tours de manager (un TurnManager) jusqu'à l'arrivée de tous
+    les drones ; positions avant le premier tour puis après chacun.
+    """
+    frames = [drone_positions(drones)]
+    while len(frames) <= max_turns and not all(
+        d.is_at_destination(d.goal) for d in drones
+    ):
+        manager.run_turn()
+        frames.append(drone_positions(drones))
+    return frames
+
+
+def write_animation(renderer: MapRenderer, frames: Sequence[Positions],
+                    path: str, fps: int = 4, dpi: float = 100) -> None:
+    """
+    Rejoue frames (voir record_run) dans path.
+
+    La carte est dessinée une fois ; chaque image restaure ce fond et ne
+    dessine que les drones et le numéro de tour. En .gif les images
+    sont assemblées par Pillow ; les autres formats passent par un
+    writer matplotlib (ffmpeg...), qui redessine toute la figure.
+    """
+    fig = renderer.figure(dpi=dpi)
+    ax = fig.axes[0]
+    dots = ax.scatter([], [], s=30, color=DRONE_COLOR, edgecolors="white",
+                      linewidths=0.5, zorder=4, animated=True)
+    turn = ax.text(0.99, 0.01, "", transform=ax.transAxes, ha="right",
+                   va="bottom", color="white", zorder=4, animated=True)
+
+    def update(index: int) -> List[Any]:
+        dots.set_offsets(frames[index])
+        turn.set_text(f"turn {index}")
+        return [dots, turn]
+
+    if not path.lower().endswith(".gif"):
+        from matplotlib.animation import FuncAnimation
+
+        FuncAnimation(fig, update, frames=len(frames), blit=True).save(
+            path, fps=fps, dpi=dpi
+        )
+        return
+
+    from PIL import Image
+
+    canvas = fig.canvas
+    assert isinstance(canvas, FigureCanvasAgg)
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    size = canvas.get_width_height()
+    images = []
+    palette = None
+    for index in range(len(frames)):
+        canvas.restore_region(background)
+        for artist in update(index):
+            ax.draw_artist(artist)
+        image = Image.frombuffer(
+            "RGBA", size, canvas.buffer_rgba(), "raw", "RGBA", 0, 1
+        ).convert("RGB")
+        # palette commune : images quatre fois plus petites en mémoire
+        if palette is None:
+            palette = image.quantize(colors=64)
+        images.append(image.quantize(palette=palette))
+    if images:
+        images[0].save(
+            path, save_all=True, append_images=images[1:],
+            duration=int(1000 / fps), loop=0,
+        )
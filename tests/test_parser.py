@@ -0,0 +1,216 @@
+import os
+import pytest
+from src.benchmark import harness
+from src.benchmark.generator import SHAPES, iter_map_lines, write_map as gen
+from src.models.zone import ZoneType
+from src.parser.binary_map import (
+    CACHE_ENV_VAR, SUFFIX, StaleMapError, default_compiled_path, load_map,
+    read_compiled_map, write_compiled_map,
+)
+from src.parser.lexer import EMPTY_METADATA, Lexer
+from src.parser.parser import Parser, parse_file
+from src.parser.validator import Validator
+
+
+MAP = """# generated map
+nb_drones: 3
+
+start_hub: hub 0 0 [color=green]
+# zones
+end_hub: goal 2 0
+hub: a 1 0 [zone=restricted max_drones=2]
+connection: hub-a
+connection: a-goal [max_link_capacity=2]
+"""
+
+
+def write_map(tmp_path, text: str) -> str:
+    path = tmp_path / "map.txt"
+    path.write_text(text)
+    return str(path)
+
+
+def test_tokens_keep_file_line_numbers(tmp_path):
+    tokens = list(Lexer(write_map(tmp_path, MAP)).iter_tokens())
+    assert [t.line_number for t in tokens] == [2, 4, 6, 7, 8, 9]
+    assert tokens[-1].value == ("a", "goal")
+    assert tokens[-1].metadata == {"max_link_capacity": "2"}
+
+
+def test_tokens_are_slotted_and_share_empty_metadata(tmp_path):
+    tokens = list(Lexer(write_map(tmp_path, MAP)).iter_tokens())
+    assert not hasattr(tokens[0], "__dict__")
+    assert tokens[2].metadata is EMPTY_METADATA
+    assert tokens[4].metadata is EMPTY_METADATA
+
+
+def test_errors_report_original_line(tmp_path):
+    path = write_map(tmp_path, MAP + "\n# bad\nhub: broken x 0\n")
+    with pytest.raises(ValueError, match="line 12"):
+        parse_file(path)
+    path = write_map(tmp_path, MAP + "connection: a-nowhere\n")
+    with pytest.raises(ValueError, match="Line 10"):
+        parse_file(path)
+
+
+def test_streaming_parse_matches_list_parse(tmp_path):
+    path = write_map(tmp_path, MAP)
+    lexer = Lexer(path)
+    lexer.read_file()
+    listed = Parser(lexer.tokenize()).parse()
+    streamed = parse_file(path)
+    assert list(streamed.graph.zones) == list(listed.graph.zones)
+    assert streamed.graph.connections == listed.graph.connections
+    assert streamed.graph.zones["a"].capacity == 2
+    assert streamed.nb_drones == 3
+
+
+def test_terminal_hubs_hold_the_whole_fleet(tmp_path):
+    config = parse_file(write_map(tmp_path, MAP))
+    assert config.start_zone.capacity == config.goal_zone.capacity == 3
+    text = MAP.replace("end_hub: goal 2 0", "end_hub: goal 2 0 [max_drones=1]")
+    assert parse_file(write_map(tmp_path, text)).goal_zone.capacity == 1
+
+
+def test_parser_keeps_link_capacities(tmp_path):
+    graph = parse_file(write_map(tmp_path, MAP)).graph
+    assert graph.link_capacity("goal", "a") == 2
+    assert graph.link_capacity("hub", "a") == 1
+    compiled = graph.freeze()
+    link = compiled.link_between(compiled.id_of("a"), compiled.id_of("goal"))
+    assert compiled.link_capacity[link] == 2
+
+
+def test_compiled_map_round_trip_is_zero_copy(tmp_path):
+    path = write_map(tmp_path, MAP)
+    target = str(tmp_path / "map.flymap")
+    config = parse_file(path)
+    write_compiled_map(config, target, path)
+    loaded = read_compiled_map(target, path)
+    compiled, expected = loaded.compiled, config.graph.freeze()
+    assert isinstance(compiled.neighbours, memoryview)
+    assert compiled.names == expected.names
+    for name in ("x", "y", "zone_type", "capacity", "move_cost", "offsets",
+                 "neighbours", "edge_link", "link_capacity"):
+        assert list(getattr(compiled, name)) == list(getattr(expected, name))
+
+    rebuilt = loaded.to_config()
+    assert rebuilt.graph.capacities == config.graph.capacities
+    assert rebuilt.graph.freeze() is compiled
+    assert rebuilt.graph.connections == config.graph.connections
+    assert rebuilt.start_zone.name == "hub"
+    assert rebuilt.goal_zone.color is None
+    assert rebuilt.graph.zones["hub"].color == "green"
+    rebuilt.graph.zones["a"].z_type = ZoneType.BLOCKED
+    assert not compiled.is_accessible(compiled.id_of("a"))
+
+
+def test_stale_compiled_map_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_ENV_VAR, str(tmp_path / "cache"))
+    path = write_map(tmp_path, MAP)
+    target = default_compiled_path(path)
+    assert load_map(path).nb_drones == 3
+    assert os.path.dirname(target) == str(tmp_path / "cache")
+    assert not os.path.exists(path + SUFFIX)
+    assert read_compiled_map(target, path).nb_drones == 3
+    write_map(tmp_path, MAP.replace("nb_drones: 3", "nb_drones: 7"))
+    with pytest.raises(StaleMapError):
+        read_compiled_map(target, path)
+    assert load_map(path).nb_drones == 7
+    assert read_compiled_map(target, path).nb_drones == 7
+
+
+def test_load_map_skips_cache_it_cannot_or_should_not_write(tmp_path):
+    path = write_map(tmp_path, MAP + "hub: a 5 5\n")
+    target = str(tmp_path / "map.flymap")
+    config = load_map(path, target)
+    assert config.duplicate_zones == [("a", 10)]
+    assert not os.path.exists(target)
+    with pytest.raises(ValueError, match="duplicate zones"):
+        write_compiled_map(config, target, path)
+    path = write_map(tmp_path, MAP)
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("")
+    assert load_map(path, str(blocker / "map.flymap")).nb_drones == 3
+
+
+def codes(report) -> list:
+    return sorted((i.code, i.zone) for i in report.issues)
+
+
+def test_validator_accepts_valid_map(tmp_path):
+    report = Validator(parse_file(write_map(tmp_path, MAP))).validate()
+    assert report.ok and not report.issues
+    assert report.reachable == {"hub", "a", "goal"}
+    report.raise_for_errors()
+
+
+def test_validator_reports_every_problem(tmp_path):
+    text = MAP + """hub: a 5 5
+hub: x 3 0 [zone=blocked]
+hub: d1 0 1
+hub: d2 0 2
+hub: island 9 9
+connection: a-a
+connection: hub-a
+connection: a-x
+connection: hub-d1
+connection: d1-d2
+"""
+    report = Validator(parse_file(write_map(tmp_path, text))).validate()
+    assert codes(report) == [
+        ("blocked_link", "x"),
+        ("dead_end", "d1"),
+        ("dead_end", "d2"),
+        ("duplicate_connection", "a"),
+        ("duplicate_zone", "a"),
+        ("self_loop", "a"),
+        ("unreachable_zone", "island"),
+    ]
+    assert report.dead_ends == {"d1", "d2"}
+    assert "Line 10" in report.errors[0].message
+    with pytest.raises(ValueError, match="self_loop"):
+        report.raise_for_errors()
+
+
+def test_validator_reports_unreachable_goal(tmp_path):
+    text = MAP.replace("connection: a-goal [max_link_capacity=2]\n", "")
+    report = Validator(parse_file(write_map(tmp_path, text))).validate()
+    assert codes(report) == [("unreachable_goal", "goal")]
+    assert not report.ok
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_generated_maps_are_seeded_and_valid(tmp_path, shape):
+    args = (shape, 200, 7, 3, 0.1, 0.1, 0.2)
+    assert list(iter_map_lines(*args)) == list(iter_map_lines(*args))
+    assert list(iter_map_lines(*args)) != list(
+        iter_map_lines(shape, 200, 7, 4, 0.1, 0.1, 0.2)
+    )
+    path = str(tmp_path / "gen.txt")
+    gen(path, *args)
+    config = parse_file(path)
+    assert config.nb_drones == 7
+    assert 150 <= len(config.graph.zones) <= 260
+    assert Validator(config).validate().ok
+
+
+def test_benchmark_compare_flags_regressions_beyond_threshold():
+    baseline = {"grid": {"parser": 0.10, "lexer": 0.0001}}
+    current = {"grid": {"parser": 0.13, "lexer": 0.0005, "new": 1.0}}
+    regressions = harness.compare(current, baseline, threshold=0.2)
+    # lexer: x5, but under the noise floor; "new" has no baseline
+    assert [(r.case, r.metric) for r in regressions] == [("grid", "parser")]
+    assert harness.compare(current, baseline, threshold=0.5) == []
+
+
+def test_benchmark_suite_times_every_stage(tmp_path):
+    results = harness.run_suite([("fork", 30, 3)], repeat=1,
+                                directory=str(tmp_path))
+    metrics = results["fork-30-3"]
+    assert {"lexer", "parser", "route_bfs", "route_astar", "turn_manager",
+            "simulator_tick"} <= set(metrics)
+    assert all(value >= 0 for value in metrics.values())
+    baseline = str(tmp_path / "baseline.json")
+    harness.save_baseline(results, baseline)
+    assert harness.load_baseline(baseline) == results
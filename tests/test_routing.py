@@ -0,0 +1,523 @@
+import heapq
+import os
+import random
+from collections import Counter
+import pytest
+from src.models.drone import Drone
+from src.models.graph import Graph
+from src.models.zone import Zone, ZoneType
+from src.parser.parser import parse_file
+from src.routing.cost_model import cost_model
+from src.routing.distance_field import DistanceField
+from src.routing.flow import plan_flow
+from src.routing.parallel import ParallelPlanner
+from src.routing.pathfinder import DijkstraPathfinder, assign_by_load
+from src.routing.scheduler import Scheduler
+from src.routing.strategies import get_strategy
+from src.routing.strategies.astar import AStar
+from src.routing.strategies.bfs import BFS
+from src.routing.strategies.dijkstra import Dijkstra
+from src.routing.strategies.dstar_lite import DStarLite
+from src.routing.strategies.hpa import HPAStar
+from src.simulation.simulator import Simulator
+from src.simulation.turn_manager import TurnManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_graph() -> Graph:
+    """hub -> a -> goal, with a blocked detour hub -> x -> goal."""
+    graph = Graph()
+    graph.add_zone(Zone("hub", 0, 0, capacity=5))
+    graph.add_zone(Zone("a", 1, 0))
+    graph.add_zone(Zone("x", 0, 1, z_type=ZoneType.BLOCKED))
+    graph.add_zone(Zone("goal", 2, 0, capacity=5))
+    graph.add_connection("hub", "a")
+    graph.add_connection("a", "goal")
+    graph.add_connection("hub", "x")
+    graph.add_connection("x", "goal")
+    return graph
+
+
+def test_freeze_builds_csr_adjacency():
+    graph = build_graph()
+    compiled = graph.freeze()
+    assert compiled.num_zones == 4
+    assert compiled.num_links == 4
+    hub = compiled.id_of("hub")
+    assert compiled.names_of(compiled.neighbour_ids(hub)) == ["a", "x"]
+    assert not compiled.is_accessible(compiled.id_of("x"))
+    assert graph.freeze() is compiled
+    graph.add_zone(Zone("y", 3, 3))
+    assert graph.freeze() is not compiled
+
+
+def test_bfs_route_ids_matches_zone_route():
+    graph = build_graph()
+    bfs = BFS(graph)
+    compiled = graph.freeze()
+    route = bfs.find_route(graph.zones["hub"], graph.zones["goal"])
+    ids = bfs.find_route_ids(compiled.id_of("hub"), compiled.id_of("goal"))
+    assert [z.name for z in route] == compiled.names_of(ids)
+
+
+def test_bfs_route_ids_respects_compiled_occupancy():
+    graph = build_graph()
+    compiled = graph.freeze()
+    graph.zones["a"].occupy(1)
+    assert compiled.occupancy[compiled.id_of("a")] == 1
+    bfs = BFS(graph)
+    hub, goal = compiled.id_of("hub"), compiled.id_of("goal")
+    assert bfs.find_route_ids(hub, goal) is None
+    graph.zones["a"].vacate(1)
+    assert bfs.find_route_ids(hub, goal) is not None
+
+
+def test_routing_avoids_saturated_first_hop_only():
+    graph = build_graph()
+    graph.zones["x"].z_type = ZoneType.NORMAL
+    graph.use_link("hub", "a")
+    assert not graph.link_available("hub", "a")
+    compiled = graph.freeze()
+    hub, goal = compiled.id_of("hub"), compiled.id_of("goal")
+    for strategy in (BFS(graph), Dijkstra(graph), DStarLite(graph),
+                     HPAStar(graph, tile=1)):
+        route = strategy.find_route(graph.zones["hub"], graph.zones["goal"])
+        assert [z.name for z in route] == ["hub", "x", "goal"]
+        assert compiled.names_of(strategy.find_route_ids(hub, goal)) == [
+            "hub", "x", "goal"]
+    # a saturated link further along is free again by the time it is used
+    graph.zones["goal"].z_type = ZoneType.BLOCKED
+    route = Dijkstra(graph).find_route(graph.zones["x"], graph.zones["a"])
+    assert [z.name for z in route] == ["x", "hub", "a"]
+    graph.next_turn()
+    assert graph.link_available("hub", "a")
+
+
+def test_compiled_view_follows_zone_type_changes():
+    graph = build_graph()
+    dijkstra = Dijkstra(graph)
+    hub, goal = graph.zones["hub"], graph.zones["goal"]
+    assert [z.name for z in dijkstra.find_route(hub, goal)] == [
+        "hub", "a", "goal"
+    ]
+    graph.zones["a"].z_type = ZoneType.BLOCKED
+    assert dijkstra.find_route(hub, goal) is None
+    graph.zones["x"].z_type = ZoneType.RESTRICTED
+    compiled = graph.freeze()
+    assert compiled.move_cost[compiled.id_of("x")] == 2
+    assert [z.name for z in dijkstra.find_route(hub, goal)] == [
+        "hub", "x", "goal"
+    ]
+
+
+def build_grid(size: int) -> Graph:
+    """size x size 4-connected grid of normal zones named g<x>_<y>."""
+    graph = Graph()
+    for x in range(size):
+        for y in range(size):
+            graph.add_zone(Zone(f"g{x}_{y}", x, y))
+    for x in range(size):
+        for y in range(size):
+            if x + 1 < size:
+                graph.add_connection(f"g{x}_{y}", f"g{x + 1}_{y}")
+            if y + 1 < size:
+                graph.add_connection(f"g{x}_{y}", f"g{x}_{y + 1}")
+    return graph
+
+
+def route_cost(route) -> int:
+    return sum(z.get_movement_cost() for z in route[1:])
+
+
+def test_dijkstra_avoids_restricted_detour():
+    graph = Graph()
+    graph.add_zone(Zone("hub", 0, 0))
+    graph.add_zone(Zone("roof1", 1, 1, z_type=ZoneType.RESTRICTED))
+    graph.add_zone(Zone("roof2", 2, 1, z_type=ZoneType.RESTRICTED))
+    for i, name in enumerate(["a", "b", "c"]):
+        graph.add_zone(Zone(name, i + 1, 0))
+    graph.add_zone(Zone("goal", 4, 1))
+    for u, v in [("hub", "roof1"), ("roof1", "roof2"), ("roof2", "goal"),
+                 ("hub", "a"), ("a", "b"), ("b", "c"), ("c", "goal")]:
+        graph.add_connection(u, v)
+    start, goal = graph.zones["hub"], graph.zones["goal"]
+    assert len(BFS(graph).find_route(start, goal)) == 4
+    route = Dijkstra(graph).find_route(start, goal)
+    assert [z.name for z in route] == ["hub", "a", "b", "c", "goal"]
+
+
+def test_priority_zones_break_ties_at_equal_length():
+    # hub -> a -> goal et hub -> p -> goal (p prioritaire) font 2 tours ;
+    # hub -> q1 -> q2 -> goal, tout prioritaire, en fait 3.
+    graph = Graph()
+    graph.add_zone(Zone("hub", 0, 0))
+    graph.add_zone(Zone("a", 1, 0))
+    graph.add_zone(Zone("p", 1, 1, z_type=ZoneType.PRIORITY))
+    graph.add_zone(Zone("q1", 1, -1, z_type=ZoneType.PRIORITY))
+    graph.add_zone(Zone("q2", 2, -1, z_type=ZoneType.PRIORITY))
+    graph.add_zone(Zone("goal", 2, 0))
+    for u, v in [("hub", "a"), ("a", "goal"), ("hub", "p"), ("p", "goal"),
+                 ("hub", "q1"), ("q1", "q2"), ("q2", "goal")]:
+        graph.add_connection(u, v)
+    start, goal = graph.zones["hub"], graph.zones["goal"]
+    for strategy in (Dijkstra, AStar, DStarLite):
+        route = strategy(graph).find_route(start, goal)
+        assert [z.name for z in route] == ["hub", "p", "goal"]
+    field = DistanceField(graph, goal)
+    assert [z.name for z in field.route_from(start)] == ["hub", "p", "goal"]
+    assert field.distance(start) == 2
+    paths = DijkstraPathfinder(graph).find_k_shortest_paths(start, goal, 3)
+    assert [[z.name for z in p][1] for p in paths] == ["p", "a", "q1"]
+
+    # la prime suit un changement de type
+    graph.zones["a"].z_type = ZoneType.PRIORITY
+    graph.zones["p"].z_type = ZoneType.NORMAL
+    route = Dijkstra(graph).find_route(start, goal)
+    assert [z.name for z in route] == ["hub", "a", "goal"]
+
+
+def test_astar_matches_dijkstra_cost_and_expands_less_than_bfs():
+    graph = build_grid(30)
+    start, goal = graph.zones["g0_0"], graph.zones["g29_29"]
+    bfs, dijkstra, astar = BFS(graph), Dijkstra(graph), AStar(graph)
+    bfs_route = bfs.find_route(start, goal)
+    assert route_cost(astar.find_route(start, goal)) == route_cost(
+        dijkstra.find_route(start, goal)
+    ) == route_cost(bfs_route)
+    assert astar.nodes_expanded < bfs.nodes_expanded // 4
+    assert AStar(graph, metric="euclidean").find_route(start, goal)
+
+
+def test_turn_manager_picks_strategy_by_name():
+    graph = build_graph()
+    manager = TurnManager([], Simulator(graph, []), strategy="astar")
+    assert isinstance(manager.router, AStar)
+    with pytest.raises(ValueError):
+        get_strategy("teleport", graph)
+
+
+def test_pathfinder_honours_blocked_set():
+    graph = build_grid(3)
+    finder = DijkstraPathfinder(graph)
+    route = finder.find_path(
+        graph.zones["g0_0"], graph.zones["g2_0"], blocked_zones={"g1_0"}
+    )
+    assert "g1_0" not in [z.name for z in route]
+    assert len(route) == 5
+
+
+def simple_path_costs(graph: Graph, start: str, goal: str) -> list:
+    """Costs of every loop-free path, by exhaustive search."""
+    costs = []
+
+    def walk(name, seen, cost):
+        if name == goal:
+            costs.append(cost)
+            return
+        for other in graph.connections[name]:
+            zone = graph.zones[other]
+            if other not in seen and zone.is_accessible():
+                walk(other, seen | {other}, cost + zone.get_movement_cost())
+
+    walk(start, {start}, 0)
+    return sorted(costs)
+
+
+def test_k_shortest_paths_follow_yen_order():
+    graph = build_grid(3)
+    graph.zones["g1_1"].z_type = ZoneType.RESTRICTED
+    finder = DijkstraPathfinder(graph)
+    start, goal = graph.zones["g0_0"], graph.zones["g2_2"]
+    paths = finder.find_k_shortest_paths(start, goal, 6)
+    assert [route_cost(p) for p in paths] == simple_path_costs(
+        graph, "g0_0", "g2_2")[:6]
+    assert len({tuple(z.name for z in p) for p in paths}) == 6
+    # cached per map until a zone changes type
+    assert finder.find_k_shortest_paths(start, goal, 6) == paths
+    graph.zones["g1_0"].z_type = ZoneType.BLOCKED
+    assert all(graph.zones["g1_0"] not in p
+               for p in finder.find_k_shortest_paths(start, goal, 6))
+
+
+def test_disjoint_paths_share_no_zone_and_load_is_spread():
+    config = load_map()
+    finder = DijkstraPathfinder(config.graph)
+    paths = finder.find_k_shortest_paths(
+        config.start_zone, config.goal_zone, 3, disjoint=True
+    )
+    assert [[z.name for z in p] for p in paths] == [
+        ["hub", "corridorA", "tunnelB", "goal"],
+        ["hub", "roof1", "roof2", "goal"],
+    ]
+    # both corridors pass one drone per turn; the roof costs one more
+    assert assign_by_load(config.graph, paths, 5) == [0, 0, 1, 0, 1]
+
+
+def test_turn_manager_spreads_idle_drones_over_corridors():
+    config = load_map()
+    drones = [
+        Drone(i, path=[config.start_zone], goal=config.goal_zone)
+        for i in range(1, config.nb_drones + 1)
+    ]
+    manager = TurnManager(drones, Simulator(config.graph, drones))
+    manager.spread_routes(k=2)
+    assert sum(config.graph.zones["roof1"] in d.path for d in drones) == 2
+    turns = 0
+    while not all(d.is_at_destination(d.goal) for d in drones):
+        manager.run_turn()
+        turns += 1
+        assert turns < 20
+
+
+def load_map(name: str = "map.txt"):
+    return parse_file(os.path.join(ROOT, name))
+
+
+def assert_schedule_valid(schedule, start="hub", goal="goal"):
+    compiled = schedule.compiled
+    zones: Counter = Counter()
+    for plan in schedule.plans.values():
+        assert plan[0] == (0, compiled.id_of(start))
+        assert plan[-1][1] == compiled.id_of(goal)
+        for time, zone in plan:
+            if compiled.names[zone] not in (start, goal):
+                zones[(zone, time)] += 1
+    for (zone, _), count in zones.items():
+        assert count <= compiled.capacity[zone]
+
+
+def test_scheduler_respects_zone_and_link_capacities():
+    config = load_map()
+    schedule = Scheduler(
+        config.graph, config.start_zone, config.goal_zone
+    ).plan(config.nb_drones)
+    assert_schedule_valid(schedule)
+    # tunnelB carries one drone per turn, roof1's link is busy two turns
+    # per restricted transit: 4 drones below and 1 above is optimal.
+    assert schedule.turns == 6
+    assert schedule.moves_by_turn()[0] == ["D1-corridorA", "D2-hub-roof1"]
+    assert schedule.turn_moves()[1][:2] == [(1, "tunnelB"), (2, "roof1")]
+
+
+def test_flow_split_matches_scheduler_and_bounds_it():
+    config = load_map()
+    scheduler = Scheduler(config.graph, config.start_zone, config.goal_zone)
+    flow_plan = plan_flow(
+        config.graph, config.start_zone, config.goal_zone, 50
+    )
+    assert len(flow_plan.paths) == 2
+    assert sum(flow_plan.counts) == 50
+    assert flow_plan.lower_bound <= flow_plan.turns
+    schedule = scheduler.plan_from_flow(flow_plan)
+    assert_schedule_valid(schedule)
+    assert schedule.turns == flow_plan.turns == scheduler.plan(50).turns
+
+
+def test_distance_field_routes_by_table_walk():
+    config = load_map()
+    field = DistanceField(config.graph, config.goal_zone)
+    route = field.route_from(config.start_zone)
+    assert [z.name for z in route] == ["hub", "corridorA", "tunnelB", "goal"]
+    assert field.distance(config.graph.zones["roof1"]) == 2
+
+
+def live_distances(graph: Graph, goal: Zone) -> dict:
+    """Reverse Dijkstra on Zone objects: full zones are dead ends."""
+    dist = {name: float("inf") for name in graph.zones}
+    dist[goal.name] = 0
+    heap = [(0, goal.name)]
+    while heap:
+        d, name = heapq.heappop(heap)
+        zone = graph.zones[name]
+        if d > dist[name]:
+            continue
+        if zone is not goal and not (
+            zone.is_accessible() and zone.has_capacity()
+        ):
+            continue
+        for other in graph.connections[name]:
+            step = d + zone.get_movement_cost()
+            if graph.zones[other].is_accessible() and step < dist[other]:
+                dist[other] = step
+                heapq.heappush(heap, (step, other))
+    return dist
+
+
+def test_distance_field_follows_live_zone_changes():
+    graph = build_grid(8)
+    goal = graph.zones["g7_7"]
+    rng = random.Random(7)
+    names = [n for n in graph.zones if n != "g7_7"]
+    for name in rng.sample(names, 12):
+        graph.zones[name].z_type = ZoneType.BLOCKED
+    field = DistanceField(graph, goal)
+    for step in range(80):
+        zone = graph.zones[rng.choice(names)]
+        if step % 2:
+            zone.z_type = (
+                ZoneType.NORMAL if zone.z_type == ZoneType.BLOCKED
+                else ZoneType.BLOCKED
+            )
+        elif zone.current_drones:
+            zone.vacate(1)
+        elif zone.is_accessible():
+            zone.occupy(1)
+        expected = live_distances(graph, goal)
+        assert {n: field.distance(graph.zones[n]) for n in names} == {
+            n: expected[n] for n in names
+        }
+
+
+def test_astar_with_distance_field_expands_only_the_route():
+    graph = build_grid(20)
+    start, goal = graph.zones["g0_0"], graph.zones["g19_19"]
+    astar = AStar(graph, distance_field=DistanceField(graph, goal))
+    route = astar.find_route(start, goal)
+    assert astar.nodes_expanded == len(route)
+
+
+def test_dstar_lite_matches_dijkstra_under_zone_changes():
+    graph = build_grid(8)
+    goals = [graph.zones["g7_7"], graph.zones["g0_7"]]
+    names = [n for n in graph.zones if n not in ("g7_7", "g0_7")]
+    dstar, dijkstra = DStarLite(graph), Dijkstra(graph)
+    rng = random.Random(3)
+    for step in range(150):
+        zone = graph.zones[rng.choice(names)]
+        if step % 3 == 0:
+            zone.z_type = (
+                ZoneType.NORMAL if zone.z_type != ZoneType.NORMAL
+                else rng.choice([ZoneType.BLOCKED, ZoneType.RESTRICTED])
+            )
+        elif zone.current_drones:
+            zone.vacate(1)
+        elif zone.is_accessible():
+            zone.occupy(1)
+        start, goal = graph.zones[rng.choice(names)], rng.choice(goals)
+        route = dstar.find_route(start, goal)
+        expected = dijkstra.find_route(start, goal)
+        assert (route is None) == (expected is None)
+        if route:
+            assert route_cost(route) == route_cost(expected)
+            assert route[0] is start and route[-1] is goal
+            assert all(z.is_accessible() and z.has_capacity()
+                       for z in route[1:])
+
+
+def test_dstar_lite_repairs_only_the_changed_part():
+    graph = build_grid(20)
+    start, goal = graph.zones["g0_0"], graph.zones["g19_19"]
+    dstar = DStarLite(graph)
+    first = dstar.find_route(start, goal)
+    full_search = dstar.nodes_expanded
+    # a drone fills the zone right after the start: small local repair
+    first[1].occupy(1)
+    route = dstar.find_route(start, goal)
+    assert first[1] not in route
+    assert route_cost(route) == route_cost(first)
+    assert dstar.nodes_expanded < full_search // 10
+    first[1].vacate(1)
+    assert route_cost(dstar.find_route(start, goal)) == route_cost(first)
+
+
+@pytest.mark.parametrize("tile", [1, 3, 4, 16])
+def test_hpa_matches_dijkstra_under_zone_changes(tile):
+    graph = build_grid(9)
+    names = list(graph.zones)
+    hpa, dijkstra = HPAStar(graph, tile), Dijkstra(graph)
+    rng = random.Random(tile)
+    for step in range(150):
+        zone = graph.zones[rng.choice(names)]
+        if step % 3 == 0:
+            zone.z_type = rng.choice(list(ZoneType))
+        elif zone.current_drones:
+            zone.vacate(1)
+        elif zone.is_accessible():
+            zone.occupy(1)
+        start = graph.zones[rng.choice(names)]
+        goal = graph.zones[rng.choice(names)]
+        route = hpa.find_route(start, goal)
+        expected = dijkstra.find_route(start, goal)
+        assert (route is None) == (expected is None)
+        if route:
+            compiled = graph.freeze()
+            costs = cost_model(compiled)
+            ids = [compiled.id_of(z.name) for z in route]
+            assert costs.path_weight(ids) == costs.path_weight(
+                [compiled.id_of(z.name) for z in expected])
+            assert route[0] is start and route[-1] is goal
+            assert all(graph.link_available(u.name, v.name)
+                       for u, v in zip(route, route[1:]))
+            assert all(z.is_accessible() and z.has_capacity()
+                       for z in route[1:])
+
+
+def test_hpa_refines_locally_and_rebuilds_only_changed_tiles():
+    graph = build_grid(48)
+    start, goal = graph.zones["g0_0"], graph.zones["g47_47"]
+    hpa, dijkstra = HPAStar(graph, tile=8), Dijkstra(graph)
+    route = hpa.find_route(start, goal)
+    assert route_cost(route) == route_cost(dijkstra.find_route(start, goal))
+    assert hpa.nodes_expanded < dijkstra.nodes_expanded // 2
+    hierarchy = hpa.hierarchy
+    hierarchy.build()
+    built = hierarchy.tiles_rebuilt
+    assert built == len(hierarchy.tiles) == 36
+    # changes inside one tile only rebuild that tile
+    graph.zones["g20_20"].z_type = ZoneType.BLOCKED
+    graph.zones["g21_20"].occupy(1)
+    hierarchy.build()
+    assert hierarchy.tiles_rebuilt == built + 1
+    assert route_cost(hpa.find_route(start, goal)) == route_cost(route)
+
+
+def test_parallel_planner_matches_serial_search_on_a_snapshot():
+    graph = build_grid(8)
+    goal = graph.zones["g7_7"]
+    rng = random.Random(5)
+    zones = [z for z in graph.zones.values() if z is not goal]
+    for zone in rng.sample(zones, 8):
+        zone.z_type = ZoneType.RESTRICTED
+    queries = [(zone, goal) for zone in zones]
+    dijkstra = Dijkstra(graph)
+    with ParallelPlanner(graph, workers=2) as planner:
+        for step in range(3):
+            routes = planner.plan(queries)
+            assert routes == [dijkstra.find_route(s, g) for s, g in queries]
+            # l'instantané suivant voit l'occupation et les types changés
+            graph.zones[f"g{step + 3}_{step + 3}"].occupy(1)
+            graph.zones[f"g6_{step}"].z_type = ZoneType.PRIORITY
+
+
+def test_turn_manager_plans_passes_in_the_pool():
+    def run(pooled):
+        graph = build_grid(5)
+        graph.zones["g4_4"].capacity = 20
+        drones = [
+            Drone(i, path=[graph.zones[f"g0_{i % 5}"]],
+                  goal=graph.zones["g4_4"])
+            for i in range(1, 11)
+        ]
+        planner = ParallelPlanner(
+            graph, workers=2, min_batch=1
+        ) if pooled else None
+        manager = TurnManager(drones, Simulator(graph, drones),
+                              strategy="dijkstra", planner=planner)
+        turns = [manager.run_turn() for _ in range(12)]
+        if planner:
+            planner.close()
+        return turns
+
+    assert run(True) == run(False)
+
+
+def test_turn_manager_refuses_a_pool_of_another_strategy():
+    graph = build_grid(3)
+    drones = [Drone(1, path=[graph.zones["g0_0"]], goal=graph.zones["g2_2"])]
+    with ParallelPlanner(graph, workers=2, strategy="astar") as planner:
+        with pytest.raises(ValueError, match="'astar'"):
+            TurnManager(drones, Simulator(graph, drones), planner=planner)
+        manager = TurnManager(drones, Simulator(graph, drones),
+                              strategy="astar", planner=planner)
+        assert manager.planner is planner
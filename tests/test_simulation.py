@@ -0,0 +1,568 @@
+import io
+import json
+import os
+import random
+import pytest
+from src.models.drone import Drone, DroneState
+from src.models.graph import Graph
+from src.models.zone import Zone, ZoneType
+from src.parser.parser import parse_file
+from src.routing.cache import RouteCache
+from src.routing.strategies.bfs import BFS
+from src.simulation import batch
+from src.simulation.simulator import Simulator
+from src.simulation.turn_log import (
+    TurnLog, TurnLogWriter, capture, first_divergence,
+)
+from src.simulation.turn_manager import TurnManager
+from src.visualization.logger import metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_bottleneck() -> Graph:
+    """hub (cap 10) -> a (cap 1) -> goal (cap 10)."""
+    graph = Graph()
+    graph.add_zone(Zone("hub", 0, 0, capacity=10))
+    graph.add_zone(Zone("a", 1, 0))
+    graph.add_zone(Zone("goal", 2, 0, capacity=10))
+    graph.add_connection("hub", "a")
+    graph.add_connection("a", "goal")
+    return graph
+
+
+def make_drones(graph: Graph, count: int, start: str = "hub",
+                goal: str = "goal"):
+    return [
+        Drone(i, path=[graph.zones[start]], goal=graph.zones[goal])
+        for i in range(1, count + 1)
+    ]
+
+
+def test_full_version_bumps_only_when_full_set_changes():
+    graph, other = Graph(), Graph()
+    zone = Zone("z", 0, 0, capacity=2)
+    graph.add_zone(zone)
+    zone.occupy(1)
+    assert graph.full_version == 0
+    zone.occupy(2)
+    assert graph.full_version == 1
+    zone.occupy(2)
+    assert graph.full_version == 1
+    zone.vacate(2)
+    assert graph.full_version == 2
+    zone.vacate(1)
+    assert graph.full_version == 2
+    zone.z_type = ZoneType.BLOCKED
+    assert graph.full_version == 3
+    assert other.full_version == 0
+
+
+def test_drones_share_paths_and_zones_count_occupants(monkeypatch):
+    graph = build_bottleneck()
+    route = [graph.zones[n] for n in ("hub", "a", "goal")]
+    drones = [Drone(i, path=list(route)) for i in range(1, 4)]
+    assert all(d.path is drones[0].path for d in drones)
+    assert not hasattr(drones[0], "__dict__")
+    assert list(drones[0].path) == route and route[1] in drones[0].path
+
+    hub = graph.zones["hub"]
+    for drone in drones:
+        hub.occupy(drone.drone_id)
+    hub.occupy(2)
+    hub.vacate(2)
+    hub.vacate(2)
+    assert hub.occupancy == 2 and graph.freeze().occupancy[0] == 2
+    assert hub.holds(1) and not hub.holds(2)
+    assert hub.current_drones == {1, 3}
+
+    # en mode debug, chaque zone garde aussi ses ids
+    monkeypatch.setattr("src.models.zone.DEBUG", True)
+    debug = build_bottleneck()
+    debug.zones["a"].occupy(5)
+    assert debug.zones["a"]._drones == {5}
+
+
+def test_route_cache_lru_eviction_and_invalidation():
+    graph = Graph()
+    a, b, c = Zone("a", 0, 0), Zone("b", 1, 0), Zone("c", 2, 0)
+    for zone in (a, b, c):
+        graph.add_zone(zone)
+    cache = RouteCache(graph, maxsize=1)
+    cache.store(a, b, [a, b])
+    assert cache.lookup(a, b) == (True, [a, b])
+    cache.store(a, c, None)
+    assert cache.evictions == 1
+    assert cache.lookup(a, b) == (False, None)
+    assert cache.lookup(a, c) == (True, None)
+    c.occupy(1)
+    assert cache.lookup(a, c) == (False, None)
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_turn_manager_reuses_routes_while_capacity_unchanged():
+    graph = build_bottleneck()
+    drones = make_drones(graph, 3)
+    manager = TurnManager(drones, Simulator(graph, drones))
+    manager.run_turn()
+    # All three plan on the same state (one lookup); drone 1 fills "a",
+    # then drones 2 and 3 share one unreachable lookup.
+    assert manager.route_cache.stats()["misses"] == 2
+    assert manager.route_cache.stats()["hits"] == 3
+
+
+def test_turn_manager_builds_astar_distance_field_on_first_plan():
+    graph = build_bottleneck()
+    drones = make_drones(graph, 2)
+    manager = TurnManager(drones, Simulator(graph, drones), strategy="astar")
+    assert manager.router.distance_field is None
+    manager.run_turn()
+    field = manager.router.distance_field
+    assert field.zones[field.goal] is graph.zones["goal"]
+    assert field.distance(graph.zones["a"]) == 1
+    manager.run_turn()
+    assert manager.router.distance_field is field
+
+
+def test_flow_routes_split_drones_over_flow_corridors():
+    graph = build_bottleneck()
+    for name, x in (("b", 1), ("c", 2)):
+        graph.add_zone(Zone(name, x, 1))
+    graph.add_connection("hub", "b")
+    graph.add_connection("b", "c")
+    graph.add_connection("c", "goal")
+    drones = make_drones(graph, 3)
+    manager = TurnManager(drones, Simulator(graph, drones))
+    manager.flow_routes()
+    assert sorted([z.name for z in d.path] for d in drones) == [
+        ["hub", "a", "goal"], ["hub", "a", "goal"], ["hub", "b", "c", "goal"],
+    ]
+    turns = 0
+    while not all(d.is_at_destination(d.goal) for d in drones):
+        manager.run_turn()
+        turns += 1
+    assert turns == 3
+
+
+def place_drones(graph: Graph, routes):
+    """One MOVING drone per route, occupying the route's first zone."""
+    drones = []
+    for i, names in enumerate(routes, start=1):
+        path = [graph.zones[n] for n in names]
+        path[0].occupy(i)
+        drone = Drone(i, path=path, goal=path[-1])
+        drone.state = DroneState.MOVING
+        drones.append(drone)
+    return drones
+
+
+@pytest.mark.parametrize("name", ["map.txt", "src/maps/easy/linear.txt"])
+def test_turn_manager_moves_each_drone_one_hop_per_turn(name):
+    config = parse_file(os.path.join(ROOT, name))
+    graph, goal = config.graph, config.goal_zone
+    drones = make_drones(graph, config.nb_drones,
+                         config.start_zone.name, goal.name)
+    manager = TurnManager(drones, Simulator(graph, drones))
+    where = {d.drone_id: config.start_zone.name for d in drones}
+    in_transit = {}
+    for _ in range(50):
+        moves = manager.run_turn()
+        ids = [drone_id for drone_id, _ in moves]
+        assert len(ids) == len(set(ids))
+        for drone_id, step in moves:
+            if drone_id in in_transit:
+                # second turn of a restricted transit: lands where it aimed
+                assert step == in_transit.pop(drone_id)
+            elif "-" in step:
+                here, there = step.split("-")
+                assert here == where[drone_id]
+                assert graph.zones[there].z_type == ZoneType.RESTRICTED
+                in_transit[drone_id] = there
+                continue
+            else:
+                assert where[drone_id] in graph.connections[step]
+            where[drone_id] = step
+        if all(d.state == DroneState.ARRIVED for d in drones):
+            break
+    assert set(where.values()) == {goal.name} and not in_transit
+
+
+def test_turn_manager_moves_chains_and_swaps_through_full_zones():
+    graph = Graph()
+    for name in ("a", "b", "c", "x", "y"):
+        graph.add_zone(Zone(name, 0, 0))
+    graph.add_zone(Zone("goal", 0, 0, capacity=10))
+    graph.add_connection("a", "b")
+    graph.add_connection("b", "c")
+    graph.add_connection("c", "goal")
+    graph.add_connection("x", "y", capacity=2)
+    drones = place_drones(graph, [
+        ("a", "b"), ("b", "c"), ("c", "goal"), ("x", "y"), ("y", "x"),
+    ])
+    manager = TurnManager(drones, Simulator(graph, drones))
+    manager.run_turn()
+    assert [d.current_zone.name for d in drones] == [
+        "b", "c", "goal", "y", "x",
+    ]
+    assert not graph.zones["a"].current_drones
+    assert all(len(graph.zones[n].current_drones) == 1 for n in "bcxy")
+
+
+def test_turn_manager_resolution_ignores_drone_order():
+    winners = set()
+    for seed in range(4):
+        graph = Graph()
+        for name in ("p", "q", "r", "s"):
+            graph.add_zone(Zone(name, 0, 0, capacity=10))
+        graph.add_zone(Zone("hub", 0, 0))
+        for name in ("p", "q", "r"):
+            graph.add_connection(name, "hub")
+        graph.add_connection("hub", "s")
+        drones = place_drones(graph, [
+            ("p", "hub", "s"), ("q", "hub"), ("r", "hub"),
+        ])
+        random.Random(seed).shuffle(drones)
+        manager = TurnManager(drones, Simulator(graph, drones))
+        manager.run_turn()
+        winners.add(tuple(graph.zones["hub"].current_drones))
+    # fewest remaining hops first, then the smallest id
+    assert winners == {(2,)}
+
+
+def random_fleet(seed: int, size: int = 6, count: int = 40):
+    """Grid with random capacities and drones on random BFS routes."""
+    rng = random.Random(seed)
+    graph = Graph()
+    for x in range(size):
+        for y in range(size):
+            graph.add_zone(Zone(f"g{x}_{y}", x, y, capacity=rng.randint(1, 3)))
+    for x in range(size):
+        for y in range(size):
+            if x + 1 < size:
+                graph.add_connection(f"g{x}_{y}", f"g{x + 1}_{y}")
+            if y + 1 < size:
+                graph.add_connection(f"g{x}_{y}", f"g{x}_{y + 1}")
+    goal = graph.zones[f"g{size - 1}_{size - 1}"]
+    goal.capacity = count
+    zones = list(graph.zones.values())
+    bfs = BFS(graph)
+    drones = []
+    for i in range(1, count + 1):
+        start = rng.choice(zones)
+        path = bfs.find_route(start, goal) or [start]
+        drone = Drone(i, path=path, goal=goal)
+        if start.has_capacity() and rng.random() < 0.8:
+            start.occupy(i)
+        if rng.random() < 0.1 and len(path) > 1:
+            drone.start_transit_to_restricted(path[1])
+        drones.append(drone)
+    rng.shuffle(drones)
+    return graph, drones
+
+
+def test_vector_engine_matches_object_engine_move_for_move():
+    pytest.importorskip("numpy")
+    from src.simulation.vector_engine import VectorSimulator
+
+    for seed in range(5):
+        graph, drones = random_fleet(seed)
+        vector = VectorSimulator(graph, drones)
+        simulator = Simulator(graph, drones)
+        for _ in range(30):
+            assert vector.tick() == simulator.tick()
+        assert vector.all_arrived == all(
+            d.state == DroneState.ARRIVED for d in drones
+        )
+
+
+def test_vector_engine_runs_shared_routes_without_drone_objects():
+    pytest.importorskip("numpy")
+    from src.simulation.vector_engine import VectorSimulator
+
+    graph = build_bottleneck()
+    graph.zones["hub"].capacity = 1000
+    graph.zones["goal"].capacity = 1000
+    compiled = graph.freeze()
+    route = [compiled.id_of(n) for n in ("hub", "a", "goal")]
+    vector = VectorSimulator.from_routes(graph, [route], [0] * 1000, route[-1])
+    turns = 0
+    while not vector.all_arrived:
+        vector.tick_ids()
+        turns += 1
+    # one drone per turn enters "a", the last one needs a turn to reach
+    # the goal and another for the arrival to be recorded
+    assert turns == 1002
+
+
+def record_fleet(path, seed: int, turns: int = 12, nudge: int = -1):
+    """Log of random_fleet(seed); drone 999 enters the goal at nudge."""
+    graph, drones = random_fleet(seed)
+    simulator = Simulator(graph, drones)
+    live = [capture(graph, drones, 0)]
+    with TurnLogWriter(str(path), graph, drones, interval=4) as log:
+        for turn in range(1, turns + 1):
+            if turn == nudge:
+                graph.zones["g5_5"].occupy(999)
+            simulator.tick()
+            log.record()
+            live.append(capture(graph, drones, turn))
+    return live
+
+
+def test_turn_log_seeks_replays_and_diffs_runs(tmp_path):
+    live = record_fleet(tmp_path / "a.flylog", 5)
+    log = TurnLog(str(tmp_path / "a.flylog"))
+    assert log.turns == 12 and live[12] != live[0]
+    assert [log.state_at(t) for t in range(13)] == live
+    assert [s.copy() for s in log.states()] == live
+    zone, state = log.position(log.state_at(12), log.drone_ids[0])
+    assert zone == log.names[live[12].zone[0]]
+    assert state == list(DroneState)[live[12].state[0]]
+
+    record_fleet(tmp_path / "b.flylog", 5)
+    assert first_divergence(log, TurnLog(str(tmp_path / "b.flylog"))) is None
+    record_fleet(tmp_path / "c.flylog", 5, nudge=7)
+    assert first_divergence(log, TurnLog(str(tmp_path / "c.flylog"))) == 7
+
+    # un arrêt en plein enregistrement laisse les tours complets lisibles
+    data = (tmp_path / "a.flylog").read_bytes()
+    (tmp_path / "cut.flylog").write_bytes(data[:-3])
+    cut = TurnLog(str(tmp_path / "cut.flylog"))
+    assert cut.turns == 11
+    assert first_divergence(log, cut) == 12
+
+
+def test_simulator_only_visits_drones_that_can_move():
+    graph = build_bottleneck()
+    graph.zones["hub"].capacity = 100
+    graph.zones["goal"].capacity = 100
+    route = [graph.zones[n] for n in ("hub", "a", "goal")]
+    drones = []
+    for i in range(1, 51):
+        graph.zones["hub"].occupy(i)
+        drones.append(Drone(i, path=route, goal=graph.zones["goal"]))
+    simulator = Simulator(graph, drones)
+    turns = 0
+    while any(d.state != DroneState.ARRIVED for d in drones) and turns < 100:
+        simulator.tick()
+        turns += 1
+        # the drone in "a", the one woken behind it, and nothing else
+        assert len(simulator.active_drones()) <= 2
+    assert turns == 52
+
+
+def test_turn_manager_replans_parked_drones_onto_a_detour():
+    graph = build_bottleneck()
+    graph.zones["hub"].capacity = 100
+    graph.add_zone(Zone("b", 0, 1))
+    graph.add_zone(Zone("c", 1, 1))
+    graph.add_connection("hub", "b")
+    graph.add_connection("b", "c")
+    graph.add_connection("c", "goal")
+    drones = make_drones(graph, 10)
+    manager = TurnManager(drones, Simulator(graph, drones))
+    turns = 0
+    while any(d.current_zone.name == "hub" for d in drones) and turns < 20:
+        manager.run_turn()
+        turns += 1
+    # one drone leaves per turn through "a", and one more through the
+    # detour whenever it can go on to "c": the waiting drones keep being
+    # replanned
+    assert turns == 6
+    assert sum(graph.zones["c"] in d.path for d in drones) == 4
+
+
+def test_simulator_caps_moves_per_link_and_turn():
+    graph = Graph()
+    graph.add_zone(Zone("hub", 0, 0, capacity=100))
+    graph.add_zone(Zone("a", 1, 0, capacity=100))
+    graph.add_zone(Zone("goal", 2, 0, capacity=100))
+    graph.add_connection("hub", "a", capacity=2)
+    graph.add_connection("a", "goal", capacity=3)
+    route = [graph.zones[n] for n in ("hub", "a", "goal")]
+    drones = []
+    for i in range(1, 7):
+        graph.zones["hub"].occupy(i)
+        drones.append(Drone(i, path=route, goal=graph.zones["goal"]))
+    simulator = Simulator(graph, drones)
+    turns = 0
+    while any(d.state != DroneState.ARRIVED for d in drones) and turns < 20:
+        moves = simulator.tick()
+        turns += 1
+        assert sum(zone == "a" for _, zone in moves) <= 2
+    assert turns == 5
+
+
+def write_maps(tmp_path):
+    (tmp_path / "ok.txt").write_text(
+        "nb_drones: 4\nstart_hub: s 0 0\nend_hub: g 2 0\n"
+        "hub: a 1 0 [max_drones=2]\nconnection: s-a\nconnection: a-g\n"
+    )
+    (tmp_path / "cut.txt").write_text(
+        "nb_drones: 1\nstart_hub: s 0 0\nend_hub: g 2 0\n"
+    )
+    (tmp_path / "bad.txt").write_text("nb_drones: x\n")
+    return tmp_path
+
+
+def test_batch_run_map_reports_turns_and_failures(tmp_path):
+    write_maps(tmp_path)
+    ok = batch.run_map(str(tmp_path / "ok.txt"))
+    assert ok["status"] == "ok"
+    assert (ok["arrived"], ok["turns"], ok["moves"]) == (4, 5, 8)
+    assert ok["peak_memory_kb"] > 0
+    assert batch.run_map(str(tmp_path / "cut.txt"))["status"] == "invalid"
+    bad = batch.run_map(str(tmp_path / "bad.txt"))
+    assert bad["status"] == "error" and "line 1" in bad["error"]
+    slow = batch.run_map(str(tmp_path / "ok.txt"), timeout=1e-9)
+    assert slow["status"] == "timeout"
+
+
+def test_batch_schedule_strategy_plays_the_scheduler_plan(tmp_path):
+    write_maps(tmp_path)
+    planned = batch.run_map(str(tmp_path / "ok.txt"), batch.SCHEDULE)
+    assert planned["status"] == "ok"
+    assert (planned["arrived"], planned["turns"]) == (4, 5)
+    cut = batch.run_map(str(tmp_path / "ok.txt"), batch.SCHEDULE,
+                        max_turns=2)
+    assert (cut["status"], cut["turns"], cut["arrived"]) == ("stuck", 2, 1)
+
+
+def crash_on_bad(filename, *args):
+    if filename.endswith("bad.txt"):
+        os._exit(1)
+    return batch.run_map(filename, *args)
+
+
+def test_batch_isolates_a_crashing_worker(tmp_path, monkeypatch):
+    write_maps(tmp_path)
+    monkeypatch.setattr(batch, "run_map", crash_on_bad)
+    maps = batch.find_maps([str(tmp_path)])
+    results = batch.run_batch(maps, jobs=2)
+    assert [r["status"] for r in results] == ["error", "invalid", "ok"]
+    assert results[0]["error"] == "worker process died"
+    summary = batch.summarize(results)
+    assert summary["status"] == {"error": 1, "invalid": 1, "ok": 1}
+
+
+def test_metrics_log_turns_and_summary_as_json_lines(tmp_path):
+    write_maps(tmp_path)
+    log = str(tmp_path / "run.jsonl")
+    result = batch.run_map(str(tmp_path / "ok.txt"), log=log)
+    assert not metrics.enabled
+    records = [json.loads(line) for line in open(log)]
+    phases = [r["name"] for r in records if r["type"] == "phase"]
+    assert phases == ["lex", "parse", "validate"]
+    turns = [r for r in records if r["type"] == "turn"]
+    assert len(turns) == result["turns"]
+    assert sum(t["counters"].get("moves", 0) for t in turns) > 0
+    summary = records[-1]
+    assert summary["type"] == "summary"
+    assert summary["counters"]["replans"] >= 1
+    assert summary["counters"]["nodes_expanded"] >= 3
+    assert set(summary["phases"]) >= {"plan", "simulate", "parse"}
+    assert summary["histograms"]["turn_us"]["count"] == result["turns"]
+
+
+def test_metrics_chrome_trace_and_disabled_by_default(tmp_path):
+    graph = build_bottleneck()
+    drones = make_drones(graph, 3)
+    manager = TurnManager(drones, Simulator(graph, drones))
+    before = metrics.turn
+    manager.run_turn()
+    assert not metrics.enabled and metrics.turn == before
+    trace = str(tmp_path / "run.json")
+    metrics.enable(trace)
+    try:
+        for _ in range(4):
+            manager.run_turn()
+    finally:
+        metrics.disable()
+    events = json.load(open(trace))["traceEvents"]
+    spans = [e for e in events if e["ph"] == "X"]
+    assert [e["name"] for e in spans] == ["turn"] * 4
+    assert all(e["dur"] >= 0 for e in spans)
+    assert events[-1]["args"]["turns"] == 4
+
+
+def test_renderer_draws_in_batches_and_replays_turns(tmp_path):
+    from PIL import Image
+    from src.visualization.renderer import (
+        MapRenderer, record_run, write_animation,
+    )
+
+    graph = build_bottleneck()
+    start, goal = graph.zones["hub"], graph.zones["goal"]
+    renderer = MapRenderer(graph, start, goal)
+    assert renderer.segments.shape == (2, 2, 2)
+    fig = renderer.figure()
+    assert len(fig.axes[0].collections) == 2
+    assert len(fig.axes[0].texts) == 3
+    # too many zones in view: only start and goal keep their names
+    fig = MapRenderer(graph, start, goal, label_limit=2).figure()
+    assert sorted(t.get_text() for t in fig.axes[0].texts) == [
+        "goal", "hub"]
+    renderer.save(str(tmp_path / "map.svg"))
+    assert (tmp_path / "map.svg").stat().st_size > 0
+
+    drones = make_drones(graph, 3)
+    frames = record_run(TurnManager(drones, Simulator(graph, drones)),
+                        drones)
+    assert frames[0].tolist() == [[0.0, 0.0]] * 3
+    assert frames[-1].tolist() == [[2.0, 0.0]] * 3
+    write_animation(renderer, frames, str(tmp_path / "run.gif"))
+    assert Image.open(tmp_path / "run.gif").n_frames == len(frames)
+
+
+class CountingOut(io.StringIO):
+    """StringIO that counts write calls."""
+
+    writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_move_writer_buffers_turn_lines():
+    from src.visualization.formatter import MoveWriter, format_turn
+
+    assert format_turn([(3, "c"), (1, "b")]) == "D1-b D3-c"
+    with pytest.raises(ValueError, match="D3 moves twice"):
+        format_turn([(3, "a"), (1, "b"), (3, "c")])
+    out = CountingOut()
+    with MoveWriter(out, buffer_size=60) as writer:
+        for turn in range(5):
+            writer.write_turn([(1, f"z{turn}"), (2, "goal")])
+        assert out.writes == 1
+        writer.write_turn([])
+    assert out.getvalue().splitlines() == [
+        f"D1-z{turn} D2-goal" for turn in range(5)] + [""]
+    assert out.writes == 2
+
+
+def test_console_renderer_repaints_changed_cells_only():
+    from src.visualization.console_renderer import ConsoleRenderer
+
+    graph = build_bottleneck()
+    drones = make_drones(graph, 2)
+    for drone in drones:
+        graph.zones["hub"].occupy(drone.drone_id)
+    now = [0.0]
+    out = io.StringIO()
+    screen = ConsoleRenderer(graph, graph.zones["hub"], graph.zones["goal"],
+                             out=out, fps=2, clock=lambda: now[0])
+    assert screen.update("turn 0")
+    assert out.getvalue().endswith("2.G\x1b[2;1H\x1b[Kturn 0")
+    manager = TurnManager(drones, Simulator(graph, drones))
+    manager.run_turn()
+    now[0] = 0.1
+    assert not screen.update("turn 1")
+    now[0] = 0.6
+    out.seek(0)
+    out.truncate()
+    assert screen.update("turn 1")
+    # hub lost one drone, "a" gained one; goal is unchanged
+    assert out.getvalue() == (
+        "\x1b[1;1H1\x1b[1;2H1\x1b[2;1H\x1b[Kturn 1"
+    )